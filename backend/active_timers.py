@@ -0,0 +1,112 @@
+from typing import List, Optional
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from models import ActiveTimer, TimerSession
+from rollups import refresh_rollups
+
+
+class TimerConflict(Exception):
+    """Another request changed a habit's running timer since it was read."""
+
+
+def running_session(db: Session, habit_id: int) -> Optional[TimerSession]:
+    """The running session of a habit, found by primary key through active_timers."""
+    return db.query(TimerSession).join(
+        ActiveTimer, ActiveTimer.session_id == TimerSession.id
+    ).filter(ActiveTimer.habit_id == habit_id).first()
+
+
+def running_sessions(db: Session) -> List[TimerSession]:
+    """Every running session; reads only as many rows as there are running timers."""
+    return db.query(TimerSession).join(ActiveTimer, ActiveTimer.session_id == TimerSession.id).all()
+
+
+def mark_running(db: Session, session: TimerSession, replaces: Optional[int] = None):
+    """Record a newly started session as its habit's running timer.
+
+    `replaces` is the id of the running session the caller found (None when it
+    found none). The record only moves if it still points there, and the
+    habit_id primary key rejects a second insert, so of two concurrent starts
+    one raises TimerConflict instead of orphaning the other's session. The
+    caller must roll back on TimerConflict.
+    """
+    db.flush()
+    if replaces is None:
+        db.add(ActiveTimer(habit_id=session.habit_id, session_id=session.id))
+        try:
+            db.flush()
+        except IntegrityError:
+            raise TimerConflict(session.habit_id)
+        return
+
+    moved = db.query(ActiveTimer).filter(
+        ActiveTimer.habit_id == session.habit_id,
+        ActiveTimer.session_id == replaces
+    ).update({ActiveTimer.session_id: session.id}, synchronize_session=False)
+    if moved == 0:
+        raise TimerConflict(session.habit_id)
+
+
+def mark_stopped(db: Session, session: TimerSession):
+    """Remove a stopped session's running-timer record; TimerConflict if it no longer has it."""
+    removed = db.query(ActiveTimer).filter(
+        ActiveTimer.habit_id == session.habit_id,
+        ActiveTimer.session_id == session.id
+    ).delete(synchronize_session=False)
+    if removed == 0:
+        raise TimerConflict(session.habit_id)
+
+
+def reconcile_active_timers(db: Session) -> dict:
+    """Repair running-timer state left behind by crashes, from timer_sessions.
+
+    A habit with several running sessions keeps the newest; each older one is
+    closed when the next one started. active_timers is then made to point at
+    exactly the running sessions. Returns counts of what was repaired.
+    """
+    sessions_by_habit = {}
+    for session in db.query(TimerSession).filter(TimerSession.is_running == True).order_by(
+        TimerSession.habit_id, TimerSession.start_time, TimerSession.id
+    ):
+        sessions_by_habit.setdefault(session.habit_id, []).append(session)
+
+    closed = []
+    for sessions in sessions_by_habit.values():
+        for stale, following in zip(sessions, sessions[1:]):
+            stale.end_time = max(following.start_time, stale.start_time)
+            stale.duration_seconds = int((stale.end_time - stale.start_time).total_seconds())
+            stale.is_running = False
+            closed.append(stale)
+
+    active = {record.habit_id: record for record in db.query(ActiveTimer)}
+    added = repointed = 0
+    for habit_id, sessions in sessions_by_habit.items():
+        record = active.pop(habit_id, None)
+        if record is None:
+            db.add(ActiveTimer(habit_id=habit_id, session_id=sessions[-1].id))
+            added += 1
+        elif record.session_id != sessions[-1].id:
+            record.session_id = sessions[-1].id
+            repointed += 1
+    for record in active.values():
+        db.delete(record)
+
+    if closed:
+        db.flush()
+        refresh_rollups(
+            db,
+            min(session.date for session in closed),
+            max(session.date for session in closed),
+            sorted({session.habit_id for session in closed})
+        )
+    db.commit()
+
+    return {
+        "running": len(sessions_by_habit),
+        "closed_sessions": len(closed),
+        "added": added,
+        "repointed": repointed,
+        "removed": len(active),
+    }
@@ -0,0 +1,82 @@
+import functools
+import inspect
+
+from fastapi import APIRouter, Depends, Response
+from fastapi.params import Depends as DependsParam
+from fastapi.routing import APIRoute
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import get_db, get_async_db
+
+
+def _db_parameter(endpoint) -> str | None:
+    """Name of the endpoint parameter that depends on get_db, if any."""
+    for name, parameter in inspect.signature(endpoint).parameters.items():
+        default = parameter.default
+        if isinstance(default, DependsParam) and default.dependency is get_db:
+            return name
+    return None
+
+
+def async_endpoint(endpoint, response_model=None):
+    """Turn a sync `def` handler using get_db into an `async def` handler on the async engine.
+
+    The handler body runs through AsyncSession.run_sync, so its queries go
+    through asyncpg/aiosqlite on the event loop instead of blocking a
+    threadpool thread. The result is validated against the response model
+    inside the same greenlet, so serialization never lazy-loads afterwards.
+    Coroutine handlers and handlers without a database are returned as is.
+    """
+    db_parameter = _db_parameter(endpoint)
+    if db_parameter is None or inspect.iscoroutinefunction(endpoint):
+        return endpoint
+
+    adapter = TypeAdapter(response_model) if response_model is not None else None
+
+    def call(sync_db, kwargs):
+        result = endpoint(**kwargs, **{db_parameter: sync_db})
+        if adapter is not None and not isinstance(result, Response):
+            result = adapter.validate_python(result, from_attributes=True)
+        return result
+
+    @functools.wraps(endpoint)
+    async def wrapper(**kwargs):
+        db = kwargs.pop(db_parameter)
+        return await db.run_sync(call, kwargs)
+
+    signature = inspect.signature(endpoint)
+    wrapper.__signature__ = signature.replace(parameters=[
+        parameter.replace(default=Depends(get_async_db), annotation=AsyncSession)
+        if name == db_parameter else parameter
+        for name, parameter in signature.parameters.items()
+    ])
+    return wrapper
+
+
+def async_router(router: APIRouter) -> APIRouter:
+    """Copy of a router whose database handlers run on the async engine."""
+    converted = APIRouter()
+    for route in router.routes:
+        if not isinstance(route, APIRoute):
+            converted.routes.append(route)
+            continue
+        converted.add_api_route(
+            route.path,
+            async_endpoint(route.endpoint, route.response_model),
+            response_model=route.response_model,
+            status_code=route.status_code,
+            tags=route.tags,
+            dependencies=route.dependencies,
+            summary=route.summary,
+            description=route.description,
+            response_description=route.response_description,
+            responses=route.responses,
+            deprecated=route.deprecated,
+            methods=route.methods,
+            operation_id=route.operation_id,
+            include_in_schema=route.include_in_schema,
+            response_class=route.response_class,
+            name=route.name,
+        )
+    return converted
@@ -0,0 +1,297 @@
+import csv
+import gzip
+import io
+import json
+from datetime import date, datetime
+from typing import IO, Iterator
+
+from sqlalchemy import Date, DateTime, Table, func, select, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from models import (
+    Habit, HabitLog, HabitStreak, Note, TimerSession, TimerSessionArchive,
+    DailySummary, HabitDailySummary, ActiveTimer, AppSettings
+)
+from streaming import chunked, gzipped
+from streaks import rebuild_streaks
+from rollups import rebuild_rollups
+from notes_search import rebuild_note_index
+from response_cache import invalidate_all_responses
+from settings_service import expire_settings, settings_cache
+
+BACKUP_FORMAT = "eye-life-backup"
+BACKUP_VERSION = 1
+
+# Source tables in dependency order; streaks, rollups, active timers and the
+# note search index are derived from them and rebuilt after a restore
+BACKUP_TABLES: list[Table] = [
+    Habit.__table__,
+    HabitLog.__table__,
+    TimerSession.__table__,
+    TimerSessionArchive.__table__,
+    Note.__table__,
+    AppSettings.__table__,
+]
+
+# (table, column) -> table whose ids it must reference
+FOREIGN_KEYS = {
+    ("habit_logs", "habit_id"): "habits",
+    ("timer_sessions", "habit_id"): "habits",
+}
+
+# Rows read per round trip while backing up, and written per statement while restoring
+BACKUP_BATCH_SIZE = 1000
+
+
+class BackupError(ValueError):
+    """A backup file that cannot be restored; nothing was written."""
+
+
+def clear_account(db: Session):
+    """Delete every habit, log, timer, note and setting inside the caller's transaction."""
+    # Children first due to foreign keys
+    for model in (
+        HabitDailySummary, DailySummary, ActiveTimer, TimerSession, TimerSessionArchive,
+        HabitLog, HabitStreak, Habit, Note, AppSettings
+    ):
+        db.query(model).delete()
+
+
+def _encode(value):
+    return value.isoformat() if isinstance(value, (date, datetime)) else value
+
+
+def _backup_lines(db: Session) -> Iterator[str]:
+    yield json.dumps({
+        "type": "header",
+        "format": BACKUP_FORMAT,
+        "version": BACKUP_VERSION,
+        "created_at": datetime.utcnow().isoformat(),
+        "tables": [table.name for table in BACKUP_TABLES],
+    }) + "\n"
+
+    counts = {}
+    for table in BACKUP_TABLES:
+        columns = [column.name for column in table.columns]
+        yield json.dumps({"type": "table", "name": table.name, "columns": columns}) + "\n"
+        count = 0
+        rows = db.execute(
+            select(table).order_by(*table.primary_key.columns),
+            execution_options={"yield_per": BACKUP_BATCH_SIZE}
+        )
+        for row in rows:
+            yield json.dumps([_encode(value) for value in row], ensure_ascii=False) + "\n"
+            count += 1
+        counts[table.name] = count
+
+    # Lets a restore tell a complete file from a truncated one
+    yield json.dumps({"type": "end", "counts": counts}) + "\n"
+
+
+def stream_backup(compress: bool = False) -> Iterator[bytes]:
+    """Every source table as newline-delimited JSON, read in one snapshot and streamed in chunks.
+
+    Each table starts with a line naming it and its columns, followed by
+    one JSON array per row. Runs on its own session, like the notes export.
+    """
+    db = SessionLocal()
+    try:
+        # Every table from the same snapshot, even while the app keeps writing
+        dialect_name = db.get_bind().dialect.name
+        if dialect_name == "postgresql":
+            db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+        elif dialect_name == "sqlite":
+            # pysqlite only opens a transaction before writes, so each SELECT would see
+            # its own snapshot; under WAL an explicit read transaction does not block writers
+            db.connection().exec_driver_sql("BEGIN")
+        chunks = chunked(_backup_lines(db))
+        yield from gzipped(chunks) if compress else chunks
+    finally:
+        db.close()
+
+
+def _converters(table: Table, columns: list[str]) -> list:
+    converters = []
+    for name in columns:
+        column_type = table.columns[name].type
+        if isinstance(column_type, DateTime):
+            converters.append(datetime.fromisoformat)
+        elif isinstance(column_type, Date):
+            converters.append(date.fromisoformat)
+        else:
+            converters.append(None)
+    return converters
+
+
+def _copy_rows(db: Session, table: Table, columns: list[str], rows: list[list]):
+    """Load rows with COPY, the fastest path into Postgres."""
+    buffer = io.StringIO()
+    # Strings are quoted, so only None (unquoted and empty) is read as NULL
+    csv.writer(buffer, quoting=csv.QUOTE_NONNUMERIC).writerows(
+        [[_encode(value) for value in row] for row in rows]
+    )
+    buffer.seek(0)
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer
+        )
+    finally:
+        cursor.close()
+
+
+class _Restore:
+    """Writes the rows of a backup file in batches, checking them as they go."""
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.use_copy = db.get_bind().dialect.driver == "psycopg2"
+        self.ids: dict[str, set] = {}
+        self.counts: dict[str, int] = {}
+
+    def write(self, table: Table, columns: list[str], rows: list[list]):
+        for (table_name, column), parent in FOREIGN_KEYS.items():
+            if table_name != table.name or column not in columns:
+                continue
+            position = columns.index(column)
+            missing = {row[position] for row in rows} - self.ids.get(parent, set())
+            missing.discard(None)
+            if missing:
+                raise BackupError(
+                    f"{table.name}.{column} references missing {parent} ids: {sorted(missing)[:10]}"
+                )
+        if table.name in {parent for parent in FOREIGN_KEYS.values()}:
+            position = columns.index("id")
+            self.ids.setdefault(table.name, set()).update(row[position] for row in rows)
+
+        if self.use_copy:
+            _copy_rows(self.db, table, columns, rows)
+        else:
+            # One executemany per batch
+            self.db.execute(table.insert(), [dict(zip(columns, row)) for row in rows])
+        self.counts[table.name] = self.counts.get(table.name, 0) + len(rows)
+
+
+def _read_lines(stream: IO[bytes]) -> Iterator[tuple[int, object]]:
+    number = 0
+    try:
+        if stream.read(2) != b"\x1f\x8b":
+            stream.seek(0)
+        else:
+            stream.seek(0)
+            stream = gzip.GzipFile(fileobj=stream, mode="rb")
+        for number, line in enumerate(io.TextIOWrapper(stream, encoding="utf-8"), start=1):
+            if line.strip():
+                try:
+                    yield number, json.loads(line)
+                except ValueError:
+                    raise BackupError(f"Line {number} is not valid JSON")
+    except (UnicodeDecodeError, EOFError, gzip.BadGzipFile):
+        raise BackupError(f"Line {number + 1} could not be decoded")
+
+
+def _restore_rows(db: Session, stream: IO[bytes]) -> dict:
+    lines = _read_lines(stream)
+    number, header = next(lines, (0, None))
+    if not isinstance(header, dict) or header.get("format") != BACKUP_FORMAT:
+        raise BackupError("Not an Eye Life backup")
+    if header.get("version") != BACKUP_VERSION:
+        raise BackupError(f"Unsupported backup version {header.get('version')}")
+
+    tables = {table.name: table for table in BACKUP_TABLES}
+    restore = _Restore(db)
+    table, columns, converters, batch = None, [], [], []
+    end = None
+
+    for number, line in lines:
+        if isinstance(line, list):
+            if table is None or len(line) != len(columns):
+                raise BackupError(f"Line {number}: row outside a table or with the wrong number of values")
+            try:
+                batch.append([
+                    convert(value) if convert and value is not None else value
+                    for convert, value in zip(converters, line)
+                ])
+            except (TypeError, ValueError):
+                raise BackupError(f"Line {number}: invalid date in {table.name}")
+            if len(batch) >= BACKUP_BATCH_SIZE:
+                restore.write(table, columns, batch)
+                batch = []
+            continue
+
+        if batch:
+            restore.write(table, columns, batch)
+            batch = []
+        kind = line.get("type") if isinstance(line, dict) else None
+        if kind == "table":
+            table = tables.get(line.get("name"))
+            if table is None:
+                raise BackupError(f"Line {number}: unknown table {line.get('name')!r}")
+            columns = line.get("columns") or []
+            unknown = set(columns) - set(table.columns.keys())
+            if unknown or ("id" not in columns and table.name in FOREIGN_KEYS.values()):
+                raise BackupError(f"Line {number}: columns of {table.name} do not match: {sorted(unknown)}")
+            converters = _converters(table, columns)
+        elif kind == "end":
+            end = line
+            break
+        else:
+            raise BackupError(f"Line {number}: unexpected line")
+
+    if end is None:
+        raise BackupError("The backup is truncated")
+    expected = {name: count for name, count in (end.get("counts") or {}).items() if count}
+    if expected != restore.counts:
+        raise BackupError(f"Row counts do not match the backup: expected {expected}, read {restore.counts}")
+    return restore.counts
+
+
+def _reset_sequences(db: Session):
+    # Explicit ids leave Postgres sequences behind; move them past the restored rows
+    for table in BACKUP_TABLES:
+        if "id" in table.columns and table.columns["id"].autoincrement:
+            db.execute(text(
+                f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), "
+                f"COALESCE((SELECT MAX(id) FROM {table.name}), 0) + 1, false)"
+            ))
+
+
+def restore_backup(db: Session, stream: IO[bytes], replace: bool = False) -> dict:
+    """Load a backup made by stream_backup, all source rows in one transaction.
+
+    The account must be empty unless replace is set, in which case it is
+    cleared in the same transaction. Rows referencing habits that are not
+    in the backup abort the restore. Derived tables are rebuilt afterwards.
+    """
+    try:
+        if replace:
+            clear_account(db)
+        elif any(db.query(func.count()).select_from(table).scalar() for table in BACKUP_TABLES):
+            raise BackupError("The database already has data; restore with replace to overwrite it")
+
+        try:
+            counts = _restore_rows(db, stream)
+        except IntegrityError as e:
+            raise BackupError(f"The backup violates a constraint: {e.orig}")
+
+        if db.get_bind().dialect.name == "postgresql":
+            _reset_sequences(db)
+        db.execute(text(
+            "INSERT INTO active_timers (habit_id, session_id) "
+            "SELECT habit_id, MAX(id) FROM timer_sessions WHERE is_running = :running GROUP BY habit_id"
+        ), {"running": True})
+        rebuild_note_index(db)
+        expire_settings(db)
+        invalidate_all_responses(db)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    settings_cache.invalidate()
+
+    # Derived tables, rebuilt in their own batches
+    rebuild_streaks(db)
+    rebuild_rollups(db)
+    return {"tables": counts}
@@ -0,0 +1,38 @@
+from typing import Iterable
+
+from sqlalchemy.orm import Session
+
+from models import CacheVersion
+from habit_logs import dialect_insert
+
+
+def read_versions(db: Session, names: Iterable[str]) -> dict[str, int]:
+    """Current version of each named cache in one query; never-bumped names are at 0."""
+    names = list(names)
+    versions = dict.fromkeys(names, 0)
+    versions.update(db.query(CacheVersion.name, CacheVersion.version).filter(CacheVersion.name.in_(names)).all())
+    return versions
+
+
+def read_version(db: Session, name: str) -> int:
+    return read_versions(db, [name])[name]
+
+
+def bump_versions(db: Session, *names: str):
+    """Increment the named versions inside the caller's transaction, one upsert per name."""
+    db.flush()
+    insert = dialect_insert(db.get_bind().dialect.name)
+    for name in names:
+        if insert is None:
+            updated = db.query(CacheVersion).filter(CacheVersion.name == name).update(
+                {CacheVersion.version: CacheVersion.version + 1}, synchronize_session=False
+            )
+            if not updated:
+                db.add(CacheVersion(name=name, version=1))
+            continue
+        # Concurrent first bumps of a name cannot both insert it
+        statement = insert(CacheVersion).values(name=name, version=1)
+        db.execute(statement.on_conflict_do_update(
+            index_elements=["name"], set_={"version": CacheVersion.version + 1}
+        ))
+    db.flush()
@@ -0,0 +1,137 @@
+from datetime import date, timedelta
+from typing import List, NamedTuple, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from models import Habit, HabitLog
+from habit_logs import upsert_habit_log
+from streaks import record_completion
+
+# Days recomputed per transaction by replay_carryover
+REPLAY_BATCH_DAYS = 365
+
+
+class Balance(NamedTuple):
+    carryover: int = 0
+    deficit: int = 0
+
+
+def next_day_balance(log: Optional[HabitLog], estimated: int) -> Balance:
+    """Carryover/deficit a day's log passes on to the next day."""
+    if log is None:
+        return Balance()
+    time_spent = log.time_spent_seconds or 0
+    if log.completed or time_spent >= estimated:
+        return Balance(carryover=max(0, time_spent - estimated))
+    if log.is_placeholder:
+        # Nothing was logged that day; passing its inherited balance on would chain deficits forward
+        return Balance()
+    # Whatever is missing, the whole estimate when nothing was done
+    return Balance(deficit=estimated - time_spent)
+
+
+def apply_carryover(
+    db: Session,
+    start: date,
+    end: date,
+    habit_ids: Optional[List[int]] = None,
+    retro_complete: bool = False
+) -> dict:
+    """Recompute the carryover/deficit of days start+1 .. end+1 from the logs of start .. end. Does not commit."""
+    db.flush()
+    one_day = timedelta(days=1)
+    first = start - one_day if retro_complete else start
+
+    habit_query = db.query(Habit.id, Habit.estimated_duration_seconds).filter(
+        Habit.has_timer == True,
+        Habit.estimated_duration_seconds > 0
+    )
+    if habit_ids is not None:
+        habit_query = habit_query.filter(Habit.id.in_(habit_ids))
+    estimates = dict(habit_query.all())
+    report = {"updated": 0, "created": 0, "retro_completed": 0}
+    if not estimates:
+        return report
+
+    logs = {
+        (log.habit_id, log.date): log
+        for log in db.query(HabitLog).filter(
+            HabitLog.habit_id.in_(list(estimates)),
+            HabitLog.date >= first,
+            HabitLog.date <= end + one_day
+        )
+    }
+
+    for habit_id, estimated in estimates.items():
+        # A day whose time together with the previous day's makes up the estimate completes the previous day
+        if retro_complete:
+            day = start
+            while day <= end:
+                previous = logs.get((habit_id, day - one_day))
+                current = logs.get((habit_id, day))
+                if (
+                    previous and current and not previous.completed and (previous.deficit_seconds or 0) > 0
+                    and previous.time_spent_seconds + current.time_spent_seconds >= estimated
+                ):
+                    previous.completed = True
+                    previous.deficit_seconds = 0
+                    previous.is_placeholder = False
+                    record_completion(db, habit_id, day - one_day, True)
+                    report["retro_completed"] += 1
+                day += one_day
+
+        day = first
+        while day <= end:
+            balance = next_day_balance(logs.get((habit_id, day)), estimated)
+            next_log = logs.get((habit_id, day + one_day))
+            if next_log is not None:
+                if (next_log.carryover_seconds or 0, next_log.deficit_seconds or 0) != balance:
+                    next_log.carryover_seconds, next_log.deficit_seconds = balance
+                    report["updated"] += 1
+            elif balance != Balance():
+                logs[(habit_id, day + one_day)] = upsert_habit_log(
+                    db, habit_id, day + one_day,
+                    carryover_seconds=balance.carryover,
+                    deficit_seconds=balance.deficit
+                )
+                report["created"] += 1
+            day += one_day
+
+    db.flush()
+    return report
+
+
+def replay_carryover(
+    db: Session,
+    habit_ids: Optional[List[int]] = None,
+    batch_days: int = REPLAY_BATCH_DAYS,
+    start: Optional[date] = None,
+    end: Optional[date] = None
+) -> dict:
+    """Recompute carryover/deficit across all history (or start .. end), committing every batch_days."""
+    first, last = start, end
+    if first is None or last is None:
+        query = db.query(func.min(HabitLog.date), func.max(HabitLog.date))
+        if habit_ids is not None:
+            query = query.filter(HabitLog.habit_id.in_(habit_ids))
+        logged_first, logged_last = query.one()
+        first, last = first or logged_first, last or logged_last
+    report = {"start": None, "end": None, "batches": 0, "updated": 0, "created": 0}
+    if first is None:
+        return report
+
+    # Start a day early so the first logged day's own balance is reset too
+    window_start = first - timedelta(days=1)
+    while window_start <= last:
+        window_end = min(window_start + timedelta(days=batch_days - 1), last)
+        result = apply_carryover(db, window_start, window_end, habit_ids)
+        db.commit()
+        report["batches"] += 1
+        report["updated"] += result["updated"]
+        report["created"] += result["created"]
+        window_start = window_end + timedelta(days=1)
+
+    report["start"] = first.isoformat()
+    report["end"] = last.isoformat()
+    return report
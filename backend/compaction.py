@@ -0,0 +1,125 @@
+import os
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import func, insert, literal, select, tuple_, or_, and_
+from sqlalchemy.orm import Session
+
+from models import TimerSession, TimerSessionArchive
+
+# Sessions on days older than this many days are folded into one row per habit per day
+COMPACTION_HORIZON_DAYS = int(os.getenv("TIMER_COMPACTION_HORIZON_DAYS", "30"))
+
+# Copy raw sessions to timer_sessions_archive before folding them
+COMPACTION_ARCHIVE = os.getenv("TIMER_COMPACTION_ARCHIVE", "false").lower() == "true"
+
+# (habit, day) groups folded per transaction
+COMPACTION_BATCH_SIZE = 500
+
+
+def _candidate_groups(db: Session, cutoff: date, after: Optional[tuple], limit: int):
+    """Next (habit, day) groups before cutoff with more than one finished session, in (date, habit_id) order."""
+    query = db.query(
+        TimerSession.date,
+        TimerSession.habit_id,
+        func.count(TimerSession.id),
+        func.sum(TimerSession.duration_seconds),
+        func.sum(TimerSession.session_count),
+        func.min(TimerSession.start_time),
+        func.max(TimerSession.end_time)
+    ).filter(
+        TimerSession.date < cutoff,
+        TimerSession.is_running == False
+    )
+    if after is not None:
+        last_date, last_habit_id = after
+        query = query.filter(or_(
+            TimerSession.date > last_date,
+            and_(TimerSession.date == last_date, TimerSession.habit_id > last_habit_id)
+        ))
+    return query.group_by(TimerSession.date, TimerSession.habit_id).having(
+        func.count(TimerSession.id) > 1
+    ).order_by(TimerSession.date, TimerSession.habit_id).limit(limit).all()
+
+
+def compact_timer_sessions(
+    db: Session,
+    horizon_days: int = COMPACTION_HORIZON_DAYS,
+    archive: bool = COMPACTION_ARCHIVE,
+    batch_size: int = COMPACTION_BATCH_SIZE,
+    today: Optional[date] = None
+) -> dict:
+    """Fold finished sessions older than the horizon into one row per habit per day.
+
+    The aggregate row keeps the day's summed duration_seconds, the first start
+    and last end, and how many raw sessions it replaces, so every reader that
+    sums durations per habit and day sees the same totals. Each batch of
+    groups is its own short transaction. Running sessions and sessions within
+    the horizon (always including today) are never touched.
+    """
+    if horizon_days < 1:
+        raise ValueError("horizon_days must be at least 1 so today's sessions stay intact")
+    today = today or date.today()
+    cutoff = today - timedelta(days=horizon_days - 1)
+
+    rows_before = db.query(func.count(TimerSession.id)).scalar()
+    groups_compacted = sessions_folded = archived = batches = 0
+    after = None
+
+    while True:
+        groups = _candidate_groups(db, cutoff, after, batch_size)
+        if not groups:
+            break
+        keys = [(habit_id, group_date) for group_date, habit_id, *_ in groups]
+        raw = and_(
+            tuple_(TimerSession.habit_id, TimerSession.date).in_(keys),
+            TimerSession.is_running == False
+        )
+
+        if archive:
+            archived += db.execute(
+                insert(TimerSessionArchive).from_select(
+                    ["session_id", "habit_id", "date", "start_time", "end_time", "duration_seconds", "archived_at"],
+                    # Aggregate rows are not archived; their raw sessions were when they were made
+                    select(
+                        TimerSession.id,
+                        TimerSession.habit_id,
+                        TimerSession.date,
+                        TimerSession.start_time,
+                        TimerSession.end_time,
+                        TimerSession.duration_seconds,
+                        literal(datetime.utcnow())
+                    ).where(raw, TimerSession.session_count == 1)
+                )
+            ).rowcount
+
+        db.query(TimerSession).filter(raw).delete(synchronize_session=False)
+        db.bulk_insert_mappings(TimerSession, [
+            {
+                "habit_id": habit_id,
+                "date": group_date,
+                "start_time": first_start,
+                "end_time": last_end,
+                "duration_seconds": seconds or 0,
+                "is_running": False,
+                "session_count": folded,
+            }
+            for group_date, habit_id, count, seconds, folded, first_start, last_end in groups
+        ])
+        db.commit()
+
+        batches += 1
+        groups_compacted += len(groups)
+        sessions_folded += sum(count for _, _, count, *_ in groups)
+        after = (groups[-1][0], groups[-1][1])
+
+    rows_after = db.query(func.count(TimerSession.id)).scalar()
+    return {
+        "cutoff": cutoff.isoformat(),
+        "rows_before": rows_before,
+        "rows_after": rows_after,
+        "groups_compacted": groups_compacted,
+        "sessions_folded": sessions_folded,
+        "archived": archived,
+        "batches": batches,
+    }
@@ -2,6 +2,8 @@ import os
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
 
+from db_pool import engine_options, apply_sqlite_pragmas
+
 # Use DATABASE_URL from environment, fallback to SQLite for local development
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./eye_life.db")
 
@@ -12,9 +14,42 @@ if DATABASE_URL.startswith("postgres://"):
 # SQLite needs special args
 connect_args = {"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {}
 
-engine = create_engine(DATABASE_URL, connect_args=connect_args)
+# Pool size, overflow, timeout, pre-ping and recycle come from DB_POOL_* variables
+engine = create_engine(DATABASE_URL, connect_args=connect_args, **engine_options(DATABASE_URL))
+if DATABASE_URL.startswith("sqlite"):
+    apply_sqlite_pragmas(engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# "sync" serves requests from FastAPI's threadpool on the engine above,
+# "async" serves them on the event loop through an asyncpg/aiosqlite engine
+DB_MODE = os.getenv("DB_MODE", "sync").lower()
+if DB_MODE not in ("sync", "async"):
+    raise ValueError(f"DB_MODE must be 'sync' or 'async', got {DB_MODE!r}")
+
+
+def async_database_url(url: str) -> str:
+    """Map a sync DATABASE_URL to the matching async driver."""
+    if url.startswith("postgresql://"):
+        # asyncpg takes `ssl` where libpq takes `sslmode`
+        return url.replace("postgresql://", "postgresql+asyncpg://", 1).replace("sslmode=", "ssl=")
+    if url.startswith("sqlite://"):
+        return url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+    return url
+
+
+async_engine = None
+AsyncSessionLocal = None
+if DB_MODE == "async":
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+    async_engine = create_async_engine(
+        async_database_url(DATABASE_URL), **engine_options(DATABASE_URL, asynchronous=True)
+    )
+    if DATABASE_URL.startswith("sqlite"):
+        apply_sqlite_pragmas(async_engine.sync_engine)
+    # Objects stay loaded after commit so responses never lazy-load outside a greenlet
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 
 class Base(DeclarativeBase):
     pass
@@ -26,3 +61,8 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
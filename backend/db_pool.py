@@ -0,0 +1,136 @@
+import os
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+# PRAGMAs applied to every new SQLite connection
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"),
+    "mmap_size": os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)),
+}
+
+
+def env_int(name: str, default: int) -> int:
+    return int(os.getenv(name, str(default)))
+
+
+def env_bool(name: str, default: bool) -> bool:
+    return os.getenv(name, "true" if default else "false").lower() in ("1", "true", "yes", "on")
+
+
+def pool_options() -> dict:
+    """Queue pool settings from the environment, shared by the sync and async engines."""
+    return {
+        "pool_size": env_int("DB_POOL_SIZE", 5),
+        "max_overflow": env_int("DB_MAX_OVERFLOW", 10),
+        "pool_timeout": env_int("DB_POOL_TIMEOUT", 30),
+        # Test connections on checkout so idle-killed ones are replaced transparently
+        "pool_pre_ping": env_bool("DB_POOL_PRE_PING", True),
+        # Recycle before the server's idle timeout closes connections
+        "pool_recycle": env_int("DB_POOL_RECYCLE", 1800),
+    }
+
+
+class PoolMetrics:
+    """Checkout counters for one pool, safe to update from many threads."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record(self, waited: float, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "avg_wait_ms": round(self.total_wait / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                "max_wait_ms": round(self.max_wait * 1000, 3),
+            }
+
+
+class TimedPoolMixin:
+    """Measures how long each checkout waits for a pooled connection."""
+
+    metrics: PoolMetrics
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.metrics.record(time.perf_counter() - started, timed_out=True)
+            raise
+        self.metrics.record(time.perf_counter() - started)
+        return connection
+
+    def recreate(self):
+        # engine.dispose() swaps in a fresh pool; keep the counters
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+class TimedQueuePool(TimedPoolMixin, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def engine_options(url: str, asynchronous: bool = False) -> dict:
+    """create_engine keyword arguments for the pool of a database URL."""
+    if ":memory:" in url or url.rstrip("/").endswith("sqlite:"):
+        # In-memory SQLite lives in a single connection; keep SQLAlchemy's default pool
+        return {}
+    return {"poolclass": TimedAsyncQueuePool if asynchronous else TimedQueuePool, **pool_options()}
+
+
+def apply_sqlite_pragmas(engine: Engine):
+    """Set WAL mode and the other SQLITE_PRAGMAS on every new connection of a SQLite engine."""
+
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+
+def pool_stats(engine: Engine) -> dict:
+    """Occupancy and checkout wait times of an engine's pool."""
+    pool = engine.pool
+    stats = {"pool": type(pool).__name__, "status": pool.status()}
+    if isinstance(pool, QueuePool):
+        stats.update({
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": pool.overflow(),
+            "timeout": pool.timeout(),
+        })
+    if isinstance(pool, TimedPoolMixin):
+        stats.update(pool.metrics.snapshot())
+    return stats
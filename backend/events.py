@@ -0,0 +1,73 @@
+import asyncio
+import json
+import threading
+
+# Events buffered per client; a client that falls further behind is told to resync
+SUBSCRIBER_QUEUE_SIZE = 64
+
+# Seconds between keepalive comments on an idle stream
+KEEPALIVE_SECONDS = 15
+
+RESYNC = {"type": "resync"}
+
+
+class Subscription:
+    """One connected client: a bounded queue owned by the event loop serving it."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+
+    def deliver(self, event: dict):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Drop what the client has not read yet; it gets a fresh snapshot instead
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(RESYNC)
+
+
+class EventBroker:
+    """In-process pub/sub. Publishing is non-blocking and safe from any thread.
+
+    Events only reach clients connected to the same process, so every
+    worker serving the stream must also serve the writes that publish.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers: set[Subscription] = set()
+
+    def subscribe(self) -> Subscription:
+        """Register a client. Must be called from the event loop that will read it."""
+        subscription = Subscription(asyncio.get_running_loop())
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._subscribers)
+
+    def publish(self, event: dict):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, event)
+            except RuntimeError:
+                # The loop serving this client has closed
+                self.unsubscribe(subscription)
+
+
+def format_sse(event: dict) -> str:
+    """Encode an event as a server-sent event named after its type."""
+    return f"event: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
+
+
+timer_events = EventBroker()
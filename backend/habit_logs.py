@@ -0,0 +1,136 @@
+from datetime import date
+from typing import List, Optional
+
+from sqlalchemy.orm import Session
+
+from models import HabitLog
+
+# Columns of the unique (habit_id, date) index the upsert conflicts on
+CONFLICT_COLUMNS = ["habit_id", "date"]
+
+
+def dialect_insert(dialect_name: str):
+    """The dialect's INSERT with ON CONFLICT support, or None when it has none."""
+    if dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+        return insert
+    if dialect_name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+        return insert
+    return None
+
+
+def upsert_habit_log(
+    db: Session,
+    habit_id: int,
+    log_date: date,
+    completed: Optional[bool] = None,
+    time_spent_seconds: Optional[int] = None,
+    add_seconds: Optional[int] = None,
+    carryover_seconds: Optional[int] = None,
+    deficit_seconds: Optional[int] = None
+) -> HabitLog:
+    """Insert or update the log of a habit for a day in a single statement.
+
+    Fields left as None keep their current value (or the column default on
+    insert). `add_seconds` is added to the stored time_spent_seconds inside the
+    statement, so concurrent increments never overwrite each other. A row
+    inserted without completion or time is a placeholder for the previous
+    day's balance until either is written. Relies on the unique (habit_id,
+    date) index; on dialects without ON CONFLICT support it falls back to a
+    read followed by a write.
+    """
+    db.flush()
+    table = HabitLog.__table__
+    insert = dialect_insert(db.get_bind().dialect.name)
+    logged = completed is not None or time_spent_seconds is not None or add_seconds is not None
+    add_seconds = add_seconds or 0
+
+    if insert is None:
+        log = db.query(HabitLog).filter(
+            HabitLog.habit_id == habit_id,
+            HabitLog.date == log_date
+        ).first()
+        if log is None:
+            log = HabitLog(habit_id=habit_id, date=log_date, completed=False, time_spent_seconds=0,
+                           carryover_seconds=0, deficit_seconds=0, is_placeholder=not logged)
+            db.add(log)
+        elif logged:
+            log.is_placeholder = False
+        if completed is not None:
+            log.completed = completed
+        if time_spent_seconds is not None:
+            log.time_spent_seconds = time_spent_seconds
+        log.time_spent_seconds = (log.time_spent_seconds or 0) + add_seconds
+        if carryover_seconds is not None:
+            log.carryover_seconds = carryover_seconds
+        if deficit_seconds is not None:
+            log.deficit_seconds = deficit_seconds
+        db.flush()
+        return log
+
+    statement = insert(HabitLog).values(
+        habit_id=habit_id,
+        date=log_date,
+        completed=bool(completed),
+        time_spent_seconds=(time_spent_seconds or 0) + add_seconds,
+        carryover_seconds=carryover_seconds or 0,
+        deficit_seconds=deficit_seconds or 0,
+        is_placeholder=not logged
+    )
+
+    # On conflict, only touch the fields the caller asked for
+    updates = {}
+    if completed is not None:
+        updates["completed"] = statement.excluded.completed
+    if time_spent_seconds is not None:
+        updates["time_spent_seconds"] = statement.excluded.time_spent_seconds
+    elif add_seconds:
+        updates["time_spent_seconds"] = table.c.time_spent_seconds + add_seconds
+    if carryover_seconds is not None:
+        updates["carryover_seconds"] = statement.excluded.carryover_seconds
+    if deficit_seconds is not None:
+        updates["deficit_seconds"] = statement.excluded.deficit_seconds
+    if logged:
+        updates["is_placeholder"] = False
+    if not updates:
+        # A no-op update still returns the existing row
+        updates["habit_id"] = statement.excluded.habit_id
+
+    statement = statement.on_conflict_do_update(
+        index_elements=CONFLICT_COLUMNS,
+        set_=updates
+    ).returning(HabitLog)
+
+    return db.scalars(statement, execution_options={"populate_existing": True}).one()
+
+
+def upsert_habit_logs(db: Session, rows: List[dict]) -> int:
+    """Insert or update many (habit_id, date, completed, time_spent_seconds) logs at once.
+
+    Existing logs of those days get the given completion and time; carryover
+    and deficit are left alone. Each (habit_id, date) may appear only once.
+    Runs as one executemany on dialects with ON CONFLICT support.
+    """
+    if not rows:
+        return 0
+    db.flush()
+    insert = dialect_insert(db.get_bind().dialect.name)
+
+    if insert is None:
+        for row in rows:
+            upsert_habit_log(db, row["habit_id"], row["date"], completed=row["completed"],
+                             time_spent_seconds=row["time_spent_seconds"])
+        return len(rows)
+
+    statement = insert(HabitLog.__table__)
+    statement = statement.on_conflict_do_update(
+        index_elements=CONFLICT_COLUMNS,
+        set_={
+            "completed": statement.excluded.completed,
+            "time_spent_seconds": statement.excluded.time_spent_seconds,
+            "is_placeholder": False,
+        }
+    )
+    db.execute(statement, rows)
+    return len(rows)
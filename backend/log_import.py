@@ -0,0 +1,208 @@
+import csv
+import io
+import json
+from datetime import date, timedelta
+from typing import IO, Iterator, Optional
+
+from sqlalchemy.orm import Session
+
+from models import Habit
+from habit_logs import upsert_habit_logs
+from carryover import replay_carryover
+from streaks import rebuild_streaks
+from rollups import refresh_rollups, REBUILD_BATCH_DAYS
+from response_cache import invalidate_responses, LOGS
+
+IMPORT_FORMATS = ("csv", "jsonl")
+
+# Logs written per executemany
+IMPORT_BATCH_SIZE = 5000
+
+# Row errors listed in the report; the rest are only counted
+MAX_REPORTED_ERRORS = 100
+
+# Accepted spellings of each field; the first is the canonical one
+FIELD_NAMES = {
+    "habit": ("habit", "habit_id", "habit_name", "name"),
+    "date": ("date", "day"),
+    "completed": ("completed", "done"),
+    "seconds": ("seconds", "time_spent_seconds", "duration_seconds"),
+}
+
+TRUE_VALUES = {"1", "true", "yes", "y", "sim", "x"}
+FALSE_VALUES = {"", "0", "false", "no", "n", "nao", "não"}
+
+
+class LogImportError(ValueError):
+    """An import that cannot be read at all; nothing was written."""
+
+
+class ImportRowError(ValueError):
+    """A row that is skipped and reported."""
+
+
+def _records(stream: IO[bytes], fmt: str) -> Iterator[tuple[int, dict]]:
+    """(line number, raw record) of each row of a CSV (with a header) or JSONL stream."""
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    try:
+        if fmt == "csv":
+            reader = csv.DictReader(text)
+            header = set(reader.fieldnames or [])
+            if not all(header & set(FIELD_NAMES[name]) for name in ("habit", "date")):
+                raise LogImportError("The CSV header must name at least the habit and date columns")
+            for record in reader:
+                yield reader.line_num, record
+            return
+        for number, line in enumerate(text, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                record = None
+            yield number, record if isinstance(record, dict) else {"__invalid__": True}
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise LogImportError(f"The file could not be read: {e}")
+
+
+def _field(record: dict, name: str):
+    for key in FIELD_NAMES[name]:
+        if key in record:
+            return record[key]
+    return None
+
+
+def _parse_bool(value) -> bool:
+    if isinstance(value, bool):
+        return value
+    text = str(value if value is not None else "").strip().lower()
+    if text in TRUE_VALUES:
+        return True
+    if text in FALSE_VALUES:
+        return False
+    raise ImportRowError(f"completed must be true or false, got {value!r}")
+
+
+def _parse_seconds(value) -> int:
+    if value is None or value == "":
+        return 0
+    try:
+        seconds = int(value)
+    except (TypeError, ValueError):
+        raise ImportRowError(f"seconds must be a whole number, got {value!r}")
+    if seconds < 0:
+        raise ImportRowError("seconds must not be negative")
+    return seconds
+
+
+class _HabitLookup:
+    """Resolves the habit column, given either as an id or as a name (case-insensitive)."""
+
+    def __init__(self, db: Session):
+        habits = db.query(Habit.id, Habit.name).all()
+        self.ids = {habit_id for habit_id, _ in habits}
+        self.by_name = {name.strip().lower(): habit_id for habit_id, name in habits}
+
+    def resolve(self, value) -> int:
+        if isinstance(value, int) and not isinstance(value, bool):
+            if value in self.ids:
+                return value
+        elif isinstance(value, str) and value.strip():
+            text = value.strip()
+            if text.isdigit() and int(text) in self.ids:
+                return int(text)
+            if text.lower() in self.by_name:
+                return self.by_name[text.lower()]
+        raise ImportRowError(f"unknown habit {value!r}")
+
+
+def _parse_row(record: dict, habits: _HabitLookup, today: date) -> dict:
+    if record.get("__invalid__"):
+        raise ImportRowError("not a JSON object")
+    habit_id = habits.resolve(_field(record, "habit"))
+    try:
+        log_date = date.fromisoformat(str(_field(record, "date") or "").strip())
+    except ValueError:
+        raise ImportRowError(f"date must be YYYY-MM-DD, got {_field(record, 'date')!r}")
+    if log_date > today:
+        raise ImportRowError(f"{log_date} is in the future")
+    return {
+        "habit_id": habit_id,
+        "date": log_date,
+        "completed": _parse_bool(_field(record, "completed")),
+        "time_spent_seconds": _parse_seconds(_field(record, "seconds")),
+    }
+
+
+def import_habit_logs(
+    db: Session,
+    stream: IO[bytes],
+    fmt: str = "csv",
+    dry_run: bool = False,
+    batch_size: int = IMPORT_BATCH_SIZE,
+    today: Optional[date] = None
+) -> dict:
+    """Upsert (habit, date, completed, seconds) rows from a CSV or JSONL stream.
+
+    Habits are given by id or name. Rows that do not parse are skipped and
+    listed in the report; a later row for the same habit and day wins. All
+    logs are written in one transaction, batch_size rows per statement, and
+    carryover, streaks and rollups are derived once afterwards for the
+    imported habits and days. A dry_run writes the logs and rolls them back.
+    """
+    today = today or date.today()
+    habits = _HabitLookup(db)
+    report = {
+        "rows": 0, "imported": 0, "skipped": 0, "errors": [],
+        "habits": [], "start": None, "end": None, "dry_run": dry_run,
+    }
+
+    batch: dict[tuple[int, date], dict] = {}
+    habit_ids, first, last = set(), None, None
+    try:
+        for number, record in _records(stream, fmt):
+            report["rows"] += 1
+            try:
+                row = _parse_row(record, habits, today)
+            except ImportRowError as e:
+                report["skipped"] += 1
+                if len(report["errors"]) < MAX_REPORTED_ERRORS:
+                    report["errors"].append({"line": number, "error": str(e)})
+                continue
+
+            key = (row["habit_id"], row["date"])
+            batch[key] = row
+            habit_ids.add(row["habit_id"])
+            first = min(first, row["date"]) if first else row["date"]
+            last = max(last, row["date"]) if last else row["date"]
+            if len(batch) >= batch_size:
+                report["imported"] += upsert_habit_logs(db, list(batch.values()))
+                batch = {}
+        report["imported"] += upsert_habit_logs(db, list(batch.values()))
+        if dry_run:
+            db.rollback()
+        else:
+            invalidate_responses(db, LOGS)
+            db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    report["habits"] = sorted(habit_ids)
+    report["start"] = first.isoformat() if first else None
+    report["end"] = last.isoformat() if last else None
+    if dry_run or not habit_ids:
+        return report
+
+    # Derived data, once for the whole import
+    habit_list = sorted(habit_ids)
+    # Like a by-date edit, an imported day always sets the next day's carryover/deficit
+    report["carryover"] = replay_carryover(db, habit_list, start=first, end=last)
+    report["streaks"] = rebuild_streaks(db, habit_list)
+    window_start = first - timedelta(days=1)
+    while window_start <= last + timedelta(days=1):
+        window_end = min(window_start + timedelta(days=REBUILD_BATCH_DAYS - 1), last + timedelta(days=1))
+        refresh_rollups(db, window_start, window_end, habit_list)
+        db.commit()
+        window_start = window_end + timedelta(days=1)
+    return report
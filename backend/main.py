@@ -1,17 +1,37 @@
 import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
 
-from database import engine, Base
-from routers import habits, notes, timers, dashboard, settings, auth
+from database import DB_MODE, SessionLocal
+from active_timers import reconcile_active_timers
+from manage import check_schema
+from pagination import NEXT_CURSOR_HEADER
+from routers import habits, notes, timers, dashboard, settings, auth, admin
+
+# The schema is managed by migrations, applied at deploy time with `python manage.py migrate`
+
+
+def reconcile_timers():
+    with SessionLocal() as db:
+        reconcile_active_timers(db)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Refuse to start on a database that `python manage.py migrate` has not brought up to date
+    await run_in_threadpool(check_schema)
+    # Repair running timers left inconsistent by a crash before serving requests
+    await run_in_threadpool(reconcile_timers)
+    yield
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
 
 app = FastAPI(
     title="Eye Life API",
     description="API for daily life tracking - habits, notes, and timers",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS configuration
@@ -32,15 +52,16 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
-# Include routers
-app.include_router(auth.router)
-app.include_router(habits.router)
-app.include_router(notes.router)
-app.include_router(timers.router)
-app.include_router(dashboard.router)
-app.include_router(settings.router)
+# Include routers (on the async engine when DB_MODE=async)
+routers = [auth.router, habits.router, notes.router, timers.router, dashboard.router, settings.router, admin.router]
+if DB_MODE == "async":
+    from async_routes import async_router
+    routers = [async_router(router) for router in routers]
+for router in routers:
+    app.include_router(router)
 
 
 @app.get("/")
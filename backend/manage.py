@@ -0,0 +1,260 @@
+"""Maintenance commands for the Eye Life backend.
+
+Usage: python manage.py <command> [options]
+"""
+import argparse
+import json
+import os
+import sys
+
+from database import SessionLocal, engine
+
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.abspath(__file__)), "alembic.ini")
+
+# Hot query shapes and the index each one must use: (label, index name or alternatives per dialect, SQL)
+HOT_QUERIES = [
+    (
+        "habit log for a habit and day",
+        "uq_habit_logs_habit_id_date",
+        "SELECT * FROM habit_logs WHERE habit_id = 1 AND date = '2024-01-01'",
+    ),
+    (
+        "running timer for a habit",
+        ("INTEGER PRIMARY KEY", "active_timers_pkey"),
+        "SELECT timer_sessions.* FROM active_timers"
+        " JOIN timer_sessions ON timer_sessions.id = active_timers.session_id WHERE active_timers.habit_id = 1",
+    ),
+    (
+        "timer sessions for a habit and day",
+        "ix_timer_sessions_habit_id_date",
+        "SELECT SUM(duration_seconds) FROM timer_sessions WHERE habit_id = 1 AND date = '2024-01-01'",
+    ),
+    (
+        "notes for a day, newest first",
+        "ix_notes_date_created_at",
+        "SELECT * FROM notes WHERE date = '2024-01-01' ORDER BY created_at DESC",
+    ),
+]
+
+
+def alembic_config():
+    from alembic.config import Config
+
+    config = Config(ALEMBIC_INI)
+    config.set_main_option("script_location", os.path.join(os.path.dirname(ALEMBIC_INI), "migrations"))
+    return config
+
+
+def expire_cached_responses(db):
+    """Make running servers recompute cached responses after a rebuild."""
+    from response_cache import invalidate_responses, LOGS
+
+    invalidate_responses(db, LOGS)
+    db.commit()
+
+
+def cmd_migrate(args):
+    """Apply pending migrations; on an empty database they build the whole schema."""
+    from alembic import command
+
+    command.upgrade(alembic_config(), args.revision)
+
+
+def explain_hot_queries(connection) -> list[tuple[str, tuple, bool, str]]:
+    """(label, expected index names, whether the plan uses one, plan) for each of HOT_QUERIES."""
+    from sqlalchemy import text
+
+    postgres = connection.dialect.name == "postgresql"
+    if postgres:
+        # Tiny tables are cheaper to scan; force the planner to show whether an index is usable
+        connection.execute(text("SET enable_seqscan = off"))
+    results = []
+    for label, index, sql in HOT_QUERIES:
+        prefix = "EXPLAIN " if postgres else "EXPLAIN QUERY PLAN "
+        plan = "\n".join(str(row[-1]) for row in connection.execute(text(prefix + sql)))
+        expected = (index,) if isinstance(index, str) else index
+        results.append((label, expected, any(name in plan for name in expected), plan))
+    if postgres:
+        connection.execute(text("RESET enable_seqscan"))
+    return results
+
+
+def check_schema():
+    """Raise when the database is not migrated to the latest revision."""
+    from alembic.runtime.migration import MigrationContext
+    from alembic.script import ScriptDirectory
+
+    heads = set(ScriptDirectory.from_config(alembic_config()).get_heads())
+    with engine.connect() as connection:
+        current = set(MigrationContext.configure(connection).get_current_heads())
+    if current != heads:
+        raise RuntimeError(
+            f"The database schema is at revision {', '.join(sorted(current)) or 'none'}, "
+            f"expected {', '.join(sorted(heads))}; run `python manage.py migrate` first"
+        )
+
+
+def cmd_explain(args):
+    """Check with EXPLAIN that the hot queries are served by their indexes."""
+    with engine.connect() as connection:
+        results = explain_hot_queries(connection)
+    for label, expected, uses_index, plan in results:
+        print(f"{'ok  ' if uses_index else 'FAIL'} {label}: expected {' or '.join(expected)}")
+        if not uses_index:
+            print("     " + plan.replace("\n", "\n     "))
+    return 0 if all(uses_index for _, _, uses_index, _ in results) else 1
+
+
+def cmd_rebuild_streaks(args):
+    from streaks import rebuild_streaks
+
+    with SessionLocal() as db:
+        report = {"habits": rebuild_streaks(db)}
+        expire_cached_responses(db)
+        print(json.dumps(report))
+
+
+def cmd_check_streaks(args):
+    from streaks import check_streaks
+
+    with SessionLocal() as db:
+        mismatches = check_streaks(db)
+    print(json.dumps({"consistent": not mismatches, "mismatches": mismatches}, default=str))
+    return 1 if mismatches else 0
+
+
+def cmd_rebuild_rollups(args):
+    from rollups import rebuild_rollups
+
+    with SessionLocal() as db:
+        report = rebuild_rollups(db, batch_days=args.batch_days)
+        expire_cached_responses(db)
+        print(json.dumps(report))
+
+
+def cmd_reconcile_timers(args):
+    from active_timers import reconcile_active_timers
+
+    with SessionLocal() as db:
+        report = reconcile_active_timers(db)
+        expire_cached_responses(db)
+        print(json.dumps(report))
+
+
+def cmd_compact_timers(args):
+    from compaction import compact_timer_sessions
+
+    with SessionLocal() as db:
+        print(json.dumps(compact_timer_sessions(
+            db, horizon_days=args.horizon_days, archive=args.archive, batch_size=args.batch_size
+        )))
+
+
+def cmd_replay_carryover(args):
+    from carryover import replay_carryover
+
+    with SessionLocal() as db:
+        report = replay_carryover(db, batch_days=args.batch_days)
+        expire_cached_responses(db)
+        print(json.dumps(report))
+
+
+def cmd_backup(args):
+    from backup import stream_backup
+
+    compress = args.gzip or (args.output or "").endswith(".gz")
+    output = open(args.output, "wb") if args.output else sys.stdout.buffer
+    try:
+        for chunk in stream_backup(compress=compress):
+            output.write(chunk)
+    finally:
+        if args.output:
+            output.close()
+
+
+def cmd_restore(args):
+    from backup import restore_backup, BackupError
+
+    with open(args.file, "rb") as backup_file, SessionLocal() as db:
+        try:
+            report = restore_backup(db, backup_file, replace=args.replace)
+        except BackupError as e:
+            print(f"Restore failed, nothing was written: {e}", file=sys.stderr)
+            return 1
+    print(json.dumps(report))
+
+
+def cmd_import_logs(args):
+    from log_import import import_habit_logs, LogImportError
+
+    fmt = args.format or ("jsonl" if args.file.endswith((".jsonl", ".ndjson")) else "csv")
+    with open(args.file, "rb") as import_file, SessionLocal() as db:
+        try:
+            report = import_habit_logs(db, import_file, fmt, dry_run=args.dry_run, batch_size=args.batch_size)
+        except LogImportError as e:
+            print(f"Import failed, nothing was written: {e}", file=sys.stderr)
+            return 1
+    print(json.dumps(report))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Eye Life maintenance commands")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    migrate = commands.add_parser("migrate", help="Apply pending migrations")
+    migrate.add_argument("revision", nargs="?", default="head", help="Target revision (default: head)")
+    migrate.set_defaults(func=cmd_migrate)
+
+    commands.add_parser("explain", help="Check that hot queries use their indexes").set_defaults(func=cmd_explain)
+
+    commands.add_parser("rebuild-streaks", help="Recompute the habit_streaks table").set_defaults(func=cmd_rebuild_streaks)
+    commands.add_parser("check-streaks", help="Compare habit_streaks with a full recompute").set_defaults(func=cmd_check_streaks)
+
+    rollups = commands.add_parser("rebuild-rollups", help="Regenerate daily rollups from raw rows")
+    rollups.add_argument("--batch-days", type=int, default=90, help="Days recomputed per transaction")
+    rollups.set_defaults(func=cmd_rebuild_rollups)
+
+    commands.add_parser(
+        "reconcile-timers", help="Repair running timers and active_timers after a crash"
+    ).set_defaults(func=cmd_reconcile_timers)
+
+    replay = commands.add_parser("replay-carryover", help="Recompute carryover/deficit for all history")
+    replay.add_argument("--batch-days", type=int, default=365, help="Days recomputed per transaction")
+    replay.set_defaults(func=cmd_replay_carryover)
+
+    from compaction import COMPACTION_HORIZON_DAYS, COMPACTION_ARCHIVE, COMPACTION_BATCH_SIZE
+
+    compact = commands.add_parser("compact-timers", help="Fold old timer sessions into one row per habit per day")
+    compact.add_argument("--horizon-days", type=int, default=COMPACTION_HORIZON_DAYS,
+                         help="Keep raw sessions for this many days, today included")
+    compact.add_argument("--archive", action=argparse.BooleanOptionalAction, default=COMPACTION_ARCHIVE,
+                         help="Copy raw sessions to timer_sessions_archive before folding them")
+    compact.add_argument("--batch-size", type=int, default=COMPACTION_BATCH_SIZE,
+                         help="(habit, day) groups folded per transaction")
+    compact.set_defaults(func=cmd_compact_timers)
+
+    backup = commands.add_parser("backup", help="Write every habit, log, timer, note and setting as NDJSON")
+    backup.add_argument("-o", "--output", help="File to write (default: stdout); a .gz name implies --gzip")
+    backup.add_argument("--gzip", action="store_true", help="Compress the backup")
+    backup.set_defaults(func=cmd_backup)
+
+    restore = commands.add_parser("restore", help="Load a backup into an empty database")
+    restore.add_argument("file", help="Backup file, plain or gzipped")
+    restore.add_argument("--replace", action="store_true", help="Delete the existing data first")
+    restore.set_defaults(func=cmd_restore)
+
+    from log_import import IMPORT_FORMATS, IMPORT_BATCH_SIZE
+
+    import_logs = commands.add_parser("import-logs", help="Upsert historical habit logs from CSV or JSONL")
+    import_logs.add_argument("file", help="Rows of habit (id or name), date, completed, seconds")
+    import_logs.add_argument("--format", choices=IMPORT_FORMATS, help="Default: from the file extension")
+    import_logs.add_argument("--dry-run", action="store_true", help="Validate and report without writing")
+    import_logs.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE, help="Logs written per statement")
+    import_logs.set_defaults(func=cmd_import_logs)
+
+    args = parser.parse_args()
+    raise SystemExit(args.func(args) or 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+"""Helpers that keep migrations safe to run on databases already at the target shape.
+
+Databases created before migrations existed (or by `Base.metadata.create_all`
+in older releases) may already have any table, so each migration checks before
+creating anything.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+def has_column(table: str, column: str) -> bool:
+    return column in {c["name"] for c in sa.inspect(op.get_bind()).get_columns(table)}
+
+
+def has_index(table: str, index: str) -> bool:
+    return index in {i["name"] for i in sa.inspect(op.get_bind()).get_indexes(table)}
+
+
+def has_table(table: str) -> bool:
+    return sa.inspect(op.get_bind()).has_table(table)
+
+
+def create_index_if_missing(index: str, table: str, columns: list, unique: bool = False):
+    if not has_index(table, index):
+        op.create_index(index, table, columns, unique=unique)
+
+
+def drop_index_if_present(index: str, table: str):
+    if has_index(table, index):
+        op.drop_index(index, table_name=table)
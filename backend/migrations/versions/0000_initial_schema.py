@@ -0,0 +1,96 @@
+"""Tables of the schema that predates migrations
+
+Databases created before migrations existed already have them, so each
+table is only created when missing.
+
+Revision ID: 0000
+Revises:
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from migrations.helpers import has_table
+
+# revision identifiers, used by Alembic.
+revision: str = "0000"
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if not has_table("habits"):
+        op.create_table(
+            "habits",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("name", sa.String(255), nullable=False),
+            sa.Column("description", sa.Text(), nullable=True),
+            sa.Column("is_repeatable", sa.Boolean(), nullable=True),
+            sa.Column("has_timer", sa.Boolean(), nullable=True),
+            sa.Column("estimated_duration_seconds", sa.Integer(), nullable=True),
+            sa.Column("schedule_days", sa.String(50), nullable=True),
+            sa.Column("start_date", sa.Date(), nullable=True),
+            sa.Column("is_archived", sa.Boolean(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.Column("is_active", sa.Boolean(), nullable=True),
+        )
+        op.create_index("ix_habits_id", "habits", ["id"])
+
+    if not has_table("habit_logs"):
+        op.create_table(
+            "habit_logs",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("habit_id", sa.Integer(), sa.ForeignKey("habits.id"), nullable=False),
+            sa.Column("date", sa.Date(), nullable=False),
+            sa.Column("completed", sa.Boolean(), nullable=True),
+            sa.Column("time_spent_seconds", sa.Integer(), nullable=True),
+            sa.Column("carryover_seconds", sa.Integer(), nullable=True),
+            sa.Column("deficit_seconds", sa.Integer(), nullable=True),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+        )
+        op.create_index("ix_habit_logs_id", "habit_logs", ["id"])
+
+    if not has_table("notes"):
+        op.create_table(
+            "notes",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("content", sa.Text(), nullable=False),
+            sa.Column("date", sa.Date(), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=True),
+            sa.Column("updated_at", sa.DateTime(), nullable=True),
+        )
+        op.create_index("ix_notes_id", "notes", ["id"])
+
+    if not has_table("timer_sessions"):
+        op.create_table(
+            "timer_sessions",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("habit_id", sa.Integer(), sa.ForeignKey("habits.id"), nullable=False),
+            sa.Column("date", sa.Date(), nullable=False),
+            sa.Column("start_time", sa.DateTime(), nullable=False),
+            sa.Column("end_time", sa.DateTime(), nullable=True),
+            sa.Column("duration_seconds", sa.Integer(), nullable=True),
+            sa.Column("is_running", sa.Boolean(), nullable=True),
+        )
+        op.create_index("ix_timer_sessions_id", "timer_sessions", ["id"])
+
+    if not has_table("app_settings"):
+        op.create_table(
+            "app_settings",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("key", sa.String(100), nullable=False, unique=True),
+            sa.Column("value", sa.String(255), nullable=True),
+        )
+        op.create_index("ix_app_settings_id", "app_settings", ["id"])
+
+
+def downgrade() -> None:
+    op.drop_table("app_settings")
+    op.drop_table("timer_sessions")
+    op.drop_table("notes")
+    op.drop_table("habit_logs")
+    op.drop_table("habits")
@@ -0,0 +1,73 @@
+"""Composite indexes for the hot query shapes and unique habit_logs (habit_id, date)
+
+Revision ID: 0001
+Revises: 0000
+Create Date: 2026-10-16
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from migrations.helpers import create_index_if_missing, drop_index_if_present
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, Sequence[str], None] = "0000"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def merge_duplicate_logs():
+    """Collapse duplicate (habit_id, date) logs into the oldest row so the unique index can be built.
+
+    The merged row is completed if any duplicate was, and keeps the largest time values.
+    """
+    bind = op.get_bind()
+    duplicates = bind.execute(sa.text("""
+        SELECT habit_id, date, MIN(id),
+               MAX(CASE WHEN completed THEN 1 ELSE 0 END),
+               MAX(time_spent_seconds), MAX(carryover_seconds), MAX(deficit_seconds)
+        FROM habit_logs
+        GROUP BY habit_id, date
+        HAVING COUNT(*) > 1
+    """)).all()
+
+    for habit_id, log_date, keep_id, completed, time_spent, carryover, deficit in duplicates:
+        bind.execute(
+            sa.text("""
+                UPDATE habit_logs
+                SET completed = :completed, time_spent_seconds = :time_spent,
+                    carryover_seconds = :carryover, deficit_seconds = :deficit
+                WHERE id = :keep_id
+            """),
+            {
+                "completed": bool(completed),
+                "time_spent": time_spent or 0,
+                "carryover": carryover or 0,
+                "deficit": 0 if completed else (deficit or 0),
+                "keep_id": keep_id,
+            }
+        )
+        bind.execute(
+            sa.text("DELETE FROM habit_logs WHERE habit_id = :habit_id AND date = :date AND id <> :keep_id"),
+            {"habit_id": habit_id, "date": log_date, "keep_id": keep_id}
+        )
+
+
+def upgrade() -> None:
+    merge_duplicate_logs()
+    create_index_if_missing("uq_habit_logs_habit_id_date", "habit_logs", ["habit_id", "date"], unique=True)
+    create_index_if_missing("ix_habit_logs_date", "habit_logs", ["date"])
+    create_index_if_missing("ix_timer_sessions_habit_id_is_running", "timer_sessions", ["habit_id", "is_running"])
+    create_index_if_missing("ix_timer_sessions_habit_id_date", "timer_sessions", ["habit_id", "date"])
+    create_index_if_missing("ix_notes_date_created_at", "notes", ["date", "created_at"])
+
+
+def downgrade() -> None:
+    drop_index_if_present("ix_notes_date_created_at", "notes")
+    drop_index_if_present("ix_timer_sessions_habit_id_date", "timer_sessions")
+    drop_index_if_present("ix_timer_sessions_habit_id_is_running", "timer_sessions")
+    drop_index_if_present("ix_habit_logs_date", "habit_logs")
+    drop_index_if_present("uq_habit_logs_habit_id_date", "habit_logs")
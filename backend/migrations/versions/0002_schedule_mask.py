@@ -0,0 +1,56 @@
+"""Add habits.schedule_mask and backfill it from schedule_days
+
+Replaces the startup-time column check that shipped with the bitmask.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-16
+
+"""
+import json
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from migrations.helpers import has_column
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, Sequence[str], None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Bit n set = scheduled on weekday n (0=Monday, 6=Sunday)
+EVERY_DAY_MASK = 0b1111111
+
+
+def schedule_days_to_mask(schedule_days) -> int:
+    """The bitmask of a schedule_days JSON list; missing, empty or malformed means every day."""
+    try:
+        days = json.loads(schedule_days) if schedule_days else None
+        mask = 0
+        for day in days or ():
+            mask |= 1 << day
+    except (json.JSONDecodeError, TypeError):
+        return EVERY_DAY_MASK
+    return mask or EVERY_DAY_MASK
+
+
+def upgrade() -> None:
+    if not has_column("habits", "schedule_mask"):
+        op.add_column(
+            "habits",
+            sa.Column("schedule_mask", sa.Integer(), nullable=False, server_default=str(EVERY_DAY_MASK))
+        )
+        bind = op.get_bind()
+        for habit_id, schedule_days in bind.execute(sa.text("SELECT id, schedule_days FROM habits")).all():
+            bind.execute(
+                sa.text("UPDATE habits SET schedule_mask = :mask WHERE id = :id"),
+                {"mask": schedule_days_to_mask(schedule_days), "id": habit_id}
+            )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("habits") as batch_op:
+        batch_op.drop_column("schedule_mask")
@@ -0,0 +1,40 @@
+"""Add active_timers, the index of running timer sessions
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-16
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from migrations.helpers import has_table
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, Sequence[str], None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if not has_table("active_timers"):
+        op.create_table(
+            "active_timers",
+            sa.Column("habit_id", sa.Integer(), sa.ForeignKey("habits.id"), primary_key=True),
+            sa.Column("session_id", sa.Integer(), sa.ForeignKey("timer_sessions.id"), nullable=False, unique=True),
+        )
+
+    # Index the newest running session per habit unless an older release already did
+    bind = op.get_bind()
+    if bind.execute(sa.text("SELECT COUNT(*) FROM active_timers")).scalar() == 0:
+        bind.execute(sa.text("""
+            INSERT INTO active_timers (habit_id, session_id)
+            SELECT habit_id, MAX(id) FROM timer_sessions WHERE is_running = :running GROUP BY habit_id
+        """), {"running": True})
+
+
+def downgrade() -> None:
+    op.drop_table("active_timers")
@@ -0,0 +1,48 @@
+"""Add timer_sessions.session_count and the timer_sessions_archive table for compaction
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from migrations.helpers import has_column, has_table, create_index_if_missing
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, Sequence[str], None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if not has_column("timer_sessions", "session_count"):
+        op.add_column(
+            "timer_sessions",
+            sa.Column("session_count", sa.Integer(), nullable=False, server_default="1")
+        )
+
+    if not has_table("timer_sessions_archive"):
+        op.create_table(
+            "timer_sessions_archive",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("session_id", sa.Integer(), nullable=False),
+            sa.Column("habit_id", sa.Integer(), nullable=False),
+            sa.Column("date", sa.Date(), nullable=False),
+            sa.Column("start_time", sa.DateTime(), nullable=False),
+            sa.Column("end_time", sa.DateTime(), nullable=True),
+            sa.Column("duration_seconds", sa.Integer(), nullable=True),
+            sa.Column("archived_at", sa.DateTime(), nullable=True),
+        )
+    create_index_if_missing("ix_timer_sessions_archive_id", "timer_sessions_archive", ["id"])
+    create_index_if_missing("ix_timer_sessions_archive_habit_id", "timer_sessions_archive", ["habit_id"])
+
+
+def downgrade() -> None:
+    op.drop_table("timer_sessions_archive")
+    with op.batch_alter_table("timer_sessions") as batch_op:
+        batch_op.drop_column("session_count")
@@ -0,0 +1,32 @@
+"""Add the cache_versions table used to invalidate in-process caches across workers
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from migrations.helpers import has_table
+
+# revision identifiers, used by Alembic.
+revision: str = "0005"
+down_revision: Union[str, Sequence[str], None] = "0004"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if not has_table("cache_versions"):
+        op.create_table(
+            "cache_versions",
+            sa.Column("name", sa.String(50), primary_key=True),
+            sa.Column("version", sa.Integer(), nullable=False, server_default="0"),
+        )
+
+
+def downgrade() -> None:
+    op.drop_table("cache_versions")
@@ -0,0 +1,45 @@
+"""Add the full-text index over notes: FTS5 on SQLite, a GIN tsvector index on Postgres
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+NOTES_FTS_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS notes_fts USING fts5("
+    "content, tokenize = 'unicode61 remove_diacritics 2')"
+)
+NOTES_SEARCH_INDEX_DDL = (
+    "CREATE INDEX IF NOT EXISTS ix_notes_content_search "
+    "ON notes USING GIN (to_tsvector('simple', content))"
+)
+
+# revision identifiers, used by Alembic.
+revision: str = "0006"
+down_revision: Union[str, Sequence[str], None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        op.execute(NOTES_SEARCH_INDEX_DDL)
+    elif bind.dialect.name == "sqlite":
+        op.execute(NOTES_FTS_DDL)
+        # Index the existing notes unless an older release already did
+        if bind.execute(sa.text("SELECT COUNT(*) FROM notes_fts")).scalar() == 0:
+            op.execute("INSERT INTO notes_fts (rowid, content) SELECT id, content FROM notes")
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        op.execute("DROP INDEX IF EXISTS ix_notes_content_search")
+    elif bind.dialect.name == "sqlite":
+        op.execute("DROP TABLE IF EXISTS notes_fts")
@@ -0,0 +1,161 @@
+"""Add daily_summary and habit_daily_summary and fill them from the history that predates them
+
+The rollup rules are frozen here as they stood at this revision, so later
+changes to rollups.py do not change what this migration writes.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17
+
+"""
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from migrations.helpers import has_table
+
+# revision identifiers, used by Alembic.
+revision: str = "0007"
+down_revision: Union[str, Sequence[str], None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+habits = sa.table(
+    "habits",
+    sa.column("id", sa.Integer),
+    sa.column("schedule_mask", sa.Integer),
+    sa.column("start_date", sa.Date),
+    sa.column("is_active", sa.Boolean),
+    sa.column("is_archived", sa.Boolean),
+)
+habit_logs = sa.table(
+    "habit_logs",
+    sa.column("habit_id", sa.Integer),
+    sa.column("date", sa.Date),
+    sa.column("completed", sa.Boolean),
+    sa.column("time_spent_seconds", sa.Integer),
+)
+timer_sessions = sa.table(
+    "timer_sessions",
+    sa.column("habit_id", sa.Integer),
+    sa.column("date", sa.Date),
+    sa.column("duration_seconds", sa.Integer),
+    sa.column("is_running", sa.Boolean),
+)
+daily_summary = sa.table(
+    "daily_summary",
+    sa.column("date", sa.Date),
+    sa.column("completed_count", sa.Integer),
+    sa.column("scheduled_count", sa.Integer),
+    sa.column("total_seconds", sa.Integer),
+    sa.column("updated_at", sa.DateTime),
+)
+habit_daily_summary = sa.table(
+    "habit_daily_summary",
+    sa.column("habit_id", sa.Integer),
+    sa.column("date", sa.Date),
+    sa.column("completed", sa.Boolean),
+    sa.column("time_spent_seconds", sa.Integer),
+    sa.column("timer_seconds", sa.Integer),
+)
+
+
+def create_tables():
+    if not has_table("daily_summary"):
+        op.create_table(
+            "daily_summary",
+            sa.Column("date", sa.Date(), primary_key=True),
+            sa.Column("completed_count", sa.Integer(), nullable=False),
+            sa.Column("scheduled_count", sa.Integer(), nullable=False),
+            sa.Column("total_seconds", sa.Integer(), nullable=False),
+            sa.Column("updated_at", sa.DateTime(), nullable=True),
+        )
+    if not has_table("habit_daily_summary"):
+        op.create_table(
+            "habit_daily_summary",
+            sa.Column("habit_id", sa.Integer(), sa.ForeignKey("habits.id"), primary_key=True),
+            sa.Column("date", sa.Date(), primary_key=True),
+            sa.Column("completed", sa.Boolean(), nullable=False),
+            sa.Column("time_spent_seconds", sa.Integer(), nullable=False),
+            sa.Column("timer_seconds", sa.Integer(), nullable=False),
+        )
+
+
+def habit_rows(bind) -> dict:
+    """One habit_daily_summary row per (habit, date) with a log or a finished timer session."""
+    rows = {}
+    logs = bind.execute(sa.select(
+        habit_logs.c.habit_id,
+        habit_logs.c.date,
+        sa.func.max(sa.case((habit_logs.c.completed == sa.true(), 1), else_=0)),
+        sa.func.max(habit_logs.c.time_spent_seconds),
+    ).group_by(habit_logs.c.habit_id, habit_logs.c.date))
+    for habit_id, log_date, completed, time_spent in logs:
+        rows[(habit_id, log_date)] = {
+            "habit_id": habit_id,
+            "date": log_date,
+            "completed": bool(completed),
+            "time_spent_seconds": time_spent or 0,
+            "timer_seconds": 0,
+        }
+    sessions = bind.execute(sa.select(
+        timer_sessions.c.habit_id,
+        timer_sessions.c.date,
+        sa.func.sum(timer_sessions.c.duration_seconds),
+    ).where(timer_sessions.c.is_running == sa.false()).group_by(timer_sessions.c.habit_id, timer_sessions.c.date))
+    for habit_id, session_date, seconds in sessions:
+        row = rows.setdefault((habit_id, session_date), {
+            "habit_id": habit_id,
+            "date": session_date,
+            "completed": False,
+            "time_spent_seconds": 0,
+            "timer_seconds": 0,
+        })
+        row["timer_seconds"] = seconds or 0
+    return rows
+
+
+def daily_rows(bind, rows: dict) -> list:
+    """One daily_summary row per date that has a per-habit row."""
+    counted = {
+        habit_id: (mask if mask is not None else 0b1111111, start_date)
+        for habit_id, mask, start_date in bind.execute(
+            sa.select(habits.c.id, habits.c.schedule_mask, habits.c.start_date).where(
+                habits.c.is_active == sa.true(), habits.c.is_archived == sa.false()
+            )
+        )
+    }
+    days = {}
+    for (habit_id, day), row in rows.items():
+        summary = days.setdefault(day, {"date": day, "completed_count": 0, "total_seconds": 0})
+        summary["total_seconds"] += row["timer_seconds"]
+        if row["completed"] and habit_id in counted:
+            summary["completed_count"] += 1
+
+    now = datetime.utcnow()
+    for day, summary in days.items():
+        summary["scheduled_count"] = sum(
+            1 for mask, start_date in counted.values()
+            if mask & (1 << day.weekday()) and (start_date is None or start_date <= day)
+        )
+        summary["updated_at"] = now
+    return [days[day] for day in sorted(days)]
+
+
+def upgrade() -> None:
+    create_tables()
+    bind = op.get_bind()
+    # Leave rollups that a rebuild already filled alone
+    if bind.execute(sa.select(sa.func.count()).select_from(daily_summary)).scalar():
+        return
+    rows = habit_rows(bind)
+    if rows:
+        op.bulk_insert(habit_daily_summary, list(rows.values()))
+        op.bulk_insert(daily_summary, daily_rows(bind, rows))
+
+
+def downgrade() -> None:
+    op.execute("DELETE FROM habit_daily_summary")
+    op.execute("DELETE FROM daily_summary")
@@ -0,0 +1,93 @@
+"""Add habit_streaks and store a record for every habit that does not have one yet
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-17
+
+"""
+from datetime import datetime, timedelta
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from migrations.helpers import has_table
+
+# revision identifiers, used by Alembic.
+revision: str = "0008"
+down_revision: Union[str, Sequence[str], None] = "0007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+habits = sa.table("habits", sa.column("id", sa.Integer))
+habit_logs = sa.table(
+    "habit_logs",
+    sa.column("habit_id", sa.Integer),
+    sa.column("date", sa.Date),
+    sa.column("completed", sa.Boolean),
+)
+habit_streaks = sa.table(
+    "habit_streaks",
+    sa.column("habit_id", sa.Integer),
+    sa.column("current_streak", sa.Integer),
+    sa.column("longest_streak", sa.Integer),
+    sa.column("last_completed_date", sa.Date),
+    sa.column("updated_at", sa.DateTime),
+)
+
+
+def latest_run(dates: list) -> tuple:
+    """(last date, length of the run ending there, longest run) of ascending distinct dates."""
+    run = longest = 0
+    previous = None
+    for day in dates:
+        run = run + 1 if previous is not None and day - previous == timedelta(days=1) else 1
+        longest = max(longest, run)
+        previous = day
+    return previous, run, longest
+
+
+def upgrade() -> None:
+    if not has_table("habit_streaks"):
+        op.create_table(
+            "habit_streaks",
+            sa.Column("habit_id", sa.Integer(), sa.ForeignKey("habits.id"), primary_key=True),
+            sa.Column("current_streak", sa.Integer(), nullable=False),
+            sa.Column("longest_streak", sa.Integer(), nullable=False),
+            sa.Column("last_completed_date", sa.Date(), nullable=True),
+            sa.Column("updated_at", sa.DateTime(), nullable=True),
+        )
+
+    bind = op.get_bind()
+    # Habits created before habit_streaks existed were only computed on the fly
+    stored = {habit_id for (habit_id,) in bind.execute(sa.select(habit_streaks.c.habit_id))}
+    missing = [habit_id for (habit_id,) in bind.execute(sa.select(habits.c.id)) if habit_id not in stored]
+    if not missing:
+        return
+
+    dates = {habit_id: [] for habit_id in missing}
+    rows = bind.execute(
+        sa.select(habit_logs.c.habit_id, habit_logs.c.date).where(
+            habit_logs.c.habit_id.in_(missing), habit_logs.c.completed == sa.true()
+        ).distinct().order_by(habit_logs.c.habit_id, habit_logs.c.date)
+    )
+    for habit_id, day in rows:
+        dates[habit_id].append(day)
+
+    now = datetime.utcnow()
+    records = []
+    for habit_id, completed in dates.items():
+        last, run, longest = latest_run(completed)
+        records.append({
+            "habit_id": habit_id,
+            "current_streak": run,
+            "longest_streak": longest,
+            "last_completed_date": last,
+            "updated_at": now,
+        })
+    op.bulk_insert(habit_streaks, records)
+
+
+def downgrade() -> None:
+    # The records stay valid; nothing to undo
+    pass
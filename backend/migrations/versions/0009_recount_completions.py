@@ -0,0 +1,53 @@
+"""Count completions on unscheduled days in daily_summary.completed_count
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0009"
+down_revision: Union[str, Sequence[str], None] = "0008"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+habits = sa.table(
+    "habits",
+    sa.column("id", sa.Integer),
+    sa.column("is_active", sa.Boolean),
+    sa.column("is_archived", sa.Boolean),
+)
+habit_logs = sa.table(
+    "habit_logs",
+    sa.column("habit_id", sa.Integer),
+    sa.column("date", sa.Date),
+    sa.column("completed", sa.Boolean),
+)
+daily_summary = sa.table(
+    "daily_summary",
+    sa.column("date", sa.Date),
+    sa.column("completed_count", sa.Integer),
+)
+
+
+def upgrade() -> None:
+    # Rows written since 0007 only counted habits completed on a day they were due
+    completed = sa.select(sa.func.count(sa.distinct(habit_logs.c.habit_id))).select_from(
+        habit_logs.join(habits, habits.c.id == habit_logs.c.habit_id)
+    ).where(
+        habit_logs.c.date == daily_summary.c.date,
+        habit_logs.c.completed == sa.true(),
+        habits.c.is_active == sa.true(),
+        habits.c.is_archived == sa.false(),
+    ).scalar_subquery()
+    op.execute(daily_summary.update().values(completed_count=completed))
+
+
+def downgrade() -> None:
+    # Counting extra completions is harmless for older code; nothing to undo
+    pass
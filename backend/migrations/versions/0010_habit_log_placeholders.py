@@ -0,0 +1,51 @@
+"""Add habit_logs.is_placeholder to mark rows that only hold the previous day's balance
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-17
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from migrations.helpers import has_column
+
+# revision identifiers, used by Alembic.
+revision: str = "0010"
+down_revision: Union[str, Sequence[str], None] = "0009"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+habit_logs = sa.table(
+    "habit_logs",
+    sa.column("completed", sa.Boolean),
+    sa.column("time_spent_seconds", sa.Integer),
+    sa.column("carryover_seconds", sa.Integer),
+    sa.column("deficit_seconds", sa.Integer),
+    sa.column("is_placeholder", sa.Boolean),
+)
+
+
+def upgrade() -> None:
+    if has_column("habit_logs", "is_placeholder"):
+        return
+    op.add_column(
+        "habit_logs",
+        sa.Column("is_placeholder", sa.Boolean(), nullable=False, server_default=sa.false())
+    )
+    # Existing rows are told apart the way next_day_balance used to: nothing logged, only a balance
+    op.execute(habit_logs.update().where(
+        sa.or_(habit_logs.c.completed == sa.false(), habit_logs.c.completed.is_(None)),
+        sa.func.coalesce(habit_logs.c.time_spent_seconds, 0) == 0,
+        sa.or_(
+            sa.func.coalesce(habit_logs.c.carryover_seconds, 0) != 0,
+            sa.func.coalesce(habit_logs.c.deficit_seconds, 0) != 0,
+        ),
+    ).values(is_placeholder=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("habit_logs") as batch_op:
+        batch_op.drop_column("is_placeholder")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text, Date
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Text, Date, Index, DDL, event, false
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
@@ -17,6 +17,8 @@ class Habit(Base):
     estimated_duration_seconds = Column(Integer, nullable=True)
     # JSON string: list of weekday numbers (0=Monday, 6=Sunday), null means every day
     schedule_days = Column(String(50), nullable=True)
+    # Same schedule as a weekday bitmask (bit 0=Monday ... bit 6=Sunday), 127 = every day
+    schedule_mask = Column(Integer, nullable=False, default=127, server_default="127")
     # Date when this habit starts (habits are not shown before this date)
     start_date = Column(Date, nullable=True)
     is_archived = Column(Boolean, default=False)
@@ -29,6 +31,10 @@ class Habit(Base):
 
 class HabitLog(Base):
     __tablename__ = "habit_logs"
+    __table_args__ = (
+        Index("uq_habit_logs_habit_id_date", "habit_id", "date", unique=True),
+        Index("ix_habit_logs_date", "date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     habit_id = Column(Integer, ForeignKey("habits.id"), nullable=False)
@@ -39,13 +45,56 @@ class HabitLog(Base):
     carryover_seconds = Column(Integer, default=0)
     # Time deficit from previous day (remaining time that was not completed)
     deficit_seconds = Column(Integer, default=0)
+    # Row created only to hold the balance passed on from the previous day; nothing was logged on it
+    is_placeholder = Column(Boolean, nullable=False, default=False, server_default=false())
     created_at = Column(DateTime, default=datetime.utcnow)
 
     habit = relationship("Habit", back_populates="logs")
 
 
+class HabitStreak(Base):
+    __tablename__ = "habit_streaks"
+
+    habit_id = Column(Integer, ForeignKey("habits.id"), primary_key=True)
+    # Length of the run of completed days ending at last_completed_date
+    current_streak = Column(Integer, default=0, nullable=False)
+    longest_streak = Column(Integer, default=0, nullable=False)
+    last_completed_date = Column(Date, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class DailySummary(Base):
+    """Per-day rollup of habit completion and timer totals."""
+    __tablename__ = "daily_summary"
+
+    date = Column(Date, primary_key=True)
+    # Distinct active, non-archived habits completed on this date
+    completed_count = Column(Integer, default=0, nullable=False)
+    # Habits due on this date (started and scheduled for the weekday)
+    scheduled_count = Column(Integer, default=0, nullable=False)
+    # Seconds from finished timer sessions on this date
+    total_seconds = Column(Integer, default=0, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class HabitDailySummary(Base):
+    """Per-habit, per-day rollup of completion and time."""
+    __tablename__ = "habit_daily_summary"
+
+    habit_id = Column(Integer, ForeignKey("habits.id"), primary_key=True)
+    date = Column(Date, primary_key=True)
+    completed = Column(Boolean, default=False, nullable=False)
+    # Time recorded on the habit log (timer stops and manual edits)
+    time_spent_seconds = Column(Integer, default=0, nullable=False)
+    # Seconds from finished timer sessions
+    timer_seconds = Column(Integer, default=0, nullable=False)
+
+
 class Note(Base):
     __tablename__ = "notes"
+    __table_args__ = (
+        Index("ix_notes_date_created_at", "date", "created_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     content = Column(Text, nullable=False)
@@ -54,8 +103,27 @@ class Note(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 
+# Full-text index over note contents: an FTS5 table kept in sync by notes_search
+# on SQLite, a GIN expression index that Postgres maintains itself
+NOTES_SEARCH_CONFIG = "simple"
+NOTES_FTS_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS notes_fts USING fts5("
+    "content, tokenize = 'unicode61 remove_diacritics 2')"
+)
+NOTES_SEARCH_INDEX_DDL = (
+    "CREATE INDEX IF NOT EXISTS ix_notes_content_search "
+    f"ON notes USING GIN (to_tsvector('{NOTES_SEARCH_CONFIG}', content))"
+)
+event.listen(Note.__table__, "after_create", DDL(NOTES_FTS_DDL).execute_if(dialect="sqlite"))
+event.listen(Note.__table__, "after_create", DDL(NOTES_SEARCH_INDEX_DDL).execute_if(dialect="postgresql"))
+
+
 class TimerSession(Base):
     __tablename__ = "timer_sessions"
+    __table_args__ = (
+        Index("ix_timer_sessions_habit_id_is_running", "habit_id", "is_running"),
+        Index("ix_timer_sessions_habit_id_date", "habit_id", "date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     habit_id = Column(Integer, ForeignKey("habits.id"), nullable=False)
@@ -64,13 +132,46 @@ class TimerSession(Base):
     end_time = Column(DateTime, nullable=True)
     duration_seconds = Column(Integer, default=0)
     is_running = Column(Boolean, default=True)
+    # Raw start/stop sessions folded into this row by compaction (1 = a single session)
+    session_count = Column(Integer, nullable=False, default=1, server_default="1")
 
     habit = relationship("Habit", back_populates="timer_sessions")
 
 
+class TimerSessionArchive(Base):
+    """Raw timer sessions removed by compaction, kept for audit when archiving is enabled."""
+    __tablename__ = "timer_sessions_archive"
+
+    id = Column(Integer, primary_key=True, index=True)
+    # Id the session had in timer_sessions
+    session_id = Column(Integer, nullable=False)
+    habit_id = Column(Integer, nullable=False, index=True)
+    date = Column(Date, nullable=False)
+    start_time = Column(DateTime, nullable=False)
+    end_time = Column(DateTime, nullable=True)
+    duration_seconds = Column(Integer, default=0)
+    archived_at = Column(DateTime, default=datetime.utcnow)
+
+
+class ActiveTimer(Base):
+    """Running timer sessions, one row per habit, so lookups never scan timer_sessions."""
+    __tablename__ = "active_timers"
+
+    habit_id = Column(Integer, ForeignKey("habits.id"), primary_key=True)
+    session_id = Column(Integer, ForeignKey("timer_sessions.id"), nullable=False, unique=True)
+
+
 class AppSettings(Base):
     __tablename__ = "app_settings"
 
     id = Column(Integer, primary_key=True, index=True)
     key = Column(String(100), unique=True, nullable=False)
     value = Column(String(255), nullable=True)
+
+
+class CacheVersion(Base):
+    """Version counters bumped on writes so every worker can tell its in-memory caches are stale."""
+    __tablename__ = "cache_versions"
+
+    name = Column(String(50), primary_key=True)
+    version = Column(Integer, default=0, nullable=False)
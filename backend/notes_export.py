@@ -0,0 +1,97 @@
+import json
+from datetime import date, datetime
+from typing import Iterable, Iterator
+
+from database import SessionLocal
+from models import Note
+from streaming import chunked, gzipped
+
+# Notes fetched per round trip of the server-side cursor
+EXPORT_BATCH_SIZE = 500
+
+EXPORT_MEDIA_TYPES = {
+    "txt": "text/plain; charset=utf-8",
+    "md": "text/markdown; charset=utf-8",
+    "jsonl": "application/x-ndjson",
+}
+
+WEEKDAYS = ["segunda-feira", "terça-feira", "quarta-feira", "quinta-feira", "sexta-feira", "sábado", "domingo"]
+MONTHS = [
+    "janeiro", "fevereiro", "março", "abril", "maio", "junho",
+    "julho", "agosto", "setembro", "outubro", "novembro", "dezembro",
+]
+
+RULE = "═══════════════════════════════════════════════════════"
+DAY_RULE = "───────────────────────────────────────────────────────"
+
+
+def long_date(day: date) -> str:
+    """A date the way the frontend shows it in pt-BR, e.g. 'sexta-feira, 17 de outubro de 2026'."""
+    return f"{WEEKDAYS[day.weekday()]}, {day.day} de {MONTHS[day.month - 1]} de {day.year}"
+
+
+def exported_at() -> str:
+    return datetime.now().strftime("%d/%m/%Y, %H:%M:%S")
+
+
+def _time(note: Note) -> str:
+    return note.created_at.strftime("%H:%M") if note.created_at else "--:--"
+
+
+def _txt(notes: Iterable[Note]) -> Iterator[str]:
+    yield f"{RULE}\n                    MINHAS NOTAS\n            Eye Life - Histórico Completo\n{RULE}\n\n"
+    current = None
+    for note in notes:
+        if note.date != current:
+            if current is not None:
+                yield "\n"
+            current = note.date
+            yield f"\n▌ {long_date(note.date).upper()}\n{DAY_RULE}\n"
+        yield f"\n[{_time(note)}]\n{note.content}\n"
+    if current is not None:
+        yield "\n"
+    yield f"\n{RULE}\nExportado em: {exported_at()}\n{RULE}\n"
+
+
+def _md(notes: Iterable[Note]) -> Iterator[str]:
+    yield "# Minhas Notas\n\n_Eye Life - Histórico Completo_\n"
+    current = None
+    for note in notes:
+        if note.date != current:
+            current = note.date
+            heading = long_date(note.date)
+            yield f"\n## {heading[0].upper()}{heading[1:]}\n"
+        yield f"\n**{_time(note)}**\n\n{note.content}\n"
+    yield f"\n---\n\n_Exportado em: {exported_at()}_\n"
+
+
+def _jsonl(notes: Iterable[Note]) -> Iterator[str]:
+    for note in notes:
+        yield json.dumps({
+            "id": note.id,
+            "date": note.date.isoformat(),
+            "created_at": note.created_at.isoformat() if note.created_at else None,
+            "updated_at": note.updated_at.isoformat() if note.updated_at else None,
+            "content": note.content,
+        }, ensure_ascii=False) + "\n"
+
+
+FORMATTERS = {"txt": _txt, "md": _md, "jsonl": _jsonl}
+
+
+def export_notes(fmt: str, gzip: bool = False) -> Iterator[bytes]:
+    """Every note, newest day first, rendered in fmt and streamed in chunks.
+
+    Runs on its own session, since the response outlives the request's
+    dependencies, and reads through a server-side cursor so memory stays
+    flat however many notes there are.
+    """
+    db = SessionLocal()
+    try:
+        notes = db.query(Note).order_by(
+            Note.date.desc(), Note.created_at.desc(), Note.id.desc()
+        ).yield_per(EXPORT_BATCH_SIZE)
+        chunks = chunked(FORMATTERS[fmt](notes))
+        yield from gzipped(chunks) if gzip else chunks
+    finally:
+        db.close()
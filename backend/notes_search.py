@@ -0,0 +1,88 @@
+import html
+import re
+from typing import List
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from models import Note, NOTES_SEARCH_CONFIG as PG_CONFIG
+
+# Words of context around the matches in a snippet
+SNIPPET_WORDS = 16
+
+# Private-use characters marking matches in raw snippets, replaced after escaping
+_MARK_START, _MARK_END = "\ue000", "\ue001"
+
+
+def _uses_fts5(db: Session) -> bool:
+    # Postgres maintains its expression index by itself; SQLite keeps a separate FTS5 table
+    return db.get_bind().dialect.name == "sqlite"
+
+
+def index_note(db: Session, note: Note):
+    """Add or replace a note in the search index, inside the caller's transaction."""
+    if not _uses_fts5(db):
+        return
+    db.flush()
+    db.execute(text("DELETE FROM notes_fts WHERE rowid = :id"), {"id": note.id})
+    db.execute(text("INSERT INTO notes_fts (rowid, content) VALUES (:id, :content)"),
+               {"id": note.id, "content": note.content})
+
+
+def unindex_note(db: Session, note_id: int):
+    if _uses_fts5(db):
+        db.execute(text("DELETE FROM notes_fts WHERE rowid = :id"), {"id": note_id})
+
+
+def rebuild_note_index(db: Session):
+    """Re-index every note, e.g. after notes were written without going through index_note."""
+    if not _uses_fts5(db):
+        return
+    db.execute(text("DELETE FROM notes_fts"))
+    db.execute(text("INSERT INTO notes_fts (rowid, content) SELECT id, content FROM notes"))
+
+
+def search_terms(query: str) -> List[str]:
+    """Words of a user query; operators and punctuation are dropped so any input is a valid search."""
+    return re.findall(r"\w+", query.lower())
+
+
+def _highlight(snippet: str) -> str:
+    """Escape a raw snippet and turn the match markers into <mark> tags."""
+    return html.escape(snippet).replace(_MARK_START, "<mark>").replace(_MARK_END, "</mark>")
+
+
+def search_notes(db: Session, terms: List[str], limit: int, offset: int = 0) -> List[dict]:
+    """Notes containing every term (as a word prefix), best match first, with highlighted snippets.
+
+    Snippets are only computed for the requested page.
+    """
+    if _uses_fts5(db):
+        match = " ".join(f'"{term}"*' for term in terms)
+        rows = db.execute(text(
+            "SELECT notes.id, notes.date, notes.created_at, "
+            f"snippet(notes_fts, 0, :start, :end, '…', {SNIPPET_WORDS}) AS snippet "
+            "FROM notes_fts JOIN notes ON notes.id = notes_fts.rowid "
+            "WHERE notes_fts MATCH :match "
+            "ORDER BY bm25(notes_fts), notes.id DESC LIMIT :limit OFFSET :offset"
+        ), {"match": match, "start": _MARK_START, "end": _MARK_END, "limit": limit, "offset": offset})
+    else:
+        tsquery = " & ".join(f"{term}:*" for term in terms)
+        rows = db.execute(text(
+            "SELECT page.id, page.date, page.created_at, "
+            f"ts_headline('{PG_CONFIG}', page.content, to_tsquery('{PG_CONFIG}', :query), "
+            "'StartSel=' || :start || ', StopSel=' || :end || "
+            f"', MaxWords={SNIPPET_WORDS}, MinWords={SNIPPET_WORDS // 2}, MaxFragments=2') AS snippet "
+            "FROM ("
+            "  SELECT id, date, created_at, content, "
+            f"  ts_rank_cd(to_tsvector('{PG_CONFIG}', content), to_tsquery('{PG_CONFIG}', :query)) AS rank "
+            "  FROM notes "
+            f"  WHERE to_tsvector('{PG_CONFIG}', content) @@ to_tsquery('{PG_CONFIG}', :query) "
+            "  ORDER BY rank DESC, id DESC LIMIT :limit OFFSET :offset"
+            ") AS page ORDER BY page.rank DESC, page.id DESC"
+        ), {"query": tsquery, "start": _MARK_START, "end": _MARK_END, "limit": limit, "offset": offset})
+
+    return [
+        {"id": id, "date": note_date, "created_at": created_at, "snippet": _highlight(snippet)}
+        for id, note_date, created_at, snippet in rows
+    ]
@@ -0,0 +1,24 @@
+import base64
+import json
+
+from fastapi import HTTPException
+
+# Response header carrying the cursor of the next page; absent on the last page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(*values) -> str:
+    """Opaque cursor for the sort key of the last row of a page."""
+    raw = json.dumps([value.isoformat() if hasattr(value, "isoformat") else value for value in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> list:
+    """Values of a cursor made by encode_cursor, as strings/ints; 400 if it is malformed."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except ValueError:
+        values = None
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
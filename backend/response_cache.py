@@ -0,0 +1,120 @@
+import functools
+import inspect
+import os
+import threading
+from collections import OrderedDict
+from datetime import date
+
+from sqlalchemy.orm import Session
+
+from cache_versions import read_versions, bump_versions
+
+# Responses kept per worker; the least recently used is evicted first
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "256"))
+
+# What a cached response is computed from. Writes bump the tags they touch:
+# habit definitions, per-day logs and their derived tables, and notes
+HABITS = "habits"
+LOGS = "logs"
+NOTES = "notes"
+ALL_TAGS = (HABITS, LOGS, NOTES)
+
+
+def _version_name(tag: str) -> str:
+    return f"response:{tag}"
+
+
+class ResponseCache:
+    """LRU of endpoint responses keyed by endpoint, parameters and the current date.
+
+    Each entry remembers the versions of its tags when it was computed. A
+    lookup reads the current versions in one query, so a write committed by
+    any worker turns every entry depending on it into a miss.
+    """
+
+    def __init__(self, maxsize: int = RESPONSE_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._entries: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, versions: dict):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == versions:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            return None
+
+    def put(self, key, versions: dict, value):
+        with self._lock:
+            self._entries[key] = (versions, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            }
+
+
+response_cache = ResponseCache()
+
+
+def cached_response(*tags: str):
+    """Cache a sync endpoint's response until one of its tags is invalidated or the day changes.
+
+    The endpoint must take its session as `db` and return objects that are
+    safe to share between requests (pydantic models, not ORM rows).
+    """
+
+    def decorator(endpoint):
+        names = [_version_name(tag) for tag in tags]
+        signature = inspect.signature(endpoint)
+
+        @functools.wraps(endpoint)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            db = bound.arguments["db"]
+            params = tuple(sorted((name, value) for name, value in bound.arguments.items() if name != "db"))
+            key = (endpoint.__qualname__, params, date.today())
+
+            # Versions are read before computing, so a write racing with the
+            # computation leaves an entry that is already stale, never one that looks fresh
+            versions = read_versions(db, names)
+            value = response_cache.get(key, versions)
+            if value is None:
+                value = endpoint(*args, **kwargs)
+                response_cache.put(key, versions, value)
+            return value
+
+        return wrapper
+
+    return decorator
+
+
+def invalidate_responses(db: Session, *tags: str):
+    """Mark cached responses depending on tags stale for every worker once db commits."""
+    bump_versions(db, *(_version_name(tag) for tag in tags))
+
+
+def invalidate_all_responses(db: Session):
+    invalidate_responses(db, *ALL_TAGS)
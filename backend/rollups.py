@@ -0,0 +1,219 @@
+from datetime import date, timedelta
+from typing import List, NamedTuple, Optional
+
+from sqlalchemy import and_, case, func, literal, select
+from sqlalchemy.orm import Session
+
+from models import Habit, HabitLog, TimerSession, DailySummary, HabitDailySummary
+from scheduling import EVERY_DAY_MASK, scheduled_totals, weekday_bit
+
+# Number of days recomputed per transaction by rebuild_rollups
+REBUILD_BATCH_DAYS = 90
+
+
+def completed_counts_by_date(db: Session, start: Optional[date], end: date) -> dict[date, int]:
+    """Number of distinct active habits completed on each day, in one grouped query.
+
+    Completions count whether or not the habit was scheduled that day.
+    """
+    query = db.query(
+        HabitLog.date,
+        func.count(func.distinct(HabitLog.habit_id))
+    ).join(Habit, Habit.id == HabitLog.habit_id).filter(
+        Habit.is_active == True,
+        Habit.is_archived == False,
+        HabitLog.completed == True,
+        HabitLog.date <= end
+    )
+    if start:
+        query = query.filter(HabitLog.date >= start)
+    return dict(query.group_by(HabitLog.date).all())
+
+
+def activity_bounds(db: Session) -> tuple[Optional[date], Optional[date]]:
+    """First and last date with any log or timer session."""
+    log_min, log_max = db.query(func.min(HabitLog.date), func.max(HabitLog.date)).one()
+    timer_min, timer_max = db.query(func.min(TimerSession.date), func.max(TimerSession.date)).one()
+    starts = [d for d in (log_min, timer_min) if d]
+    ends = [d for d in (log_max, timer_max) if d]
+    return (min(starts) if starts else None, max(ends) if ends else None)
+
+
+def refresh_habit_summaries(db: Session, start: date, end: date, habit_ids: Optional[List[int]] = None):
+    """Replace the per-habit rollup rows for [start, end] with a recompute from raw logs and timer sessions."""
+    log_query = db.query(
+        HabitLog.habit_id,
+        HabitLog.date,
+        func.max(case((HabitLog.completed == True, 1), else_=0)),
+        func.max(HabitLog.time_spent_seconds)
+    ).filter(HabitLog.date >= start, HabitLog.date <= end)
+    timer_query = db.query(
+        TimerSession.habit_id,
+        TimerSession.date,
+        func.sum(TimerSession.duration_seconds)
+    ).filter(
+        TimerSession.date >= start,
+        TimerSession.date <= end,
+        TimerSession.is_running == False
+    )
+    delete_query = db.query(HabitDailySummary).filter(
+        HabitDailySummary.date >= start,
+        HabitDailySummary.date <= end
+    )
+    if habit_ids is not None:
+        log_query = log_query.filter(HabitLog.habit_id.in_(habit_ids))
+        timer_query = timer_query.filter(TimerSession.habit_id.in_(habit_ids))
+        delete_query = delete_query.filter(HabitDailySummary.habit_id.in_(habit_ids))
+
+    rows = {}
+    for habit_id, log_date, completed, time_spent in log_query.group_by(HabitLog.habit_id, HabitLog.date):
+        rows[(habit_id, log_date)] = {
+            "habit_id": habit_id,
+            "date": log_date,
+            "completed": bool(completed),
+            "time_spent_seconds": time_spent or 0,
+            "timer_seconds": 0,
+        }
+    for habit_id, session_date, seconds in timer_query.group_by(TimerSession.habit_id, TimerSession.date):
+        row = rows.setdefault((habit_id, session_date), {
+            "habit_id": habit_id,
+            "date": session_date,
+            "completed": False,
+            "time_spent_seconds": 0,
+            "timer_seconds": 0,
+        })
+        row["timer_seconds"] = seconds or 0
+
+    delete_query.delete(synchronize_session=False)
+    if rows:
+        db.bulk_insert_mappings(HabitDailySummary, list(rows.values()))
+
+
+def refresh_daily_summaries(db: Session, start: Optional[date] = None, end: Optional[date] = None):
+    """Recompute daily_summary rows for [start, end] (all history when omitted); only active dates get a row."""
+    db.flush()
+    if start is None or end is None:
+        first, last = activity_bounds(db)
+        start = start or first
+        end = end or last
+    if start is None or end is None:
+        db.query(DailySummary).delete(synchronize_session=False)
+        return
+
+    completed = completed_counts_by_date(db, start, end)
+    seconds = dict(db.query(
+        TimerSession.date,
+        func.sum(TimerSession.duration_seconds)
+    ).filter(
+        TimerSession.date >= start,
+        TimerSession.date <= end,
+        TimerSession.is_running == False
+    ).group_by(TimerSession.date).all())
+    active_dates = {
+        log_date for (log_date,) in db.query(HabitLog.date).filter(
+            HabitLog.date >= start,
+            HabitLog.date <= end
+        ).distinct()
+    }
+    active_dates.update(seconds)
+
+    totals = scheduled_totals(db, start, end) if active_dates else {}
+
+    db.query(DailySummary).filter(
+        DailySummary.date >= start,
+        DailySummary.date <= end
+    ).delete(synchronize_session=False)
+    if active_dates:
+        db.bulk_insert_mappings(DailySummary, [
+            {
+                "date": summary_date,
+                "completed_count": completed.get(summary_date, 0),
+                "scheduled_count": totals[summary_date],
+                "total_seconds": seconds.get(summary_date) or 0,
+            }
+            for summary_date in sorted(active_dates)
+        ])
+
+
+def refresh_rollups(db: Session, start: date, end: date, habit_ids: Optional[List[int]] = None):
+    """Bring both rollups up to date for [start, end] inside the caller's transaction."""
+    db.flush()
+    refresh_habit_summaries(db, start, end, habit_ids)
+    refresh_daily_summaries(db, start, end)
+
+
+class HabitSchedule(NamedTuple):
+    """The fields that decide on which days a habit counts towards daily_summary."""
+    mask: int
+    start_date: Optional[date]
+
+
+def habit_schedule(habit: Habit) -> Optional[HabitSchedule]:
+    """A habit's schedule, or None when it is deleted or archived and counts on no day."""
+    if not habit.is_active or habit.is_archived:
+        return None
+    mask = habit.schedule_mask if habit.schedule_mask is not None else EVERY_DAY_MASK
+    return HabitSchedule(mask, habit.start_date)
+
+
+def _due(dialect_name: str, schedule: Optional[HabitSchedule], date_column):
+    """SQL 1 when a habit with this schedule is due on date_column, else 0."""
+    if schedule is None:
+        return literal(0)
+    condition = literal(schedule.mask).op("&")(weekday_bit(dialect_name, date_column)) != 0
+    if schedule.start_date is not None:
+        condition = and_(condition, date_column >= schedule.start_date)
+    return case((condition, 1), else_=0)
+
+
+def apply_habit_change(
+    db: Session,
+    habit_id: int,
+    before: Optional[HabitSchedule],
+    after: Optional[HabitSchedule]
+):
+    """Shift daily_summary counts on the days one created, edited, archived or deleted habit affects."""
+    if before == after:
+        return
+    db.flush()
+    dialect_name = db.get_bind().dialect.name
+    delta = _due(dialect_name, after, DailySummary.date) - _due(dialect_name, before, DailySummary.date)
+    db.query(DailySummary).filter(delta != 0).update(
+        {DailySummary.scheduled_count: DailySummary.scheduled_count + delta},
+        synchronize_session=False
+    )
+    # Completions count on every day, so they only move when the habit is archived, restored or deleted
+    counted = (after is not None) - (before is not None)
+    if counted:
+        completed_dates = select(HabitLog.date).where(HabitLog.habit_id == habit_id, HabitLog.completed == True)
+        db.query(DailySummary).filter(DailySummary.date.in_(completed_dates)).update(
+            {DailySummary.completed_count: DailySummary.completed_count + counted},
+            synchronize_session=False
+        )
+
+
+def rebuild_rollups(db: Session, batch_days: int = REBUILD_BATCH_DAYS) -> dict:
+    """Regenerate both rollups from raw rows, committing one batch of days at a time."""
+    db.query(HabitDailySummary).delete(synchronize_session=False)
+    db.query(DailySummary).delete(synchronize_session=False)
+    db.commit()
+
+    first, last = activity_bounds(db)
+    batches = 0
+    if first is not None:
+        batch_start = first
+        while batch_start <= last:
+            batch_end = min(batch_start + timedelta(days=batch_days - 1), last)
+            refresh_habit_summaries(db, batch_start, batch_end)
+            refresh_daily_summaries(db, batch_start, batch_end)
+            db.commit()
+            batches += 1
+            batch_start = batch_end + timedelta(days=1)
+
+    return {
+        "start": first.isoformat() if first else None,
+        "end": last.isoformat() if last else None,
+        "batches": batches,
+        "days": db.query(DailySummary).count(),
+        "habit_days": db.query(HabitDailySummary).count(),
+    }
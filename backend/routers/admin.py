@@ -0,0 +1,129 @@
+from datetime import date
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from database import get_db, engine, async_engine, SessionLocal
+from db_pool import pool_stats
+from auth import get_current_user
+from streaks import rebuild_streaks, check_streaks
+from rollups import rebuild_rollups
+from active_timers import reconcile_active_timers
+from carryover import replay_carryover
+from response_cache import response_cache, invalidate_responses, LOGS
+from streaming import spool_request_body
+from backup import stream_backup, restore_backup, BackupError
+from compaction import compact_timer_sessions, COMPACTION_HORIZON_DAYS, COMPACTION_ARCHIVE
+
+router = APIRouter(prefix="/api/admin", tags=["admin"], dependencies=[Depends(get_current_user)])
+
+
+@router.post("/streaks/rebuild")
+def rebuild_streak_table(db: Session = Depends(get_db)):
+    """Recompute every stored streak from the raw habit logs."""
+    rebuilt = rebuild_streaks(db)
+    invalidate_responses(db, LOGS)
+    db.commit()
+    return {"message": "Streaks rebuilt", "habits": rebuilt}
+
+
+@router.get("/streaks/check")
+def check_streak_table(db: Session = Depends(get_db)):
+    """Compare the stored streaks against a full recompute."""
+    mismatches = check_streaks(db)
+    return {"consistent": not mismatches, "mismatches": mismatches}
+
+
+@router.post("/rollups/rebuild")
+def rebuild_rollup_tables(db: Session = Depends(get_db)):
+    """Regenerate the daily and per-habit rollups from raw logs and timer sessions."""
+    report = rebuild_rollups(db)
+    invalidate_responses(db, LOGS)
+    db.commit()
+    return {"message": "Rollups rebuilt", **report}
+
+
+@router.post("/carryover/replay")
+def replay_carryover_ledger(db: Session = Depends(get_db)):
+    """Recompute carryover/deficit across all history with the current rules."""
+    report = replay_carryover(db)
+    invalidate_responses(db, LOGS)
+    db.commit()
+    return {"message": "Carryover replayed", **report}
+
+
+@router.post("/timers/reconcile")
+def reconcile_timers(db: Session = Depends(get_db)):
+    """Repair orphaned running sessions and the active_timers index."""
+    report = reconcile_active_timers(db)
+    invalidate_responses(db, LOGS)
+    db.commit()
+    return {"message": "Timers reconciled", **report}
+
+
+@router.post("/timers/compact")
+def compact_timers(
+    horizon_days: int = COMPACTION_HORIZON_DAYS,
+    archive: bool = COMPACTION_ARCHIVE,
+    db: Session = Depends(get_db)
+):
+    """Fold finished timer sessions older than the horizon into one row per habit per day."""
+    if horizon_days < 1:
+        raise HTTPException(status_code=400, detail="horizon_days must be at least 1")
+    report = compact_timer_sessions(db, horizon_days=horizon_days, archive=archive)
+    return {"message": "Timer sessions compacted", **report}
+
+
+@router.get("/pool")
+def get_pool_stats():
+    """Connection pool occupancy and checkout wait times."""
+    stats = {"sync": pool_stats(engine)}
+    if async_engine is not None:
+        stats["async"] = pool_stats(async_engine.sync_engine)
+    return stats
+
+
+@router.get("/cache")
+def get_cache_stats():
+    """Hit/miss counters and size of this worker's response cache."""
+    return response_cache.stats()
+
+
+@router.post("/cache/clear")
+def clear_cache():
+    """Drop every cached response of this worker."""
+    response_cache.clear()
+    return {"message": "Response cache cleared"}
+
+
+@router.get("/backup")
+def download_backup(gzip: bool = False):
+    """Stream every habit, log, timer session, note and setting as NDJSON."""
+    filename = f"eye-life-backup-{date.today().isoformat()}.ndjson"
+    media_type = "application/x-ndjson"
+    if gzip:
+        filename += ".gz"
+        media_type = "application/gzip"
+    return StreamingResponse(
+        stream_backup(compress=gzip),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+def _restore(upload, replace: bool) -> dict:
+    with SessionLocal() as db:
+        return restore_backup(db, upload, replace=replace)
+
+
+@router.post("/restore")
+async def restore_from_backup(request: Request, replace: bool = False):
+    """Load a backup sent as the request body, plain or gzipped, in one transaction."""
+    with await spool_request_body(request) as upload:
+        try:
+            report = await run_in_threadpool(_restore, upload, replace)
+        except BackupError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    return {"message": "Backup restored", **report}
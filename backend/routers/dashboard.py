@@ -1,18 +1,56 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from sqlalchemy import func
 from datetime import date, timedelta
-from typing import List
+from typing import List, Optional
 
 from database import get_db
-from models import Habit, HabitLog, Note, TimerSession
+from models import Habit, Note, DailySummary
 from schemas import DashboardStats, DailyProgress
 from auth import get_current_user
+from scheduling import scheduled_totals
+from response_cache import cached_response, HABITS, LOGS, NOTES
 
 router = APIRouter(prefix="/api/dashboard", tags=["dashboard"], dependencies=[Depends(get_current_user)])
 
+# Longest range served by GET /progress in one response
+MAX_PROGRESS_DAYS = 366
+
+
+def calculate_overall_streak(db: Session, today: date) -> int:
+    """Consecutive days, ending today, on which every scheduled habit was completed.
+
+    Days with no habit scheduled neither extend nor break the streak.
+    """
+    summaries = {
+        summary.date: summary
+        for summary in db.query(DailySummary).filter(
+            DailySummary.date <= today,
+            DailySummary.completed_count > 0
+        ).all()
+    }
+    if not summaries:
+        return 0
+
+    earliest = min(summaries)
+    # Days without a summary row had nothing completed; only their totals are needed
+    totals = scheduled_totals(db, earliest, today)
+
+    streak = 0
+    check_date = today
+    while check_date >= earliest:
+        summary = summaries.get(check_date)
+        day_total = summary.scheduled_count if summary else totals[check_date]
+        if day_total > 0:
+            if not summary or summary.completed_count < day_total:
+                break
+            streak += 1
+        check_date -= timedelta(days=1)
+
+    return streak
+
 
 @router.get("/stats", response_model=DashboardStats)
+@cached_response(HABITS, LOGS, NOTES)
 def get_dashboard_stats(db: Session = Depends(get_db)):
     """Get dashboard statistics."""
     today = date.today()
@@ -20,40 +58,16 @@ def get_dashboard_stats(db: Session = Depends(get_db)):
     # Total active habits
     total_habits = db.query(Habit).filter(Habit.is_active == True).count()
 
-    # Completed today
-    completed_today = db.query(HabitLog).filter(
-        HabitLog.date == today,
-        HabitLog.completed == True
-    ).count()
+    # Completed today and total time today (from the daily rollup)
+    summary = db.get(DailySummary, today)
+    completed_today = summary.completed_count if summary else 0
+    total_time = summary.total_seconds if summary else 0
 
     # Completion percentage (capped at 100%)
     completion_percentage = min((completed_today / total_habits * 100), 100) if total_habits > 0 else 0
 
-    # Total time today (from timer sessions)
-    total_time = db.query(func.sum(TimerSession.duration_seconds)).filter(
-        TimerSession.date == today,
-        TimerSession.is_running == False
-    ).scalar() or 0
-
-    # Calculate current streak (consecutive days with all habits completed)
-    current_streak = 0
-    check_date = today
-
-    while True:
-        day_completed = db.query(HabitLog).filter(
-            HabitLog.date == check_date,
-            HabitLog.completed == True
-        ).count()
-
-        day_total = db.query(Habit).filter(
-            Habit.is_active == True
-        ).count()
-
-        if day_total > 0 and day_completed >= day_total:
-            current_streak += 1
-            check_date -= timedelta(days=1)
-        else:
-            break
+    # Calculate current streak (consecutive days with all scheduled habits completed)
+    current_streak = calculate_overall_streak(db, today)
 
     # Notes today
     notes_today = db.query(Note).filter(Note.date == today).count()
@@ -69,25 +83,39 @@ def get_dashboard_stats(db: Session = Depends(get_db)):
 
 
 @router.get("/progress", response_model=List[DailyProgress])
-def get_daily_progress(days: int = 7, db: Session = Depends(get_db)):
-    """Get daily progress for the last N days."""
-    today = date.today()
-    result = []
-
-    for i in range(days):
-        check_date = today - timedelta(days=i)
-
-        # Get total active habits on this day
-        total = db.query(Habit).filter(
-            Habit.is_active == True
-        ).count()
-
-        # Get completed habits on this day
-        completed = db.query(HabitLog).filter(
-            HabitLog.date == check_date,
-            HabitLog.completed == True
-        ).count()
+@cached_response(HABITS, LOGS)
+def get_daily_progress(
+    days: int = 7,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    db: Session = Depends(get_db)
+):
+    """Get daily progress for the last N days, or for an explicit start/end range."""
+    if not 1 <= days <= MAX_PROGRESS_DAYS:
+        raise HTTPException(status_code=400, detail=f"days must be between 1 and {MAX_PROGRESS_DAYS}")
+
+    end = end or date.today()
+    start = start or end - timedelta(days=days - 1)
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must be on or before end")
+    if (end - start).days >= MAX_PROGRESS_DAYS:
+        raise HTTPException(status_code=400, detail=f"Date range is limited to {MAX_PROGRESS_DAYS} days")
+
+    # Rollup rows for days with activity, totals from habit schedules for the rest
+    summaries = {
+        summary.date: summary
+        for summary in db.query(DailySummary).filter(
+            DailySummary.date >= start,
+            DailySummary.date <= end
+        ).all()
+    }
+    totals = scheduled_totals(db, start, end)
 
+    result = []
+    for check_date, total in totals.items():
+        summary = summaries.get(check_date)
+        completed = summary.completed_count if summary else 0
+        total = summary.scheduled_count if summary else total
         percentage = min((completed / total * 100), 100) if total > 0 else 0
 
         result.append(DailyProgress(
@@ -97,4 +125,4 @@ def get_daily_progress(days: int = 7, db: Session = Depends(get_db)):
             percentage=round(percentage, 1)
         ))
 
-    return list(reversed(result))
+    return result
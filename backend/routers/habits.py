@@ -1,56 +1,48 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from sqlalchemy import func
 from datetime import date, timedelta
 from typing import List
 import json
 
-from database import get_db
-from models import Habit, HabitLog
+from database import get_db, SessionLocal
+from models import Habit, HabitLog, HabitStreak, HabitDailySummary
 from schemas import (
     HabitCreate, HabitUpdate, HabitResponse, HabitWithStats,
-    HabitLogCreate, HabitLogResponse
+    HabitLogCreate, HabitLogResponse, CalendarHabit, MonthCalendar
 )
 from auth import get_current_user
+from streaks import current_streaks, record_completion
+from rollups import refresh_rollups, apply_habit_change, habit_schedule
+from scheduling import is_scheduled_on, schedule_days_to_mask
+from habit_logs import upsert_habit_log
+from carryover import apply_carryover
+from response_cache import cached_response, invalidate_responses, HABITS, LOGS
+from streaming import spool_request_body
+from log_import import import_habit_logs, LogImportError, IMPORT_FORMATS
 
 router = APIRouter(prefix="/api/habits", tags=["habits"], dependencies=[Depends(get_current_user)])
 
+# Longest range served by GET /by-date in one response
+MAX_RANGE_DAYS = 366
+
 
 def calculate_streak(db: Session, habit_id: int) -> int:
     """Calculate the current streak for a habit."""
-    today = date.today()
-    streak = 0
-    current_date = today
-
-    while True:
-        log = db.query(HabitLog).filter(
-            HabitLog.habit_id == habit_id,
-            HabitLog.date == current_date,
-            HabitLog.completed == True
-        ).first()
+    return current_streaks(db, [habit_id])[habit_id].current
 
-        if log:
-            streak += 1
-            current_date -= timedelta(days=1)
-        else:
-            break
 
-    return streak
+def calculate_streaks(db: Session, habit_ids: List[int]) -> dict[int, int]:
+    """Calculate the current streak for several habits with a single query."""
+    return {
+        habit_id: streak.current
+        for habit_id, streak in current_streaks(db, habit_ids).items()
+    }
 
 
 def is_scheduled_for_day(habit: Habit, check_date: date) -> bool:
     """Check if habit is scheduled for a specific day."""
-    if not habit.schedule_days:
-        return True  # No schedule means every day
-    
-    try:
-        days = json.loads(habit.schedule_days)
-        if not days:
-            return True
-        # Python weekday: 0=Monday, 6=Sunday
-        return check_date.weekday() in days
-    except (json.JSONDecodeError, TypeError):
-        return True
+    return is_scheduled_on(habit.schedule_mask, check_date)
 
 
 def parse_schedule_days(days: List[int] | None) -> str | None:
@@ -70,7 +62,61 @@ def serialize_schedule_days(schedule_days_str: str | None) -> List[int] | None:
         return None
 
 
+def habits_status_by_date(db: Session, start: date, end: date) -> dict[date, List[dict]]:
+    """Status of every visible habit on each day of [start, end].
+
+    Uses a single outer join between habits and their logs in the range, and
+    parses each habit's schedule once instead of once per day.
+    """
+    from sqlalchemy import and_, or_
+    rows = db.query(Habit, HabitLog).outerjoin(
+        HabitLog,
+        and_(
+            HabitLog.habit_id == Habit.id,
+            HabitLog.date >= start,
+            HabitLog.date <= end
+        )
+    ).filter(
+        Habit.is_active == True,
+        Habit.is_archived == False,
+        or_(Habit.start_date == None, Habit.start_date <= end)
+    ).order_by(Habit.id, HabitLog.id.desc()).all()
+
+    habits = {}
+    logs = {}
+    for habit, log in rows:
+        habits[habit.id] = habit
+        if log is not None:
+            # Rows come newest first, so the oldest log for a date wins
+            logs[(habit.id, log.date)] = log
+
+    result = {}
+    check_date = start
+    while check_date <= end:
+        day = []
+        for habit_id, habit in habits.items():
+            if habit.start_date and habit.start_date > check_date:
+                continue
+            log = logs.get((habit_id, check_date))
+            day.append({
+                "habit_id": habit.id,
+                "habit_name": habit.name,
+                "has_timer": habit.has_timer,
+                "estimated_duration_seconds": habit.estimated_duration_seconds,
+                "is_scheduled": is_scheduled_on(habit.schedule_mask, check_date),
+                "completed": log.completed if log else False,
+                "time_spent_seconds": log.time_spent_seconds if log else 0,
+                "carryover_seconds": log.carryover_seconds if log else 0,
+                "deficit_seconds": log.deficit_seconds if log else 0
+            })
+        result[check_date] = day
+        check_date += timedelta(days=1)
+
+    return result
+
+
 @router.get("", response_model=List[HabitWithStats])
+@cached_response(HABITS, LOGS)
 def get_habits(include_archived: bool = False, db: Session = Depends(get_db)):
     """Get all active habits with today's stats."""
     today = date.today()
@@ -87,14 +133,21 @@ def get_habits(include_archived: bool = False, db: Session = Depends(get_db)):
     )
     
     habits = query.all()
+    habit_ids = [habit.id for habit in habits]
+
+    # Load today's logs and streaks for all habits at once
+    today_logs = {}
+    if habit_ids:
+        for log in db.query(HabitLog).filter(
+            HabitLog.habit_id.in_(habit_ids),
+            HabitLog.date == today
+        ).order_by(HabitLog.id.desc()).all():
+            today_logs[log.habit_id] = log
+    streaks = calculate_streaks(db, habit_ids)
 
     result = []
     for habit in habits:
-        # Get today's log
-        log = db.query(HabitLog).filter(
-            HabitLog.habit_id == habit.id,
-            HabitLog.date == today
-        ).first()
+        log = today_logs.get(habit.id)
 
         habit_data = HabitWithStats(
             id=habit.id,
@@ -112,7 +165,7 @@ def get_habits(include_archived: bool = False, db: Session = Depends(get_db)):
             time_spent_today=log.time_spent_seconds if log else 0,
             carryover_seconds=log.carryover_seconds if log else 0,
             deficit_seconds=log.deficit_seconds if log else 0,
-            streak=calculate_streak(db, habit.id),
+            streak=streaks[habit.id],
             is_scheduled_today=is_scheduled_for_day(habit, today)
         )
         result.append(habit_data)
@@ -125,9 +178,14 @@ def create_habit(habit: HabitCreate, db: Session = Depends(get_db)):
     """Create a new habit."""
     habit_data = habit.model_dump()
     habit_data['schedule_days'] = parse_schedule_days(habit_data.get('schedule_days'))
+    habit_data['schedule_mask'] = schedule_days_to_mask(habit_data['schedule_days'])
     
     db_habit = Habit(**habit_data)
     db.add(db_habit)
+    db.flush()
+    db.add(HabitStreak(habit_id=db_habit.id))
+    apply_habit_change(db, db_habit.id, None, habit_schedule(db_habit))
+    invalidate_responses(db, HABITS)
     db.commit()
     db.refresh(db_habit)
     
@@ -148,6 +206,103 @@ def create_habit(habit: HabitCreate, db: Session = Depends(get_db)):
     return response
 
 
+def _import_logs(upload, fmt: str, dry_run: bool) -> dict:
+    with SessionLocal() as db:
+        return import_habit_logs(db, upload, fmt, dry_run=dry_run)
+
+
+@router.post("/import")
+async def import_logs(request: Request, format: str = "csv", dry_run: bool = False):
+    """Bulk upsert historical logs from a CSV or JSONL body of (habit, date, completed, seconds) rows.
+
+    Habits are matched by id or name. Carryover, streaks and rollups are
+    derived once after all rows are written. Returns a summary report.
+    """
+    if format not in IMPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of: {', '.join(IMPORT_FORMATS)}")
+    with await spool_request_body(request) as upload:
+        try:
+            return await run_in_threadpool(_import_logs, upload, format, dry_run)
+        except LogImportError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/calendar", response_model=MonthCalendar)
+def get_month_calendar(month: str, db: Session = Depends(get_db)):
+    """Get every habit's status for every day of a month (YYYY-MM) in one response."""
+    try:
+        month_start = date.fromisoformat(f"{month}-01")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid month format. Use YYYY-MM")
+
+    next_month = (month_start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    month_end = next_month - timedelta(days=1)
+    days = (next_month - month_start).days
+
+    from sqlalchemy import or_
+    habits = db.query(Habit).filter(
+        Habit.is_active == True,
+        Habit.is_archived == False,
+        or_(Habit.start_date == None, Habit.start_date <= month_end)
+    ).order_by(Habit.id).all()
+
+    logs = db.query(HabitLog).filter(
+        HabitLog.date >= month_start,
+        HabitLog.date <= month_end
+    ).order_by(HabitLog.id).all()
+
+    calendar_habits = {}
+    for habit in habits:
+        start_offset = max(0, (habit.start_date - month_start).days) if habit.start_date else 0
+        scheduled_bits = 0
+        for offset in range(start_offset, days):
+            if is_scheduled_on(habit.schedule_mask, month_start + timedelta(days=offset)):
+                scheduled_bits |= 1 << offset
+        calendar_habits[habit.id] = CalendarHabit(
+            id=habit.id,
+            name=habit.name,
+            has_timer=habit.has_timer,
+            estimated_duration_seconds=habit.estimated_duration_seconds,
+            start_offset=start_offset,
+            scheduled_bits=scheduled_bits
+        )
+
+    cells = {}
+    for log in logs:
+        calendar_habit = calendar_habits.get(log.habit_id)
+        if calendar_habit is None:
+            continue
+        offset = (log.date - month_start).days
+        if log.completed:
+            calendar_habit.completed_bits |= 1 << offset
+        values = (log.time_spent_seconds or 0, log.carryover_seconds or 0, log.deficit_seconds or 0)
+        if any(values):
+            cells[(log.habit_id, offset)] = [log.habit_id, offset, *values]
+
+    return MonthCalendar(
+        month=month_start.strftime("%Y-%m"),
+        start_date=month_start,
+        days=days,
+        habits=list(calendar_habits.values()),
+        cells=[cells[key] for key in sorted(cells)]
+    )
+
+
+@router.get("/by-date")
+def get_habits_by_date_range(start_date: date, end_date: date, db: Session = Depends(get_db)):
+    """Get all habits status for every day in a date range (at most MAX_RANGE_DAYS days)."""
+    if start_date > end_date:
+        raise HTTPException(status_code=400, detail="start_date must be on or before end_date")
+    if (end_date - start_date).days >= MAX_RANGE_DAYS:
+        raise HTTPException(status_code=400, detail=f"Date range is limited to {MAX_RANGE_DAYS} days")
+
+    days = habits_status_by_date(db, start_date, end_date)
+    return [
+        {"date": check_date.isoformat(), "habits": habits}
+        for check_date, habits in days.items()
+    ]
+
+
 @router.get("/{habit_id}", response_model=HabitWithStats)
 def get_habit(habit_id: int, db: Session = Depends(get_db)):
     """Get a specific habit by ID."""
@@ -192,10 +347,14 @@ def update_habit(habit_id: int, habit: HabitUpdate, db: Session = Depends(get_db
     # Handle schedule_days conversion
     if 'schedule_days' in update_data:
         update_data['schedule_days'] = parse_schedule_days(update_data['schedule_days'])
+        update_data['schedule_mask'] = schedule_days_to_mask(update_data['schedule_days'])
     
+    before = habit_schedule(db_habit)
     for key, value in update_data.items():
         setattr(db_habit, key, value)
 
+    apply_habit_change(db, habit_id, before, habit_schedule(db_habit))
+    invalidate_responses(db, HABITS)
     db.commit()
     db.refresh(db_habit)
     
@@ -221,7 +380,10 @@ def delete_habit(habit_id: int, db: Session = Depends(get_db)):
     if not db_habit:
         raise HTTPException(status_code=404, detail="Habit not found")
 
+    before = habit_schedule(db_habit)
     db_habit.is_active = False
+    apply_habit_change(db, habit_id, before, habit_schedule(db_habit))
+    invalidate_responses(db, HABITS)
     db.commit()
     return {"message": "Habit deleted"}
 
@@ -233,7 +395,10 @@ def archive_habit(habit_id: int, db: Session = Depends(get_db)):
     if not db_habit:
         raise HTTPException(status_code=404, detail="Habit not found")
 
+    before = habit_schedule(db_habit)
     db_habit.is_archived = True
+    apply_habit_change(db, habit_id, before, habit_schedule(db_habit))
+    invalidate_responses(db, HABITS)
     db.commit()
     return {"message": "Habit archived"}
 
@@ -245,7 +410,10 @@ def unarchive_habit(habit_id: int, db: Session = Depends(get_db)):
     if not db_habit:
         raise HTTPException(status_code=404, detail="Habit not found")
 
+    before = habit_schedule(db_habit)
     db_habit.is_archived = False
+    apply_habit_change(db, habit_id, before, habit_schedule(db_habit))
+    invalidate_responses(db, HABITS)
     db.commit()
     return {"message": "Habit unarchived"}
 
@@ -259,32 +427,18 @@ def log_habit(habit_id: int, log: HabitLogCreate, db: Session = Depends(get_db))
 
     today = date.today()
 
-    # Check if log already exists for today
-    existing_log = db.query(HabitLog).filter(
-        HabitLog.habit_id == habit_id,
-        HabitLog.date == today
-    ).first()
-
-    if existing_log:
-        # Update existing log - preserve time if not explicitly provided
-        existing_log.completed = log.completed
-        if log.time_spent_seconds > 0:
-            existing_log.time_spent_seconds = log.time_spent_seconds
-        db.commit()
-        db.refresh(existing_log)
-        return existing_log
-    else:
-        # Create new log
-        db_log = HabitLog(
-            habit_id=habit_id,
-            date=today,
-            completed=log.completed,
-            time_spent_seconds=log.time_spent_seconds
-        )
-        db.add(db_log)
-        db.commit()
-        db.refresh(db_log)
-        return db_log
+    # Insert or update today's log in one statement; keep the stored time unless provided
+    db_log = upsert_habit_log(
+        db, habit_id, today,
+        completed=log.completed,
+        time_spent_seconds=log.time_spent_seconds if log.time_spent_seconds > 0 else None
+    )
+    record_completion(db, habit_id, today, log.completed)
+    refresh_rollups(db, today, today, [habit_id])
+    invalidate_responses(db, LOGS)
+    db.commit()
+    db.refresh(db_log)
+    return db_log
 
 
 @router.get("/{habit_id}/logs", response_model=List[HabitLogResponse])
@@ -311,10 +465,10 @@ def get_habit_stats(habit_id: int, days: int = 30, db: Session = Depends(get_db)
         raise HTTPException(status_code=404, detail="Habit not found")
 
     start_date = date.today() - timedelta(days=days)
-    logs = db.query(HabitLog).filter(
-        HabitLog.habit_id == habit_id,
-        HabitLog.date >= start_date
-    ).all()
+    logs = db.query(HabitDailySummary).filter(
+        HabitDailySummary.habit_id == habit_id,
+        HabitDailySummary.date >= start_date
+    ).order_by(HabitDailySummary.date).all()
 
     completed_days = sum(1 for log in logs if log.completed)
     total_time = sum(log.time_spent_seconds for log in logs)
@@ -346,37 +500,7 @@ def get_habits_by_date(date_str: str, db: Session = Depends(get_db)):
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
     
-    from sqlalchemy import or_
-    habits = db.query(Habit).filter(
-        Habit.is_active == True,
-        Habit.is_archived == False,
-        or_(Habit.start_date == None, Habit.start_date <= check_date)
-    ).all()
-    
-    result = []
-    for habit in habits:
-        # Check if habit was scheduled for this day
-        scheduled = is_scheduled_for_day(habit, check_date)
-        
-        # Get log for this date
-        log = db.query(HabitLog).filter(
-            HabitLog.habit_id == habit.id,
-            HabitLog.date == check_date
-        ).first()
-        
-        result.append({
-            "habit_id": habit.id,
-            "habit_name": habit.name,
-            "has_timer": habit.has_timer,
-            "estimated_duration_seconds": habit.estimated_duration_seconds,
-            "is_scheduled": scheduled,
-            "completed": log.completed if log else False,
-            "time_spent_seconds": log.time_spent_seconds if log else 0,
-            "carryover_seconds": log.carryover_seconds if log else 0,
-            "deficit_seconds": log.deficit_seconds if log else 0
-        })
-    
-    return result
+    return habits_status_by_date(db, check_date, check_date)[check_date]
 
 
 @router.put("/by-date/{date_str}/{habit_id}")
@@ -397,71 +521,14 @@ def update_habit_log_by_date(
     if not habit:
         raise HTTPException(status_code=404, detail="Habit not found")
     
-    # Get or create log for this date
-    log = db.query(HabitLog).filter(
-        HabitLog.habit_id == habit_id,
-        HabitLog.date == log_date
-    ).first()
-    
-    if log:
-        log.completed = completed
-        log.time_spent_seconds = time_spent_seconds
-    else:
-        log = HabitLog(
-            habit_id=habit_id,
-            date=log_date,
-            completed=completed,
-            time_spent_seconds=time_spent_seconds
-        )
-        db.add(log)
-    
-    db.flush()
+    log = upsert_habit_log(db, habit_id, log_date, completed=completed, time_spent_seconds=time_spent_seconds)
+    record_completion(db, habit_id, log_date, completed)
     
-    # If it's a timer habit and we're marking as complete, adjust next day's carryover
-    if habit.has_timer and habit.estimated_duration_seconds:
-        next_date = log_date + timedelta(days=1)
-        next_log = db.query(HabitLog).filter(
-            HabitLog.habit_id == habit_id,
-            HabitLog.date == next_date
-        ).first()
-        
-        if completed:
-            # If marking as complete, remove any deficit from next day
-            if next_log and next_log.deficit_seconds > 0:
-                next_log.deficit_seconds = 0
-            
-            # If time exceeds estimate, add carryover to next day
-            estimated = habit.estimated_duration_seconds
-            if log.time_spent_seconds > estimated:
-                excess = log.time_spent_seconds - estimated
-                if next_log:
-                    next_log.carryover_seconds = excess
-                else:
-                    next_log = HabitLog(
-                        habit_id=habit_id,
-                        date=next_date,
-                        completed=False,
-                        time_spent_seconds=0,
-                        carryover_seconds=excess
-                    )
-                    db.add(next_log)
-        else:
-            # If marking as not complete, calculate deficit for next day
-            estimated = habit.estimated_duration_seconds
-            deficit = max(0, estimated - log.time_spent_seconds)
-            if next_log:
-                next_log.deficit_seconds = deficit
-                next_log.carryover_seconds = 0
-            else:
-                next_log = HabitLog(
-                    habit_id=habit_id,
-                    date=next_date,
-                    completed=False,
-                    time_spent_seconds=0,
-                    deficit_seconds=deficit
-                )
-                db.add(next_log)
+    # Recompute the next day's carryover/deficit from this day's log (unlike timers, not gated by the setting)
+    apply_carryover(db, log_date, log_date, [habit_id])
     
+    refresh_rollups(db, log_date, log_date + timedelta(days=1), [habit_id])
+    invalidate_responses(db, LOGS)
     db.commit()
     db.refresh(log)
     
@@ -1,29 +1,64 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from datetime import date
+from sqlalchemy import tuple_
+from datetime import date, datetime
 from typing import List, Optional
 
 from database import get_db
 from models import Note
-from schemas import NoteCreate, NoteUpdate, NoteResponse, NotesByDate
+from schemas import NoteCreate, NoteUpdate, NoteResponse, NotesByDate, NoteSearchResult
 from auth import get_current_user
+from response_cache import invalidate_responses, NOTES
+from pagination import NEXT_CURSOR_HEADER, encode_cursor, decode_cursor
+from notes_search import index_note, unindex_note, search_terms, search_notes
+from notes_export import export_notes, EXPORT_MEDIA_TYPES
 
 router = APIRouter(prefix="/api/notes", tags=["notes"], dependencies=[Depends(get_current_user)])
 
+# Page sizes: notes per page of the flat list, days per page of the grouped history
+NOTES_PAGE_DEFAULT = 100
+NOTES_PAGE_MAX = 500
+NOTE_DAYS_PAGE_DEFAULT = 30
+NOTE_DAYS_PAGE_MAX = 366
+
+# Largest page of search results
+SEARCH_PAGE_MAX = 100
+
 
 @router.get("", response_model=List[NoteResponse])
 def get_notes(
+    response: Response,
     note_date: Optional[date] = None,
+    limit: int = NOTES_PAGE_DEFAULT,
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
-    """Get notes, optionally filtered by date."""
+    """Get notes newest first, optionally filtered by date, one page at a time.
+
+    The cursor of the next page is returned in the X-Next-Cursor header.
+    """
+    if not 1 <= limit <= NOTES_PAGE_MAX:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {NOTES_PAGE_MAX}")
+
     query = db.query(Note)
 
     if note_date:
         query = query.filter(Note.date == note_date)
 
-    notes = query.order_by(Note.date.desc(), Note.created_at.desc()).all()
+    if cursor:
+        after_date, after_created_at, after_id = decode_cursor(cursor, 3)
+        try:
+            after = (date.fromisoformat(after_date), datetime.fromisoformat(after_created_at), int(after_id))
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = query.filter(tuple_(Note.date, Note.created_at, Note.id) < after)
+
+    notes = query.order_by(Note.date.desc(), Note.created_at.desc(), Note.id.desc()).limit(limit + 1).all()
+    if len(notes) > limit:
+        notes = notes[:limit]
+        last = notes[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last.date, last.created_at, last.id)
     return notes
 
 
@@ -37,34 +72,91 @@ def get_today_notes(db: Session = Depends(get_db)):
 
 @router.get("/by-date", response_model=List[NotesByDate])
 def get_notes_grouped_by_date(
+    response: Response,
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
+    days: int = NOTE_DAYS_PAGE_DEFAULT,
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
-    """Get all notes grouped by date (for the history view)."""
+    """Get notes grouped by date (for the history view), newest day first.
+
+    Pages hold up to `days` whole days that have notes; the cursor of the
+    next page is returned in the X-Next-Cursor header.
+    """
+    if not 1 <= days <= NOTE_DAYS_PAGE_MAX:
+        raise HTTPException(status_code=400, detail=f"days must be between 1 and {NOTE_DAYS_PAGE_MAX}")
+
     query = db.query(Note)
 
     if start_date:
         query = query.filter(Note.date >= start_date)
     if end_date:
         query = query.filter(Note.date <= end_date)
+    if cursor:
+        (before,) = decode_cursor(cursor, 1)
+        try:
+            query = query.filter(Note.date < date.fromisoformat(before))
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    # The days of this page, then their notes
+    page_days = [
+        note_date for (note_date,) in
+        query.with_entities(Note.date).distinct().order_by(Note.date.desc()).limit(days + 1)
+    ]
+    if not page_days:
+        return []
+    if len(page_days) > days:
+        page_days = page_days[:days]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(page_days[-1])
 
-    notes = query.order_by(Note.date.desc(), Note.created_at.desc()).all()
+    notes = query.filter(Note.date >= page_days[-1], Note.date <= page_days[0]).order_by(
+        Note.date.desc(), Note.created_at.desc(), Note.id.desc()
+    ).all()
 
     # Group notes by date
     notes_by_date = {}
     for note in notes:
-        if note.date not in notes_by_date:
-            notes_by_date[note.date] = []
-        notes_by_date[note.date].append(note)
-
-    # Convert to list of NotesByDate
-    result = [
-        NotesByDate(date=d, notes=notes_list)
-        for d, notes_list in sorted(notes_by_date.items(), reverse=True)
-    ]
+        notes_by_date.setdefault(note.date, []).append(note)
+
+    return [NotesByDate(date=d, notes=notes_list) for d, notes_list in notes_by_date.items()]
 
-    return result
+
+@router.get("/search", response_model=List[NoteSearchResult])
+def search(
+    q: str,
+    limit: int = 20,
+    offset: int = 0,
+    db: Session = Depends(get_db)
+):
+    """Full-text search over note contents, best match first, with highlighted snippets."""
+    if not 1 <= limit <= SEARCH_PAGE_MAX:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {SEARCH_PAGE_MAX}")
+    if offset < 0:
+        raise HTTPException(status_code=400, detail="offset must not be negative")
+    terms = search_terms(q)
+    if not terms:
+        raise HTTPException(status_code=400, detail="Search query must contain at least one word")
+    return search_notes(db, terms, limit, offset)
+
+
+@router.get("/export")
+def export(format: str = "txt", gzip: bool = False):
+    """Download every note as txt, md or jsonl, streamed from the database."""
+    if format not in EXPORT_MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail=f"format must be one of: {', '.join(EXPORT_MEDIA_TYPES)}")
+
+    filename = f"notas-eye-life-{date.today().isoformat()}.{format}"
+    media_type = EXPORT_MEDIA_TYPES[format]
+    if gzip:
+        filename += ".gz"
+        media_type = "application/gzip"
+    return StreamingResponse(
+        export_notes(format, gzip),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
 
 
 @router.post("", response_model=NoteResponse)
@@ -72,6 +164,8 @@ def create_note(note: NoteCreate, db: Session = Depends(get_db)):
     """Create a new note."""
     db_note = Note(**note.model_dump())
     db.add(db_note)
+    index_note(db, db_note)
+    invalidate_responses(db, NOTES)
     db.commit()
     db.refresh(db_note)
     return db_note
@@ -97,6 +191,9 @@ def update_note(note_id: int, note: NoteUpdate, db: Session = Depends(get_db)):
     for key, value in update_data.items():
         setattr(db_note, key, value)
 
+    if "content" in update_data:
+        index_note(db, db_note)
+    invalidate_responses(db, NOTES)
     db.commit()
     db.refresh(db_note)
     return db_note
@@ -110,5 +207,7 @@ def delete_note(note_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Note not found")
 
     db.delete(db_note)
+    unindex_note(db, note_id)
+    invalidate_responses(db, NOTES)
     db.commit()
     return {"message": "Note deleted"}
@@ -2,36 +2,21 @@ from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 
 from database import get_db
-from models import AppSettings, Habit, HabitLog, Note, TimerSession
 from schemas import SettingsResponse, SettingsUpdate
 from auth import get_current_user
+from settings_service import get_bool, set_setting, expire_settings, settings_cache
+from response_cache import invalidate_all_responses
+from notes_search import rebuild_note_index
+from backup import clear_account
 
 router = APIRouter(prefix="/api/settings", tags=["settings"], dependencies=[Depends(get_current_user)])
 
 
-def get_setting(db: Session, key: str, default: str = "") -> str:
-    """Get a setting value by key."""
-    setting = db.query(AppSettings).filter(AppSettings.key == key).first()
-    return setting.value if setting else default
-
-
-def set_setting(db: Session, key: str, value: str):
-    """Set a setting value by key."""
-    setting = db.query(AppSettings).filter(AppSettings.key == key).first()
-    if setting:
-        setting.value = value
-    else:
-        setting = AppSettings(key=key, value=value)
-        db.add(setting)
-    db.commit()
-
-
 @router.get("", response_model=SettingsResponse)
 def get_settings(db: Session = Depends(get_db)):
     """Get all application settings."""
-    carryover_value = get_setting(db, "carryover_enabled", "false")
     return SettingsResponse(
-        carryover_enabled=carryover_value.lower() == "true"
+        carryover_enabled=get_bool(db, "carryover_enabled")
     )
 
 
@@ -47,12 +32,11 @@ def update_settings(settings: SettingsUpdate, db: Session = Depends(get_db)):
 @router.delete("/reset-all")
 def reset_all_data(db: Session = Depends(get_db)):
     """Delete ALL user data: habits, logs, notes, timer sessions, and settings."""
-    # Delete in correct order (children first due to foreign keys)
-    db.query(TimerSession).delete()
-    db.query(HabitLog).delete()
-    db.query(Habit).delete()
-    db.query(Note).delete()
-    db.query(AppSettings).delete()
+    clear_account(db)
+    rebuild_note_index(db)
+    expire_settings(db)
+    invalidate_all_responses(db)
     db.commit()
+    settings_cache.invalidate()
     return {"message": "Todos os dados foram apagados com sucesso."}
 
@@ -1,21 +1,94 @@
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, and_
 from datetime import date, datetime, timedelta
-from typing import Optional
+from typing import List, Optional
+import asyncio
 
-from database import get_db
-from models import Habit, HabitLog, TimerSession, AppSettings
-from schemas import TimerStart, TimerStop, TimerResponse, TimerStatus
+from database import get_db, SessionLocal
+from models import Habit, HabitLog, TimerSession, ActiveTimer
+from schemas import TimerStart, TimerStop, TimerResponse, TimerStatus, HabitTimerStatus
 from auth import get_current_user
+from rollups import refresh_rollups
+from habit_logs import upsert_habit_log
+from active_timers import running_session, running_sessions, mark_running, mark_stopped, TimerConflict
+from carryover import apply_carryover
+from settings_service import carryover_enabled
+from response_cache import invalidate_responses, LOGS
+from events import timer_events, format_sse, RESYNC, KEEPALIVE_SECONDS
 
 router = APIRouter(prefix="/api/timers", tags=["timers"], dependencies=[Depends(get_current_user)])
 
 
-def get_setting(db: Session, key: str, default: str = "") -> str:
-    """Get a setting value by key."""
-    setting = db.query(AppSettings).filter(AppSettings.key == key).first()
-    return setting.value if setting else default
+def logged_time_today(db: Session, habit_id: int) -> int:
+    return db.query(HabitLog.time_spent_seconds).filter(
+        HabitLog.habit_id == habit_id,
+        HabitLog.date == date.today()
+    ).scalar() or 0
+
+
+def running_timers(db: Session) -> List[dict]:
+    """Every running session with the time already logged today for its habit."""
+    rows = db.query(TimerSession.habit_id, TimerSession.start_time, HabitLog.time_spent_seconds).join(
+        ActiveTimer, ActiveTimer.session_id == TimerSession.id
+    ).outerjoin(
+        HabitLog, and_(HabitLog.habit_id == TimerSession.habit_id, HabitLog.date == date.today())
+    ).all()
+    return [
+        {"habit_id": habit_id, "start_time": start_time.isoformat(), "time_spent_today": time_spent or 0}
+        for habit_id, start_time, time_spent in rows
+    ]
+
+
+def running_session_response(running: TimerSession) -> TimerResponse:
+    """A running session with its duration so far."""
+    return TimerResponse(
+        id=running.id,
+        habit_id=running.habit_id,
+        date=running.date,
+        start_time=running.start_time,
+        end_time=running.end_time,
+        duration_seconds=int((datetime.utcnow() - running.start_time).total_seconds()),
+        is_running=True
+    )
+
+
+def timers_snapshot() -> dict:
+    db = SessionLocal()
+    try:
+        return {"type": "snapshot", "timers": running_timers(db)}
+    finally:
+        db.close()
+
+
+async def timer_event_stream(subscription):
+    try:
+        yield format_sse(await run_in_threadpool(timers_snapshot))
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.queue.get(), KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            if event is RESYNC:
+                event = await run_in_threadpool(timers_snapshot)
+            yield format_sse(event)
+    finally:
+        timer_events.unsubscribe(subscription)
+
+
+@router.get("/stream")
+async def stream_timers():
+    """Server-sent events: a snapshot of the running timers, then every start, stop and reset."""
+    # Subscribe before reading the snapshot so no event falls in between
+    subscription = timer_events.subscribe()
+    return StreamingResponse(
+        timer_event_stream(subscription),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 
 @router.post("/start", response_model=TimerResponse)
@@ -29,10 +102,7 @@ def start_timer(timer: TimerStart, db: Session = Depends(get_db)):
         raise HTTPException(status_code=400, detail="This habit does not have timer enabled")
 
     # Check if there's already a running timer for this habit and stop it
-    running = db.query(TimerSession).filter(
-        TimerSession.habit_id == timer.habit_id,
-        TimerSession.is_running == True
-    ).first()
+    running = running_session(db, timer.habit_id)
 
     if running:
         # Stop the existing timer before starting a new one
@@ -41,6 +111,8 @@ def start_timer(timer: TimerStart, db: Session = Depends(get_db)):
         running.duration_seconds = int((now - running.start_time).total_seconds())
         running.is_running = False
         db.flush()
+        refresh_rollups(db, running.date, running.date, [timer.habit_id])
+        invalidate_responses(db, LOGS)
 
     # Create new timer session
     today = date.today()
@@ -53,9 +125,21 @@ def start_timer(timer: TimerStart, db: Session = Depends(get_db)):
         is_running=True
     )
     db.add(session)
+    try:
+        mark_running(db, session, replaces=running.id if running else None)
+    except TimerConflict:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="A timer for this habit was just started or stopped")
+    time_spent = logged_time_today(db, timer.habit_id)
     db.commit()
     db.refresh(session)
 
+    timer_events.publish({
+        "type": "started",
+        "habit_id": timer.habit_id,
+        "start_time": session.start_time.isoformat(),
+        "time_spent_today": time_spent
+    })
     return session
 
 
@@ -63,119 +147,80 @@ def start_timer(timer: TimerStart, db: Session = Depends(get_db)):
 def stop_timer(timer: TimerStop, db: Session = Depends(get_db)):
     """Stop the running timer for a habit."""
     # Find running timer
-    session = db.query(TimerSession).filter(
-        TimerSession.habit_id == timer.habit_id,
-        TimerSession.is_running == True
-    ).first()
+    session = running_session(db, timer.habit_id)
 
     if not session:
         raise HTTPException(status_code=404, detail="No running timer found for this habit")
 
-    # Get habit info for carryover calculation
-    habit = db.query(Habit).filter(Habit.id == timer.habit_id).first()
-
     # Stop timer and calculate duration
     now = datetime.utcnow()
     session.end_time = now
     session.duration_seconds = int((now - session.start_time).total_seconds())
     session.is_running = False
+    try:
+        mark_stopped(db, session)
+    except TimerConflict:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="This timer was just stopped or restarted")
 
-    # Update habit log with time spent
+    # Add the session's time to today's log in a single statement
     today = date.today()
-    log = db.query(HabitLog).filter(
-        HabitLog.habit_id == timer.habit_id,
-        HabitLog.date == today
-    ).first()
-
-    if log:
-        log.time_spent_seconds += session.duration_seconds
-    else:
-        log = HabitLog(
-            habit_id=timer.habit_id,
-            date=today,
-            completed=False,
-            time_spent_seconds=session.duration_seconds
-        )
-        db.add(log)
-    
-    db.flush()  # Ensure log is saved before carryover/deficit calculation
+    log = upsert_habit_log(db, timer.habit_id, today, add_seconds=session.duration_seconds)
 
-    # Check for carryover/deficit logic
-    carryover_enabled = get_setting(db, "carryover_enabled", "false").lower() == "true"
-    
-    if carryover_enabled and habit and habit.estimated_duration_seconds:
-        estimated = habit.estimated_duration_seconds
-        time_spent = log.time_spent_seconds
-        
-        # Get yesterday's log to check for deficit
-        yesterday = today - timedelta(days=1)
-        yesterday_log = db.query(HabitLog).filter(
-            HabitLog.habit_id == timer.habit_id,
-            HabitLog.date == yesterday
-        ).first()
-        
-        # Check if today's time fulfills yesterday's deficit (retroactive completion)
-        if yesterday_log and not yesterday_log.completed and yesterday_log.deficit_seconds > 0:
-            # Check if today's time + yesterday's time >= estimated
-            total_time = yesterday_log.time_spent_seconds + time_spent
-            if total_time >= estimated:
-                # Mark yesterday as completed!
-                yesterday_log.completed = True
-                yesterday_log.deficit_seconds = 0
-        
-        # Calculate today's status
-        if time_spent >= estimated:
-            # Time spent exceeds or meets estimated - carry over excess
-            if time_spent > estimated:
-                excess = time_spent - estimated
-                
-                # Get or create next day's log
-                tomorrow = today + timedelta(days=1)
-                next_log = db.query(HabitLog).filter(
-                    HabitLog.habit_id == timer.habit_id,
-                    HabitLog.date == tomorrow
-                ).first()
-                
-                if next_log:
-                    next_log.carryover_seconds = excess
-                else:
-                    next_log = HabitLog(
-                        habit_id=timer.habit_id,
-                        date=tomorrow,
-                        completed=False,
-                        time_spent_seconds=0,
-                        carryover_seconds=excess
-                    )
-                    db.add(next_log)
-        else:
-            # Time spent is less than estimated - calculate deficit for next day
-            deficit = estimated - time_spent
-            
-            # Get or create next day's log
-            tomorrow = today + timedelta(days=1)
-            next_log = db.query(HabitLog).filter(
-                HabitLog.habit_id == timer.habit_id,
-                HabitLog.date == tomorrow
-            ).first()
-            
-            if next_log:
-                next_log.deficit_seconds = deficit
-            else:
-                next_log = HabitLog(
-                    habit_id=timer.habit_id,
-                    date=tomorrow,
-                    completed=False,
-                    time_spent_seconds=0,
-                    deficit_seconds=deficit
-                )
-                db.add(next_log)
+    # Carry today's excess or deficit over to tomorrow; today's time may also
+    # make up yesterday's deficit and complete it retroactively
+    if carryover_enabled(db):
+        apply_carryover(db, today, today, [timer.habit_id], retro_complete=True)
 
+    refresh_rollups(
+        db, min(session.date, today) - timedelta(days=1), today + timedelta(days=1), [timer.habit_id]
+    )
+    time_spent = log.time_spent_seconds
+    invalidate_responses(db, LOGS)
     db.commit()
     db.refresh(session)
 
+    timer_events.publish({
+        "type": "stopped",
+        "habit_id": timer.habit_id,
+        "duration_seconds": session.duration_seconds,
+        "time_spent_today": time_spent
+    })
     return session
 
 
+@router.get("/status", response_model=List[HabitTimerStatus])
+def get_all_timer_status(db: Session = Depends(get_db)):
+    """Get timer status for every timer-enabled habit in two queries."""
+    today = date.today()
+
+    # Time of today's finished sessions per habit, 0 for habits without any
+    totals = db.query(Habit.id, func.coalesce(func.sum(TimerSession.duration_seconds), 0)).outerjoin(
+        TimerSession, and_(
+            TimerSession.habit_id == Habit.id,
+            TimerSession.date == today,
+            TimerSession.is_running == False
+        )
+    ).filter(
+        Habit.has_timer == True,
+        Habit.is_active == True,
+        Habit.is_archived == False
+    ).group_by(Habit.id).all()
+
+    running = {session.habit_id: session for session in running_sessions(db)}
+
+    statuses = []
+    for habit_id, total_time in totals:
+        current_session = running_session_response(running[habit_id]) if habit_id in running else None
+        statuses.append(HabitTimerStatus(
+            habit_id=habit_id,
+            is_running=current_session is not None,
+            current_session=current_session,
+            total_time_today=total_time + (current_session.duration_seconds if current_session else 0)
+        ))
+    return statuses
+
+
 @router.get("/{habit_id}/status", response_model=TimerStatus)
 def get_timer_status(habit_id: int, db: Session = Depends(get_db)):
     """Get timer status for a habit."""
@@ -184,10 +229,7 @@ def get_timer_status(habit_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Habit not found")
 
     # Get running timer
-    running = db.query(TimerSession).filter(
-        TimerSession.habit_id == habit_id,
-        TimerSession.is_running == True
-    ).first()
+    running = running_session(db, habit_id)
 
     # Calculate total time today
     today = date.today()
@@ -200,17 +242,8 @@ def get_timer_status(habit_id: int, db: Session = Depends(get_db)):
     # Add current session time if running
     current_session = None
     if running:
-        current_duration = int((datetime.utcnow() - running.start_time).total_seconds())
-        total_time += current_duration
-        current_session = TimerResponse(
-            id=running.id,
-            habit_id=running.habit_id,
-            date=running.date,
-            start_time=running.start_time,
-            end_time=running.end_time,
-            duration_seconds=current_duration,
-            is_running=True
-        )
+        current_session = running_session_response(running)
+        total_time += current_session.duration_seconds
 
     return TimerStatus(
         is_running=running is not None,
@@ -234,10 +267,7 @@ def get_today_time(habit_id: int, db: Session = Depends(get_db)):
     ).scalar() or 0
 
     # Check for running timer
-    running = db.query(TimerSession).filter(
-        TimerSession.habit_id == habit_id,
-        TimerSession.is_running == True
-    ).first()
+    running = running_session(db, habit_id)
 
     if running:
         current_duration = int((datetime.utcnow() - running.start_time).total_seconds())
@@ -257,10 +287,7 @@ def reset_timer(habit_id: int, db: Session = Depends(get_db)):
     now = datetime.utcnow()
 
     # Check for running timer
-    running = db.query(TimerSession).filter(
-        TimerSession.habit_id == habit_id,
-        TimerSession.is_running == True
-    ).first()
+    running = running_session(db, habit_id)
     
     # Delete all completed timer sessions for today
     db.query(TimerSession).filter(
@@ -275,15 +302,20 @@ def reset_timer(habit_id: int, db: Session = Depends(get_db)):
         running.duration_seconds = 0
     
     # Reset time in habit log
-    log = db.query(HabitLog).filter(
+    db.query(HabitLog).filter(
         HabitLog.habit_id == habit_id,
         HabitLog.date == today
-    ).first()
-    
-    if log:
-        log.time_spent_seconds = 0
+    ).update({HabitLog.time_spent_seconds: 0}, synchronize_session=False)
     
+    refresh_rollups(db, today, today, [habit_id])
+    invalidate_responses(db, LOGS)
     db.commit()
 
+    timer_events.publish({
+        "type": "reset",
+        "habit_id": habit_id,
+        "start_time": now.isoformat() if running else None,
+        "time_spent_today": 0
+    })
     return {"message": "Timer reset successfully", "habit_id": habit_id}
 
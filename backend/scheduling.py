@@ -0,0 +1,92 @@
+from bisect import bisect_right
+from datetime import date, timedelta
+from typing import Iterable, List, Optional
+import json
+
+from sqlalchemy import Integer, and_, cast, extract, func, literal, or_
+from sqlalchemy.orm import Session
+
+from models import Habit
+
+# Bit n set = scheduled on weekday n (0=Monday, 6=Sunday)
+EVERY_DAY_MASK = 0b1111111
+
+
+def weekdays_to_mask(days: Optional[Iterable[int]]) -> int:
+    """Convert a list of weekday numbers to a schedule bitmask. Empty/None means every day."""
+    mask = 0
+    for day in days or ():
+        mask |= 1 << day
+    return mask or EVERY_DAY_MASK
+
+
+def mask_to_weekdays(mask: int) -> List[int]:
+    return [day for day in range(7) if mask & (1 << day)]
+
+
+def schedule_days_to_mask(schedule_days: Optional[str]) -> int:
+    """Convert the stored schedule_days JSON to a bitmask. Missing or malformed means every day."""
+    if not schedule_days:
+        return EVERY_DAY_MASK
+    try:
+        return weekdays_to_mask(json.loads(schedule_days))
+    except (json.JSONDecodeError, TypeError):
+        return EVERY_DAY_MASK
+
+
+def is_scheduled_on(mask: Optional[int], check_date: date) -> bool:
+    return bool((mask if mask is not None else EVERY_DAY_MASK) & (1 << check_date.weekday()))
+
+
+def weekday_bit(dialect_name: str, date_column):
+    """SQL expression for the schedule bit of a date column's weekday (Monday = bit 0)."""
+    if dialect_name == "postgresql":
+        weekday = cast(extract("isodow", date_column), Integer) - 1
+    else:
+        # strftime('%w') counts from Sunday = 0
+        weekday = (cast(func.strftime("%w", date_column), Integer) + 6) % 7
+    return literal(1).op("<<")(weekday)
+
+
+def due_in_range(start: date, end: date):
+    """SQL condition: the habit has started by end and is scheduled on a weekday in [start, end]."""
+    range_mask = 0
+    current = start
+    while current <= end and range_mask != EVERY_DAY_MASK:
+        range_mask |= 1 << current.weekday()
+        current += timedelta(days=1)
+    return and_(
+        or_(Habit.start_date == None, Habit.start_date <= end),
+        Habit.schedule_mask.op("&")(range_mask) != 0
+    )
+
+
+def scheduled_totals(db: Session, start: date, end: date) -> dict[date, int]:
+    """Number of habits due on each day of [start, end].
+
+    A habit counts towards a day when it is active, not archived, has started
+    and the weekday is in its schedule. Only habits due somewhere in the range
+    are read, grouped by (schedule_mask, start_date); start dates are then
+    bucketed per weekday and sorted once, so each day is a single bisect.
+    """
+    groups = db.query(Habit.schedule_mask, Habit.start_date, func.count(Habit.id)).filter(
+        Habit.is_active == True,
+        Habit.is_archived == False,
+        due_in_range(start, end)
+    ).group_by(Habit.schedule_mask, Habit.start_date).all()
+
+    starts_by_weekday = [[] for _ in range(7)]
+    for mask, start_date, count in groups:
+        first_day = start_date.toordinal() if start_date else 0
+        for weekday in mask_to_weekdays(mask):
+            starts_by_weekday[weekday].extend([first_day] * count)
+    for starts in starts_by_weekday:
+        starts.sort()
+
+    totals = {}
+    current = start
+    while current <= end:
+        totals[current] = bisect_right(starts_by_weekday[current.weekday()], current.toordinal())
+        current += timedelta(days=1)
+    return totals
+
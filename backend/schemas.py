@@ -73,6 +73,30 @@ class HabitLogResponse(BaseModel):
         from_attributes = True
 
 
+# ==================== Calendar Schemas ====================
+
+class CalendarHabit(BaseModel):
+    id: int
+    name: str
+    has_timer: bool
+    estimated_duration_seconds: Optional[int] = None
+    # First day offset (0-based, within the month) on which the habit is shown
+    start_offset: int = 0
+    # Bit i set = habit scheduled on day offset i
+    scheduled_bits: int = 0
+    # Bit i set = habit completed on day offset i
+    completed_bits: int = 0
+
+
+class MonthCalendar(BaseModel):
+    month: str
+    start_date: date
+    days: int
+    habits: List[CalendarHabit]
+    # Sparse cells: [habit_id, day_offset, time_spent_seconds, carryover_seconds, deficit_seconds]
+    cells: List[List[int]]
+
+
 # ==================== Note Schemas ====================
 
 class NoteBase(BaseModel):
@@ -103,6 +127,13 @@ class NotesByDate(BaseModel):
     notes: List[NoteResponse]
 
 
+class NoteSearchResult(BaseModel):
+    id: int
+    date: date
+    created_at: datetime
+    snippet: str  # HTML-escaped excerpt with the matches wrapped in <mark>
+
+
 # ==================== Timer Schemas ====================
 
 class TimerStart(BaseModel):
@@ -132,6 +163,10 @@ class TimerStatus(BaseModel):
     total_time_today: int = 0
 
 
+class HabitTimerStatus(TimerStatus):
+    habit_id: int
+
+
 # ==================== Dashboard Schemas ====================
 
 class DashboardStats(BaseModel):
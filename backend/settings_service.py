@@ -0,0 +1,87 @@
+import os
+import threading
+import time
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from models import AppSettings
+from cache_versions import read_version, bump_versions
+
+# Seconds a worker trusts its cached settings before checking whether another worker changed them
+VERSION_CHECK_SECONDS = float(os.getenv("SETTINGS_VERSION_CHECK_SECONDS", "5"))
+
+SETTINGS_VERSION = "settings"
+
+
+class SettingsCache:
+    """Every AppSettings row of this process, loaded in one query.
+
+    Writes through this module invalidate it immediately. Writes made by
+    other workers bump the shared settings version, which is checked at
+    most every VERSION_CHECK_SECONDS; in between, reads cost no queries.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values: Optional[dict[str, Optional[str]]] = None
+        self._version: Optional[int] = None
+        self._checked_at = 0.0
+
+    def values(self, db: Session) -> dict[str, Optional[str]]:
+        now = time.monotonic()
+        with self._lock:
+            if self._values is not None and now - self._checked_at < VERSION_CHECK_SECONDS:
+                return self._values
+            values, known_version = self._values, self._version
+
+        version = read_version(db, SETTINGS_VERSION)
+        if values is None or version != known_version:
+            values = dict(db.query(AppSettings.key, AppSettings.value).all())
+
+        with self._lock:
+            self._values, self._version, self._checked_at = values, version, now
+        return values
+
+    def invalidate(self):
+        with self._lock:
+            self._values = None
+            self._version = None
+
+
+settings_cache = SettingsCache()
+
+
+def get_setting(db: Session, key: str, default: str = "") -> str:
+    """Get a setting value by key."""
+    value = settings_cache.values(db).get(key)
+    return value if value is not None else default
+
+
+def get_bool(db: Session, key: str, default: bool = False) -> bool:
+    return get_setting(db, key, "true" if default else "false").lower() == "true"
+
+
+def carryover_enabled(db: Session) -> bool:
+    return get_bool(db, "carryover_enabled")
+
+
+def set_setting(db: Session, key: str, value: str):
+    """Set a setting value by key and invalidate the cache of every worker."""
+    setting = db.query(AppSettings).filter(AppSettings.key == key).first()
+    if setting:
+        setting.value = value
+    else:
+        setting = AppSettings(key=key, value=value)
+        db.add(setting)
+    bump_versions(db, SETTINGS_VERSION)
+    db.commit()
+    settings_cache.invalidate()
+
+
+def expire_settings(db: Session):
+    """Mark settings written directly to app_settings stale for every worker once db commits.
+
+    Call settings_cache.invalidate() after the commit.
+    """
+    bump_versions(db, SETTINGS_VERSION)
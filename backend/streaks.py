@@ -0,0 +1,329 @@
+from datetime import date, timedelta
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import select, func, case, literal, Date
+from sqlalchemy.orm import Session
+
+from models import Habit, HabitLog, HabitStreak
+
+# Dialects that can run the gaps-and-islands statement (window functions + date arithmetic)
+SQL_DIALECTS = ("sqlite", "postgresql")
+
+# Day numbers are measured from this date on PostgreSQL (date - date yields an integer there)
+EPOCH = date(1970, 1, 1)
+
+
+class Streak(NamedTuple):
+    current: int = 0
+    longest: int = 0
+
+
+def streak_from_dates(dates: Iterable[date], today: Optional[date] = None) -> Streak:
+    """Compute current and longest streak from a sorted (ascending) list of completed dates.
+
+    The current streak only counts if the run reaches today, matching the
+    historical day-by-day loop. Duplicate dates are ignored.
+    """
+    today = today or date.today()
+    current = longest = run = 0
+    previous = None
+
+    for log_date in dates:
+        if log_date > today or log_date == previous:
+            continue
+        if previous is not None and log_date - previous == timedelta(days=1):
+            run += 1
+        else:
+            run = 1
+        longest = max(longest, run)
+        previous = log_date
+
+    if previous == today:
+        current = run
+
+    return Streak(current=current, longest=longest)
+
+
+def _day_number(dialect_name: str, column):
+    """Integer-valued day number for a date column, used to find consecutive runs."""
+    if dialect_name == "postgresql":
+        return column - literal(EPOCH, Date)
+    return func.julianday(column)
+
+
+def _islands(dialect_name: str, habit_ids: List[int], until: Optional[date] = None):
+    """One row per run of consecutive completed dates (habit_id, last_date, length).
+
+    Consecutive dates share the same (day number - row number) value, so
+    grouping by it collapses each run into a single row.
+    """
+    conditions = [HabitLog.habit_id.in_(habit_ids), HabitLog.completed == True]
+    if until is not None:
+        conditions.append(HabitLog.date <= until)
+    completed = select(HabitLog.habit_id, HabitLog.date).where(*conditions).distinct().subquery()
+
+    numbered = select(
+        completed.c.habit_id,
+        completed.c.date,
+        (
+            _day_number(dialect_name, completed.c.date)
+            - func.row_number().over(partition_by=completed.c.habit_id, order_by=completed.c.date)
+        ).label("island")
+    ).subquery()
+
+    return select(
+        numbered.c.habit_id,
+        func.max(numbered.c.date).label("last_date"),
+        func.count().label("length"),
+        func.row_number().over(
+            partition_by=numbered.c.habit_id,
+            order_by=func.max(numbered.c.date).desc()
+        ).label("recency")
+    ).group_by(numbered.c.habit_id, numbered.c.island).subquery()
+
+
+def streaks_statement(dialect_name: str, habit_ids: List[int], today: date):
+    """Build the single gaps-and-islands statement computing streaks for many habits.
+
+    The current streak is the length of the run ending today.
+    """
+    islands = _islands(dialect_name, habit_ids, until=today)
+    return select(
+        islands.c.habit_id,
+        func.max(case((islands.c.last_date == today, islands.c.length), else_=0)).label("current"),
+        func.max(islands.c.length).label("longest")
+    ).group_by(islands.c.habit_id)
+
+
+def latest_runs_statement(dialect_name: str, habit_ids: List[int]):
+    """Build the statement returning each habit's latest run, whatever its end date.
+
+    Rows are (habit_id, last_completed_date, latest run length, longest run length).
+    """
+    islands = _islands(dialect_name, habit_ids)
+    return select(
+        islands.c.habit_id,
+        func.max(islands.c.last_date).label("last_date"),
+        func.max(case((islands.c.recency == 1, islands.c.length), else_=0)).label("current"),
+        func.max(islands.c.length).label("longest")
+    ).group_by(islands.c.habit_id)
+
+
+def compute_streaks(db: Session, habit_ids: List[int], today: Optional[date] = None) -> dict[int, Streak]:
+    """Compute current and longest streaks for many habits in a single statement.
+
+    Runs the gaps-and-islands query on SQLite and PostgreSQL; other dialects
+    fetch the completed dates once and fall back to `streak_from_dates`.
+    """
+    today = today or date.today()
+    habit_ids = list(habit_ids)
+    streaks = {habit_id: Streak() for habit_id in habit_ids}
+    if not habit_ids:
+        return streaks
+
+    dialect_name = db.get_bind().dialect.name
+    if dialect_name in SQL_DIALECTS:
+        for habit_id, current, longest in db.execute(streaks_statement(dialect_name, habit_ids, today)):
+            streaks[habit_id] = Streak(current=current or 0, longest=longest or 0)
+        return streaks
+
+    rows = db.query(HabitLog.habit_id, HabitLog.date).filter(
+        HabitLog.habit_id.in_(habit_ids),
+        HabitLog.date <= today,
+        HabitLog.completed == True
+    ).distinct().order_by(HabitLog.habit_id, HabitLog.date).all()
+
+    dates_by_habit = {}
+    for habit_id, log_date in rows:
+        dates_by_habit.setdefault(habit_id, []).append(log_date)
+    for habit_id, dates in dates_by_habit.items():
+        streaks[habit_id] = streak_from_dates(dates, today)
+    return streaks
+
+
+def compute_streak(db: Session, habit_id: int, today: Optional[date] = None) -> Streak:
+    """Compute current and longest streak for one habit."""
+    return compute_streaks(db, [habit_id], today)[habit_id]
+
+
+# ==================== Persisted streaks ====================
+
+def latest_runs(db: Session, habit_ids: List[int]) -> dict[int, Tuple[Optional[date], Streak]]:
+    """Full recompute of (last completed date, latest run/longest run) for many habits."""
+    runs = {habit_id: (None, Streak()) for habit_id in habit_ids}
+    if not habit_ids:
+        return runs
+
+    dialect_name = db.get_bind().dialect.name
+    if dialect_name in SQL_DIALECTS:
+        for habit_id, last_date, current, longest in db.execute(latest_runs_statement(dialect_name, habit_ids)):
+            runs[habit_id] = (last_date, Streak(current=current or 0, longest=longest or 0))
+        return runs
+
+    rows = db.query(HabitLog.habit_id, HabitLog.date).filter(
+        HabitLog.habit_id.in_(habit_ids),
+        HabitLog.completed == True
+    ).distinct().order_by(HabitLog.habit_id, HabitLog.date).all()
+
+    dates_by_habit = {}
+    for habit_id, log_date in rows:
+        dates_by_habit.setdefault(habit_id, []).append(log_date)
+    for habit_id, dates in dates_by_habit.items():
+        runs[habit_id] = (dates[-1], streak_from_dates(dates, dates[-1]))
+    return runs
+
+
+def _effective_streak(last_completed_date: Optional[date], run: int, longest: int, today: date) -> Streak:
+    """Current streak as of today from a stored run: it only counts if it ends today."""
+    return Streak(current=run if last_completed_date == today else 0, longest=longest)
+
+
+def current_streaks(db: Session, habit_ids: List[int], today: Optional[date] = None) -> dict[int, Streak]:
+    """Read streaks from the habit_streaks table with one query.
+
+    Habits without a stored record (or with a record ending in the future)
+    are computed on the fly in one extra statement without being persisted.
+    """
+    today = today or date.today()
+    habit_ids = list(habit_ids)
+    if not habit_ids:
+        return {}
+
+    streaks = {}
+    for record in db.query(HabitStreak).filter(HabitStreak.habit_id.in_(habit_ids)).all():
+        if record.last_completed_date is not None and record.last_completed_date > today:
+            continue
+        streaks[record.habit_id] = _effective_streak(
+            record.last_completed_date, record.current_streak, record.longest_streak, today
+        )
+
+    missing = [habit_id for habit_id in habit_ids if habit_id not in streaks]
+    if missing:
+        streaks.update(compute_streaks(db, missing, today))
+    return streaks
+
+
+def _recompute_record(db: Session, record: HabitStreak) -> HabitStreak:
+    last_date, run = latest_runs(db, [record.habit_id])[record.habit_id]
+    record.last_completed_date = last_date
+    record.current_streak = run.current
+    record.longest_streak = run.longest
+    return record
+
+
+def _completed_dates_between(db: Session, habit_id: int, start: date, end: date) -> set:
+    return {
+        log_date for (log_date,) in db.query(HabitLog.date).filter(
+            HabitLog.habit_id == habit_id,
+            HabitLog.date >= start,
+            HabitLog.date <= end,
+            HabitLog.completed == True
+        ).distinct()
+    }
+
+
+def record_completion(db: Session, habit_id: int, log_date: date, completed: bool) -> HabitStreak:
+    """Update the stored streak after the completed flag of one log changed.
+
+    Must run inside the transaction that wrote the log. Completing a day after
+    the last completed date is O(1); back-dated edits only read a window of
+    longest_streak + 1 days on each side of the edited date, which is enough
+    to see both neighbouring runs whole. The rare cases where the longest run
+    may shrink, or the current run loses its last day with nothing before it,
+    fall back to a single-statement full recompute for that habit.
+    """
+    db.flush()
+    record = db.get(HabitStreak, habit_id)
+    if record is None:
+        record = HabitStreak(habit_id=habit_id)
+        db.add(record)
+        return _recompute_record(db, record)
+
+    last = record.last_completed_date
+    one_day = timedelta(days=1)
+
+    if last is None or log_date > last:
+        if completed:
+            record.current_streak = record.current_streak + 1 if last == log_date - one_day else 1
+            record.last_completed_date = log_date
+            record.longest_streak = max(record.longest_streak, record.current_streak)
+        return record
+
+    span = timedelta(days=record.longest_streak + 1)
+    dates = _completed_dates_between(db, habit_id, log_date - span, log_date + span)
+
+    before = 0
+    while log_date - one_day * (before + 1) in dates:
+        before += 1
+    after = 0
+    while log_date + one_day * (after + 1) in dates:
+        after += 1
+
+    if completed:
+        merged = before + 1 + after
+        record.longest_streak = max(record.longest_streak, merged)
+        if log_date + one_day * after == last:
+            record.current_streak = merged
+        return record
+
+    if before + 1 + after >= record.longest_streak:
+        # The run that lost this day may have been the longest one
+        return _recompute_record(db, record)
+
+    run_start = last - one_day * (record.current_streak - 1)
+    if run_start <= log_date <= last:
+        if log_date < last:
+            record.current_streak = after
+        elif before:
+            record.last_completed_date = log_date - one_day
+            record.current_streak = before
+        else:
+            return _recompute_record(db, record)
+    return record
+
+
+def rebuild_streaks(db: Session, habit_ids: Optional[List[int]] = None) -> int:
+    """Recompute and store streak records from raw logs. Returns the number of records written."""
+    if habit_ids is None:
+        habit_ids = [habit_id for (habit_id,) in db.query(Habit.id)]
+    runs = latest_runs(db, habit_ids)
+    existing = {
+        record.habit_id: record
+        for record in db.query(HabitStreak).filter(HabitStreak.habit_id.in_(habit_ids))
+    } if habit_ids else {}
+
+    for habit_id, (last_date, run) in runs.items():
+        record = existing.get(habit_id)
+        if record is None:
+            record = HabitStreak(habit_id=habit_id)
+            db.add(record)
+        record.last_completed_date = last_date
+        record.current_streak = run.current
+        record.longest_streak = run.longest
+
+    db.commit()
+    return len(runs)
+
+
+def check_streaks(db: Session) -> List[dict]:
+    """Compare stored streak records against a full recompute and list mismatches."""
+    habit_ids = [habit_id for (habit_id,) in db.query(Habit.id)]
+    runs = latest_runs(db, habit_ids)
+    stored = {record.habit_id: record for record in db.query(HabitStreak).all()}
+
+    mismatches = []
+    for habit_id, (last_date, run) in runs.items():
+        record = stored.get(habit_id)
+        actual = {
+            "last_completed_date": last_date,
+            "current_streak": run.current,
+            "longest_streak": run.longest,
+        }
+        recorded = {
+            "last_completed_date": record.last_completed_date,
+            "current_streak": record.current_streak,
+            "longest_streak": record.longest_streak,
+        } if record else None
+        if recorded != actual:
+            mismatches.append({"habit_id": habit_id, "stored": recorded, "expected": actual})
+    return mismatches
@@ -0,0 +1,47 @@
+import tempfile
+import zlib
+from typing import Iterable, Iterator
+
+from fastapi import Request
+
+# Bytes gathered before a chunk of a streamed response is sent
+CHUNK_SIZE = 64 * 1024
+
+# Uploaded bodies larger than this are spooled to a temporary file
+SPOOL_MAX_BYTES = 16 * 1024 * 1024
+
+
+def chunked(parts: Iterable[str], size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """UTF-8 encode small pieces of text and group them into chunks of about size bytes."""
+    buffer, buffered = [], 0
+    for part in parts:
+        encoded = part.encode("utf-8")
+        buffer.append(encoded)
+        buffered += len(encoded)
+        if buffered >= size:
+            yield b"".join(buffer)
+            buffer, buffered = [], 0
+    if buffer:
+        yield b"".join(buffer)
+
+
+def gzipped(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Compress a byte stream into a gzip file incrementally."""
+    compressor = zlib.compressobj(wbits=31)  # gzip container
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+async def spool_request_body(request: Request) -> tempfile.SpooledTemporaryFile:
+    """Read a streamed upload into memory or, past SPOOL_MAX_BYTES, a temporary file.
+
+    The file is rewound; the caller closes it.
+    """
+    upload = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
+    async for chunk in request.stream():
+        upload.write(chunk)
+    upload.seek(0)
+    return upload
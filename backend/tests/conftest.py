@@ -0,0 +1,91 @@
+import argparse
+import os
+import sys
+import tempfile
+
+# The app reads DATABASE_URL on import; tests get a throwaway SQLite file
+# unless TEST_DATABASE_URL points them at a (disposable) Postgres database
+os.environ["DATABASE_URL"] = os.getenv("TEST_DATABASE_URL") or (
+    f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'test.db')}"
+)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event, text
+
+import database
+from database import Base, SessionLocal, engine
+from response_cache import response_cache
+from settings_service import settings_cache
+
+
+@pytest.fixture(scope="session", autouse=True)
+def schema():
+    """Build the schema the way deployments do, through `manage.py migrate`."""
+    from manage import cmd_migrate
+
+    cmd_migrate(argparse.Namespace(revision="head"))
+
+
+@pytest.fixture(autouse=True)
+def empty_database(schema):
+    yield
+    with engine.begin() as connection:
+        for table in reversed(Base.metadata.sorted_tables):
+            connection.execute(table.delete())
+        if connection.dialect.name == "sqlite":
+            connection.execute(text("DELETE FROM notes_fts"))
+    response_cache.clear()
+    settings_cache.invalidate()
+
+
+@pytest.fixture
+def db():
+    with SessionLocal() as session:
+        yield session
+
+
+@pytest.fixture
+def client():
+    import main
+    from auth import get_current_user
+
+    main.app.dependency_overrides[get_current_user] = lambda: "admin"
+    yield TestClient(main.app)
+    main.app.dependency_overrides.clear()
+
+
+def app_engines() -> list:
+    """Every engine requests run statements on: the async one too in DB_MODE=async."""
+    if database.async_engine is None:
+        return [engine]
+    return [engine, database.async_engine.sync_engine]
+
+
+class QueryCounter:
+    """Counts the SQL statements run on the app's engines inside a `with` block."""
+
+    def __init__(self):
+        self.statements = []
+
+    def __enter__(self):
+        for app_engine in app_engines():
+            event.listen(app_engine, "after_cursor_execute", self._record)
+        return self
+
+    def __exit__(self, *exc):
+        for app_engine in app_engines():
+            event.remove(app_engine, "after_cursor_execute", self._record)
+
+    def _record(self, connection, cursor, statement, *args):
+        self.statements.append(statement)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+
+@pytest.fixture
+def count_queries():
+    return QueryCounter
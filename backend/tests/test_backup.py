@@ -0,0 +1,90 @@
+import gzip
+import json
+from datetime import date, datetime
+
+import backup
+from backup import stream_backup
+from database import SessionLocal
+from models import Habit, HabitLog, Note, TimerSession, ActiveTimer, HabitStreak
+
+DAY = date(2026, 10, 16)
+
+
+def add_account(db):
+    habit = Habit(name="Read", has_timer=True)
+    db.add(habit)
+    db.flush()
+    db.add_all([
+        HabitLog(habit_id=habit.id, date=DAY, completed=True, time_spent_seconds=600),
+        TimerSession(habit_id=habit.id, date=DAY, start_time=datetime(2026, 10, 16, 8),
+                     end_time=datetime(2026, 10, 16, 8, 10), duration_seconds=600, is_running=False),
+        TimerSession(habit_id=habit.id, date=DAY, start_time=datetime(2026, 10, 16, 9)),
+        Note(content="Capítulo 3", date=DAY, created_at=datetime(2026, 10, 16, 21, 0)),
+    ])
+    db.commit()
+    return habit.id
+
+
+def download(client, **params) -> bytes:
+    response = client.get("/api/admin/backup", params=params)
+    assert response.status_code == 200
+    return response.content
+
+
+def restore(client, content: bytes, **params):
+    return client.post("/api/admin/restore", params=params, content=content)
+
+
+def test_backup_restores_into_an_empty_account(client, db):
+    habit_id = add_account(db)
+    content = download(client)
+    lines = [json.loads(line) for line in content.decode().splitlines()]
+    assert lines[0]["format"] == "eye-life-backup"
+    assert lines[-1]["counts"]["timer_sessions"] == 2
+
+    assert restore(client, content).status_code == 400
+    response = restore(client, content, replace=True)
+    assert response.status_code == 200
+    assert response.json()["tables"] == {"habits": 1, "habit_logs": 1, "timer_sessions": 2, "notes": 1}
+
+    db.expire_all()
+    assert db.query(Note).one().content == "Capítulo 3"
+    assert db.query(ActiveTimer).one().habit_id == habit_id
+    assert db.query(HabitStreak).filter(HabitStreak.habit_id == habit_id).count() == 1
+
+
+def test_gzip_backup_restores_too(client, db):
+    add_account(db)
+    plain = download(client)
+    packed = download(client, gzip=True)
+    assert gzip.decompress(packed).splitlines()[1:] == plain.splitlines()[1:]
+    assert restore(client, packed, replace=True).status_code == 200
+    assert db.query(HabitLog).count() == 1
+
+
+def test_broken_backups_are_rejected_untouched(client, db):
+    add_account(db)
+    content = download(client)
+    truncated = b"\n".join(content.splitlines()[:-1])
+    for broken in (truncated, b"not json", content.replace(b'"name": "notes"', b'"name": "secrets"')):
+        response = restore(client, broken, replace=True)
+        assert response.status_code == 400
+    db.expire_all()
+    assert db.query(Note).count() == 1
+
+
+def test_writes_during_a_backup_are_left_out(db, monkeypatch):
+    add_account(db)
+    # One chunk per line, so the stream can be paused inside the first table
+    monkeypatch.setattr(backup, "chunked", lambda parts: (part.encode("utf-8") for part in parts))
+    stream = stream_backup()
+    started = [next(stream) for _ in range(3)]
+    assert json.loads(started[-1])[1] == "Read"
+
+    with SessionLocal() as other:
+        other.add(Note(content="Written mid-backup", date=DAY))
+        other.commit()
+
+    lines = [json.loads(line) for line in b"".join(started + list(stream)).decode().splitlines()]
+    assert lines[-1]["counts"]["notes"] == 1
+    assert all("Written mid-backup" not in row for row in lines if isinstance(row, list))
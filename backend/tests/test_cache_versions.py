@@ -0,0 +1,9 @@
+from cache_versions import bump_versions, read_versions
+
+
+def test_bump_versions_inserts_then_increments(db):
+    assert read_versions(db, ["a", "b"]) == {"a": 0, "b": 0}
+    bump_versions(db, "a")
+    bump_versions(db, "a", "b")
+    db.commit()
+    assert read_versions(db, ["a", "b"]) == {"a": 2, "b": 1}
@@ -0,0 +1,102 @@
+"""Pins the carryover/deficit rules the by-date edit and timer stop had before the ledger engine."""
+from datetime import date, timedelta
+
+ESTIMATE = 600
+DAY = date.today() - timedelta(days=10)
+NEXT_DAY = DAY + timedelta(days=1)
+
+
+def create_habit(client, **fields) -> int:
+    fields = {"name": "Ler", "has_timer": True, "estimated_duration_seconds": ESTIMATE, **fields}
+    return client.post("/api/habits", json=fields).json()["id"]
+
+
+def set_day(client, habit_id: int, day: date, completed: bool, seconds: int):
+    response = client.put(
+        f"/api/habits/by-date/{day.isoformat()}/{habit_id}",
+        params={"completed": completed, "time_spent_seconds": seconds}
+    )
+    assert response.status_code == 200
+
+
+def balance(client, habit_id: int, day: date) -> tuple[int, int]:
+    for status in client.get(f"/api/habits/by-date/{day.isoformat()}").json():
+        if status["habit_id"] == habit_id:
+            return status["carryover_seconds"], status["deficit_seconds"]
+
+
+def test_by_date_edits_adjust_the_next_day_with_carryover_setting_off(client):
+    assert client.get("/api/settings").json()["carryover_enabled"] is False
+    habit_id = create_habit(client)
+
+    # Completed with time over the estimate: the excess carries over
+    set_day(client, habit_id, DAY, completed=True, seconds=900)
+    assert balance(client, habit_id, NEXT_DAY) == (300, 0)
+
+    # Not completed: the missing time becomes the next day's deficit
+    set_day(client, habit_id, DAY, completed=False, seconds=200)
+    assert balance(client, habit_id, NEXT_DAY) == (0, 400)
+
+    # Not completed and nothing done: the whole estimate is owed
+    set_day(client, habit_id, DAY, completed=False, seconds=0)
+    assert balance(client, habit_id, NEXT_DAY) == (0, ESTIMATE)
+
+    # Completed again: the deficit is cleared
+    set_day(client, habit_id, DAY, completed=True, seconds=0)
+    assert balance(client, habit_id, NEXT_DAY) == (0, 0)
+
+
+def test_habits_without_an_estimate_pass_nothing_on(client):
+    habit_id = create_habit(client, has_timer=False, estimated_duration_seconds=None)
+    set_day(client, habit_id, DAY, completed=False, seconds=0)
+    assert balance(client, habit_id, NEXT_DAY) == (0, 0)
+
+
+def test_replay_keeps_the_balances_and_does_not_chain_deficits(client):
+    habit_id = create_habit(client)
+    set_day(client, habit_id, DAY, completed=False, seconds=0)
+    set_day(client, habit_id, DAY - timedelta(days=3), completed=True, seconds=1000)
+
+    for _ in range(2):
+        assert client.post("/api/admin/carryover/replay").status_code == 200
+        assert balance(client, habit_id, DAY - timedelta(days=2)) == (400, 0)
+        assert balance(client, habit_id, NEXT_DAY) == (0, ESTIMATE)
+        # The row holding NEXT_DAY's deficit does not owe the estimate again
+        assert balance(client, habit_id, NEXT_DAY + timedelta(days=1)) == (0, 0)
+
+
+def test_stopping_a_timer_adjusts_tomorrow_only_with_carryover_enabled(client):
+    habit_id = create_habit(client)
+    tomorrow = date.today() + timedelta(days=1)
+
+    client.post("/api/timers/start", json={"habit_id": habit_id})
+    client.post("/api/timers/stop", json={"habit_id": habit_id})
+    assert balance(client, habit_id, tomorrow) == (0, 0)
+
+    client.put("/api/settings", json={"carryover_enabled": True})
+    client.post("/api/timers/start", json={"habit_id": habit_id})
+    client.post("/api/timers/stop", json={"habit_id": habit_id})
+    assert balance(client, habit_id, tomorrow) == (0, ESTIMATE)
+
+
+def test_imported_days_adjust_the_next_day_like_by_date_edits(client):
+    habit_id = create_habit(client)
+    body = f"habit,date,completed,seconds\nLer,{DAY.isoformat()},false,200\n"
+    report = client.post("/api/habits/import", content=body.encode()).json()
+    assert report["imported"] == 1
+    assert balance(client, habit_id, NEXT_DAY) == (0, 400)
+
+
+def test_a_day_edited_to_nothing_done_owes_the_estimate_even_after_inheriting_a_deficit(client):
+    habit_id = create_habit(client)
+    previous_day = DAY - timedelta(days=1)
+
+    set_day(client, habit_id, previous_day, completed=False, seconds=0)
+    assert balance(client, habit_id, DAY) == (0, ESTIMATE)
+    # DAY only holds the inherited deficit, so it passes nothing on
+    assert balance(client, habit_id, NEXT_DAY) == (0, 0)
+
+    set_day(client, habit_id, DAY, completed=False, seconds=0)
+    assert balance(client, habit_id, NEXT_DAY) == (0, ESTIMATE)
+    assert client.post("/api/admin/carryover/replay").status_code == 200
+    assert balance(client, habit_id, NEXT_DAY) == (0, ESTIMATE)
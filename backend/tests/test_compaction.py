@@ -0,0 +1,89 @@
+from datetime import date, datetime, time, timedelta
+
+import pytest
+from sqlalchemy import func
+
+from compaction import compact_timer_sessions
+from models import Habit, TimerSession, TimerSessionArchive
+
+TODAY = date(2026, 3, 31)
+
+
+def add_sessions(db, habit_id: int, day: date, *durations: int, running: bool = False):
+    for n, seconds in enumerate(durations):
+        start = datetime.combine(day, time(8 + n))
+        db.add(TimerSession(
+            habit_id=habit_id, date=day, start_time=start, end_time=start + timedelta(seconds=seconds),
+            duration_seconds=seconds, is_running=False
+        ))
+    if running:
+        db.add(TimerSession(habit_id=habit_id, date=day, start_time=datetime.combine(day, time(20))))
+
+
+def totals(db):
+    """Finished seconds and raw session counts per (habit, day), as every reader sums them."""
+    return sorted(db.query(
+        TimerSession.habit_id, TimerSession.date,
+        func.sum(TimerSession.duration_seconds), func.sum(TimerSession.session_count)
+    ).filter(TimerSession.is_running == False).group_by(TimerSession.habit_id, TimerSession.date))
+
+
+@pytest.fixture
+def history(db):
+    habits = [Habit(name="Read", has_timer=True), Habit(name="Run", has_timer=True)]
+    db.add_all(habits)
+    db.flush()
+    read, run = (habit.id for habit in habits)
+    for days_ago in range(40):
+        day = TODAY - timedelta(days=days_ago)
+        add_sessions(db, read, day, 60, 120, 30)
+        if days_ago % 2:
+            add_sessions(db, run, day, 600)
+    add_sessions(db, read, TODAY - timedelta(days=35), running=True)
+    db.commit()
+    return read, run
+
+
+def test_compaction_keeps_daily_totals(db, history):
+    read, run = history
+    expected = totals(db)
+
+    report = compact_timer_sessions(db, horizon_days=30, batch_size=7, today=TODAY)
+    assert report["cutoff"] == str(TODAY - timedelta(days=29))
+    # 10 old days of the 3-session habit fold; the 1-session habit has nothing to fold
+    assert (report["groups_compacted"], report["sessions_folded"], report["batches"]) == (10, 30, 2)
+    assert report["rows_before"] - report["rows_after"] == 20
+    assert totals(db) == expected
+
+    old_day = TODAY - timedelta(days=35)
+    folded = db.query(TimerSession).filter(
+        TimerSession.habit_id == read, TimerSession.date == old_day, TimerSession.is_running == False
+    ).one()
+    assert (folded.start_time, folded.end_time) == (datetime.combine(old_day, time(8)),
+                                                    datetime.combine(old_day, time(10, 0, 30)))
+    # The running session is left alone, and so is everything inside the horizon
+    assert db.query(TimerSession).filter(TimerSession.is_running == True).count() == 1
+    assert db.query(TimerSession).filter(TimerSession.habit_id == read, TimerSession.date == TODAY).count() == 3
+
+    again = compact_timer_sessions(db, horizon_days=30, today=TODAY)
+    assert (again["groups_compacted"], again["rows_before"], again["rows_after"]) == (
+        0, report["rows_after"], report["rows_after"]
+    )
+
+
+def test_compaction_archives_raw_sessions_once(db, history):
+    compact_timer_sessions(db, horizon_days=30, archive=True, today=TODAY)
+    assert db.query(TimerSessionArchive).count() == 30
+
+    # Folding already folded days with newer raw sessions archives only the new ones
+    read, _ = history
+    add_sessions(db, read, TODAY - timedelta(days=35), 45)
+    db.commit()
+    report = compact_timer_sessions(db, horizon_days=30, archive=True, today=TODAY)
+    assert (report["groups_compacted"], report["archived"]) == (1, 1)
+    assert db.query(TimerSessionArchive).count() == 31
+
+
+def test_compaction_never_touches_today(db):
+    with pytest.raises(ValueError):
+        compact_timer_sessions(db, horizon_days=0)
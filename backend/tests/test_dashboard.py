@@ -0,0 +1,138 @@
+from datetime import date, timedelta
+
+from response_cache import response_cache
+
+TODAY = date.today()
+
+
+def days_ago(days: int) -> date:
+    return TODAY - timedelta(days=days)
+
+
+def create_habit(client, **fields) -> int:
+    return client.post("/api/habits", json={"name": "Habit", **fields}).json()["id"]
+
+
+def complete(client, habit_id: int, *days: date):
+    for day in days:
+        assert client.put(f"/api/habits/by-date/{day}/{habit_id}", params={"completed": True}).status_code == 200
+
+
+def overall_streak(client) -> int:
+    response_cache.clear()
+    return client.get("/api/dashboard/stats").json()["current_streak"]
+
+
+def test_overall_streak_needs_every_scheduled_habit(client):
+    daily = create_habit(client)
+    weekly = create_habit(client, schedule_days=[days_ago(1).weekday()])
+    complete(client, daily, *(days_ago(n) for n in range(4)))
+    assert overall_streak(client) == 1
+
+    complete(client, weekly, days_ago(1))
+    assert overall_streak(client) == 4
+
+
+def test_overall_streak_skips_days_with_nothing_scheduled(client):
+    habit = create_habit(client, schedule_days=[TODAY.weekday(), days_ago(2).weekday()])
+    complete(client, habit, TODAY, days_ago(2))
+    assert overall_streak(client) == 2
+
+
+def test_overall_streak_ignores_habits_before_their_start_date(client):
+    new = create_habit(client, start_date=str(TODAY))
+    daily = create_habit(client)
+    complete(client, daily, days_ago(2), days_ago(1))
+    assert overall_streak(client) == 0
+
+    complete(client, daily, TODAY)
+    assert overall_streak(client) == 0
+    complete(client, new, TODAY)
+    assert overall_streak(client) == 3
+
+
+def test_stats_query_count_does_not_grow_with_the_streak(client, count_queries):
+    habit = create_habit(client)
+    complete(client, habit, *(days_ago(n) for n in range(3)))
+    response_cache.clear()
+    with count_queries() as short:
+        assert client.get("/api/dashboard/stats").json()["current_streak"] == 3
+
+    complete(client, habit, *(days_ago(n) for n in range(3, 60)))
+    response_cache.clear()
+    with count_queries() as long:
+        assert client.get("/api/dashboard/stats").json()["current_streak"] == 60
+    assert long.count == short.count > 0
+
+
+def progress(client, **params) -> list:
+    response_cache.clear()
+    response = client.get("/api/dashboard/progress", params=params)
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_progress_counts_completions_against_scheduled_habits(client):
+    daily = create_habit(client)
+    weekly = create_habit(client, schedule_days=[days_ago(1).weekday()])
+    create_habit(client, start_date=str(TODAY))
+    complete(client, daily, days_ago(2), days_ago(1))
+    complete(client, weekly, days_ago(1))
+
+    days = progress(client, days=3)
+    assert [(day["date"], day["completed"], day["total"], day["percentage"]) for day in days] == [
+        (str(days_ago(2)), 1, 1, 100.0),
+        (str(days_ago(1)), 2, 2, 100.0),
+        (str(TODAY), 0, 2, 0.0),
+    ]
+
+
+def test_progress_over_an_explicit_range(client):
+    habit = create_habit(client)
+    complete(client, habit, days_ago(40))
+    days = progress(client, start=str(days_ago(41)), end=str(days_ago(39)))
+    assert [(day["date"], day["completed"], day["total"]) for day in days] == [
+        (str(days_ago(41)), 0, 1),
+        (str(days_ago(40)), 1, 1),
+        (str(days_ago(39)), 0, 1),
+    ]
+    assert len(progress(client, start=str(days_ago(9)))) == 10
+    assert client.get(
+        "/api/dashboard/progress", params={"start": str(TODAY), "end": str(days_ago(1))}
+    ).status_code == 400
+
+
+def test_progress_query_count_does_not_grow_with_the_range(client, count_queries):
+    habit = create_habit(client)
+    complete(client, habit, *(days_ago(n) for n in range(0, 300, 7)))
+    response_cache.clear()
+    with count_queries() as week:
+        assert len(client.get("/api/dashboard/progress", params={"days": 7}).json()) == 7
+    response_cache.clear()
+    with count_queries() as year:
+        assert len(client.get("/api/dashboard/progress", params={"days": 365}).json()) == 365
+    assert year.count == week.count > 0
+
+
+def test_completions_on_unscheduled_days_count(client):
+    habit = create_habit(client, schedule_days=[days_ago(1).weekday()])
+    complete(client, habit, TODAY)
+
+    response_cache.clear()
+    assert client.get("/api/dashboard/stats").json()["completed_today"] == 1
+    assert [(day["completed"], day["total"]) for day in progress(client, days=2)] == [(0, 1), (1, 0)]
+
+    client.post(f"/api/habits/{habit}/archive")
+    assert progress(client, days=1)[0]["completed"] == 0
+
+
+def test_progress_rejects_bad_ranges(client):
+    for params in (
+        {"days": 0},
+        {"days": 367},
+        {"start": str(TODAY + timedelta(days=1))},
+        {"start": str(days_ago(1)), "end": str(days_ago(2))},
+        {"start": str(days_ago(400))},
+    ):
+        assert client.get("/api/dashboard/progress", params=params).status_code == 400
+    assert len(progress(client, days=366)) == 366
@@ -0,0 +1,40 @@
+import pytest
+from sqlalchemy import event
+
+import database
+from database import async_database_url
+
+
+def test_async_database_url():
+    assert async_database_url("sqlite:///./eye_life.db") == "sqlite+aiosqlite:///./eye_life.db"
+    assert async_database_url("postgresql://u:p@host/db?sslmode=require") == (
+        "postgresql+asyncpg://u:p@host/db?ssl=require"
+    )
+    assert async_database_url("mysql://u:p@host/db") == "mysql://u:p@host/db"
+
+
+def statements_on(app_engine, request) -> int:
+    statements = []
+
+    def record(connection, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(app_engine, "after_cursor_execute", record)
+    try:
+        assert request().status_code == 200
+    finally:
+        event.remove(app_engine, "after_cursor_execute", record)
+    return len(statements)
+
+
+@pytest.mark.skipif(database.DB_MODE != "async", reason="runs with DB_MODE=async")
+def test_async_mode_serves_requests_on_the_async_engine(client):
+    client.post("/api/habits", json={"name": "Read"})
+    assert statements_on(database.async_engine.sync_engine, lambda: client.get("/api/habits/by-date/2026-03-01")) > 0
+    assert statements_on(database.engine, lambda: client.get("/api/habits/by-date/2026-03-01")) == 0
+
+
+@pytest.mark.skipif(database.DB_MODE != "sync", reason="runs with DB_MODE=sync")
+def test_sync_mode_has_no_async_engine(client):
+    assert database.async_engine is None
+    assert statements_on(database.engine, lambda: client.get("/api/habits/by-date/2026-03-01")) > 0
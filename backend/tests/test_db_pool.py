@@ -0,0 +1,23 @@
+import sqlite3
+
+import pytest
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from db_pool import TimedQueuePool
+
+
+def test_only_pool_timeouts_count_as_timeouts():
+    pool = TimedQueuePool(lambda: sqlite3.connect(":memory:"), pool_size=1, max_overflow=0, timeout=0.01)
+    connection = pool.connect()
+    with pytest.raises(PoolTimeoutError):
+        pool.connect()
+    connection.close()
+    assert pool.metrics.snapshot()["timeouts"] == 1
+
+    def refuse():
+        raise sqlite3.OperationalError("unable to open database file")
+
+    failing = TimedQueuePool(refuse, pool_size=1, max_overflow=0, timeout=0.01)
+    with pytest.raises(sqlite3.OperationalError):
+        failing.connect()
+    assert failing.metrics.snapshot()["timeouts"] == 0
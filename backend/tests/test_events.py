@@ -0,0 +1,91 @@
+import asyncio
+import json
+import threading
+from datetime import datetime
+
+from events import EventBroker, RESYNC, SUBSCRIBER_QUEUE_SIZE, format_sse, timer_events
+from models import Habit, TimerSession, ActiveTimer
+from routers.timers import timer_event_stream
+
+
+def test_format_sse():
+    assert format_sse({"type": "started", "habit_id": 1}) == (
+        'event: started\ndata: {"type": "started", "habit_id": 1}\n\n'
+    )
+
+
+def test_events_published_from_other_threads_reach_subscribers():
+    broker = EventBroker()
+
+    async def scenario():
+        first, second = broker.subscribe(), broker.subscribe()
+        thread = threading.Thread(target=broker.publish, args=({"type": "stopped", "habit_id": 1},))
+        thread.start()
+        thread.join()
+        received = [await asyncio.wait_for(s.queue.get(), 1) for s in (first, second)]
+
+        broker.unsubscribe(second)
+        broker.publish({"type": "reset", "habit_id": 1})
+        await asyncio.sleep(0)
+        return received, await asyncio.wait_for(first.queue.get(), 1), second.queue.empty()
+
+    received, latest, second_idle = asyncio.run(scenario())
+    assert received == [{"type": "stopped", "habit_id": 1}] * 2
+    assert latest == {"type": "reset", "habit_id": 1}
+    assert second_idle
+    assert broker.subscriber_count() == 1
+
+
+def test_a_client_that_falls_behind_is_told_to_resync():
+    broker = EventBroker()
+
+    async def scenario():
+        subscription = broker.subscribe()
+        for n in range(SUBSCRIBER_QUEUE_SIZE + 1):
+            broker.publish({"type": "started", "habit_id": n})
+        await asyncio.sleep(0)
+        return [subscription.queue.get_nowait() for _ in range(subscription.queue.qsize())]
+
+    assert asyncio.run(scenario()) == [RESYNC]
+
+
+def test_subscribers_on_a_closed_loop_are_dropped():
+    broker = EventBroker()
+
+    async def subscribe():
+        broker.subscribe()
+
+    asyncio.run(subscribe())
+    broker.publish({"type": "reset", "habit_id": 1})
+    assert broker.subscriber_count() == 0
+
+
+def test_stream_sends_a_snapshot_then_events(db):
+    habit = Habit(name="Focus", has_timer=True)
+    db.add(habit)
+    db.flush()
+    session = TimerSession(habit_id=habit.id, date=datetime.utcnow().date(), start_time=datetime(2026, 3, 1, 8))
+    db.add(session)
+    db.flush()
+    db.add(ActiveTimer(habit_id=habit.id, session_id=session.id))
+    db.commit()
+
+    async def scenario():
+        subscription = timer_events.subscribe()
+        stream = timer_event_stream(subscription)
+        try:
+            messages = [await anext(stream)]
+            timer_events.publish({"type": "stopped", "habit_id": habit.id})
+            messages.append(await anext(stream))
+            subscription.deliver(RESYNC)
+            messages.append(await anext(stream))
+        finally:
+            await stream.aclose()
+        return messages
+
+    snapshot, stopped, resync = asyncio.run(scenario())
+    expected = [{"habit_id": habit.id, "start_time": "2026-03-01T08:00:00", "time_spent_today": 0}]
+    assert json.loads(snapshot.split("data: ")[1]) == {"type": "snapshot", "timers": expected}
+    assert stopped.startswith("event: stopped\n")
+    assert json.loads(resync.split("data: ")[1])["timers"] == expected
+    assert timer_events.subscriber_count() == 0
@@ -0,0 +1,124 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+import pytest
+
+import habit_logs
+from database import SessionLocal
+from habit_logs import upsert_habit_log, upsert_habit_logs
+from models import Habit, HabitLog
+
+DAY = date(2026, 3, 1)
+
+
+@pytest.fixture(params=["on_conflict", "read_then_write"])
+def upsert_path(request, monkeypatch):
+    """Runs a test through the ON CONFLICT statement and through the fallback for other dialects."""
+    if request.param == "read_then_write":
+        monkeypatch.setattr(habit_logs, "dialect_insert", lambda dialect_name: None)
+    return request.param
+
+
+def add_habit(db) -> int:
+    habit = Habit(name="Read")
+    db.add(habit)
+    db.commit()
+    return habit.id
+
+
+def stored(db, habit_id: int):
+    db.expire_all()
+    logs = db.query(HabitLog).filter(HabitLog.habit_id == habit_id).all()
+    assert len(logs) == 1
+    log = logs[0]
+    return log.completed, log.time_spent_seconds, log.carryover_seconds, log.deficit_seconds
+
+
+def test_upsert_only_touches_the_given_fields(db, upsert_path):
+    habit_id = add_habit(db)
+    log = upsert_habit_log(db, habit_id, DAY, carryover_seconds=30)
+    assert (log.completed, log.time_spent_seconds, log.carryover_seconds, log.deficit_seconds) == (False, 0, 30, 0)
+
+    upsert_habit_log(db, habit_id, DAY, completed=True, time_spent_seconds=100)
+    assert stored(db, habit_id) == (True, 100, 30, 0)
+
+    upsert_habit_log(db, habit_id, DAY, add_seconds=20)
+    upsert_habit_log(db, habit_id, DAY, deficit_seconds=5)
+    assert stored(db, habit_id) == (True, 120, 30, 5)
+
+    log = upsert_habit_log(db, habit_id, DAY)
+    assert (log.completed, log.time_spent_seconds) == (True, 120)
+
+
+def test_upsert_returns_the_stored_row(db, upsert_path):
+    habit_id = add_habit(db)
+    first = upsert_habit_log(db, habit_id, DAY, add_seconds=60)
+    second = upsert_habit_log(db, habit_id, DAY, add_seconds=60)
+    assert second.id == first.id
+    assert second.time_spent_seconds == 120
+
+
+def test_concurrent_increments_all_count(db):
+    habit_id = add_habit(db)
+
+    def add_minute(_):
+        with SessionLocal() as session:
+            upsert_habit_log(session, habit_id, DAY, add_seconds=60)
+            session.commit()
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        list(pool.map(add_minute, range(12)))
+    assert stored(db, habit_id) == (False, 12 * 60, 0, 0)
+
+
+def test_upsert_many_keeps_carryover_and_deficit(db, upsert_path):
+    habit_id = add_habit(db)
+    upsert_habit_log(db, habit_id, DAY, time_spent_seconds=10, carryover_seconds=30, deficit_seconds=5)
+    db.commit()
+
+    assert upsert_habit_logs(db, [
+        {"habit_id": habit_id, "date": DAY, "completed": True, "time_spent_seconds": 300},
+        {"habit_id": habit_id, "date": date(2026, 3, 2), "completed": False, "time_spent_seconds": 0},
+    ]) == 2
+    db.commit()
+    assert db.query(HabitLog).filter(HabitLog.habit_id == habit_id).count() == 2
+    log = db.query(HabitLog).filter(HabitLog.habit_id == habit_id, HabitLog.date == DAY).one()
+    db.refresh(log)
+    assert (log.completed, log.time_spent_seconds, log.carryover_seconds, log.deficit_seconds) == (True, 300, 30, 5)
+
+
+def test_rows_holding_only_a_balance_are_placeholders(db, upsert_path):
+    habit_id = add_habit(db)
+    assert upsert_habit_log(db, habit_id, DAY, deficit_seconds=600).is_placeholder is True
+    assert upsert_habit_log(db, habit_id, DAY, carryover_seconds=0).is_placeholder is True
+    assert upsert_habit_log(db, habit_id, DAY, completed=False, time_spent_seconds=0).is_placeholder is False
+    assert upsert_habit_log(db, habit_id, DAY, deficit_seconds=300).is_placeholder is False
+
+    assert upsert_habit_log(db, habit_id, date(2026, 3, 2), add_seconds=0).is_placeholder is False
+    upsert_habit_log(db, habit_id, date(2026, 3, 3), carryover_seconds=60)
+    upsert_habit_logs(db, [{"habit_id": habit_id, "date": date(2026, 3, 3), "completed": False, "time_spent_seconds": 0}])
+    db.commit()
+    db.expire_all()
+    assert db.query(HabitLog).filter(HabitLog.is_placeholder == True).count() == 0
+
+
+def test_migration_marks_existing_placeholders(db):
+    from alembic import command
+    from manage import alembic_config
+
+    habit_id = add_habit(db)
+    db.add_all([
+        HabitLog(habit_id=habit_id, date=date(2026, 3, 1), completed=False, time_spent_seconds=0, deficit_seconds=600),
+        HabitLog(habit_id=habit_id, date=date(2026, 3, 2), completed=False, time_spent_seconds=0, carryover_seconds=60),
+        HabitLog(habit_id=habit_id, date=date(2026, 3, 3), completed=False, time_spent_seconds=0),
+        HabitLog(habit_id=habit_id, date=date(2026, 3, 4), completed=False, time_spent_seconds=30, deficit_seconds=600),
+        HabitLog(habit_id=habit_id, date=date(2026, 3, 5), completed=True, time_spent_seconds=0, deficit_seconds=600),
+    ])
+    db.commit()
+
+    command.downgrade(alembic_config(), "0009")
+    command.upgrade(alembic_config(), "head")
+    db.expire_all()
+    assert [log.is_placeholder for log in db.query(HabitLog).order_by(HabitLog.date)] == [
+        True, True, False, False, False
+    ]
@@ -0,0 +1,112 @@
+from datetime import date, timedelta
+
+from models import Habit, HabitLog
+from response_cache import response_cache
+from streaks import rebuild_streaks
+
+
+def add_habits(db, count: int, streak_days: int):
+    """Add habits completed on each of the last streak_days days, today included."""
+    today = date.today()
+    for n in range(count):
+        habit = Habit(name=f"Habit {n}")
+        db.add(habit)
+        db.flush()
+        db.add_all(
+            HabitLog(habit_id=habit.id, date=today - timedelta(days=days_ago), completed=True)
+            for days_ago in range(streak_days)
+        )
+    db.flush()
+    rebuild_streaks(db)
+
+
+def list_habits(client, count_queries):
+    response_cache.clear()
+    with count_queries() as queries:
+        response = client.get("/api/habits")
+    assert response.status_code == 200
+    return response.json(), queries.count
+
+
+def test_get_habits_query_count_does_not_grow(client, db, count_queries):
+    add_habits(db, count=2, streak_days=3)
+    habits, few = list_habits(client, count_queries)
+    assert [habit["streak"] for habit in habits] == [3, 3]
+
+    add_habits(db, count=20, streak_days=60)
+    habits, many = list_habits(client, count_queries)
+    assert len(habits) == 22
+    assert habits[-1]["streak"] == 60
+    assert habits[-1]["completed_today"] is True
+    assert many == few > 0
+
+
+def test_month_calendar(client, db, count_queries):
+    mondays = Habit(name="Mondays", schedule_mask=0b0000001)
+    late = Habit(name="Late", has_timer=True, start_date=date(2026, 2, 10))
+    db.add_all([mondays, late, Habit(name="Archived", is_archived=True), Habit(name="March", start_date=date(2026, 3, 1))])
+    db.flush()
+    db.add_all([
+        HabitLog(habit_id=mondays.id, date=date(2026, 2, 9), completed=True, time_spent_seconds=300),
+        HabitLog(habit_id=late.id, date=date(2026, 2, 12), completed=False, deficit_seconds=120),
+        HabitLog(habit_id=late.id, date=date(2026, 2, 13), completed=True),
+        HabitLog(habit_id=late.id, date=date(2026, 3, 1), completed=True, time_spent_seconds=60),
+    ])
+    db.commit()
+
+    with count_queries() as queries:
+        response = client.get("/api/habits/calendar", params={"month": "2026-02"})
+    assert response.status_code == 200
+    assert queries.count == 2
+    calendar = response.json()
+    assert (calendar["start_date"], calendar["days"]) == ("2026-02-01", 28)
+    assert [habit["name"] for habit in calendar["habits"]] == ["Mondays", "Late"]
+
+    first, second = calendar["habits"]
+    assert (first["start_offset"], first["scheduled_bits"], first["completed_bits"]) == (
+        0, 1 << 1 | 1 << 8 | 1 << 15 | 1 << 22, 1 << 8
+    )
+    assert (second["start_offset"], second["scheduled_bits"], second["completed_bits"]) == (
+        9, (1 << 28) - (1 << 9), 1 << 12
+    )
+    assert calendar["cells"] == [[mondays.id, 8, 300, 0, 0], [late.id, 11, 0, 0, 120]]
+
+    assert client.get("/api/habits/calendar", params={"month": "2026-13"}).status_code == 400
+
+
+def test_habits_by_date(client, db):
+    day = date(2026, 2, 9)
+    mondays = Habit(name="Mondays", schedule_mask=0b0000001, estimated_duration_seconds=600)
+    tuesdays = Habit(name="Tuesdays", schedule_mask=0b0000010)
+    db.add_all([mondays, tuesdays, Habit(name="Later", start_date=day + timedelta(days=1)),
+                Habit(name="Inactive", is_active=False)])
+    db.flush()
+    db.add(HabitLog(habit_id=mondays.id, date=day, completed=True, time_spent_seconds=300, carryover_seconds=30))
+    db.commit()
+
+    habits = client.get(f"/api/habits/by-date/{day}").json()
+    assert [(h["habit_name"], h["is_scheduled"], h["completed"], h["time_spent_seconds"], h["carryover_seconds"])
+            for h in habits] == [("Mondays", True, True, 300, 30), ("Tuesdays", False, False, 0, 0)]
+    assert habits[0]["estimated_duration_seconds"] == 600
+    assert client.get("/api/habits/by-date/2026-02-30").status_code == 400
+
+
+def test_habits_by_date_range_matches_single_days(client, db):
+    start = date(2026, 2, 8)
+    db.add_all([Habit(name="Daily"), Habit(name="Later", start_date=start + timedelta(days=2))])
+    db.flush()
+    db.add(HabitLog(habit_id=db.query(Habit.id).filter(Habit.name == "Daily").scalar(),
+                    date=start + timedelta(days=1), completed=True))
+    db.commit()
+
+    days = client.get("/api/habits/by-date", params={"start_date": str(start),
+                                                     "end_date": str(start + timedelta(days=3))}).json()
+    assert [day["date"] for day in days] == [str(start + timedelta(days=n)) for n in range(4)]
+    for day in days:
+        assert day["habits"] == client.get(f"/api/habits/by-date/{day['date']}").json()
+    assert [len(day["habits"]) for day in days] == [1, 1, 2, 2]
+
+    assert client.get("/api/habits/by-date", params={"start_date": "2026-02-10",
+                                                     "end_date": "2026-02-09"}).status_code == 400
+    assert client.get("/api/habits/by-date", params={"start_date": "2024-01-01",
+                                                     "end_date": "2026-02-09"}).status_code == 400
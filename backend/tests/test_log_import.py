@@ -0,0 +1,73 @@
+import io
+import json
+from datetime import date
+
+from log_import import import_habit_logs
+from models import Habit, HabitLog, HabitStreak
+
+TODAY = date(2026, 10, 17)
+
+
+def add_habits(db):
+    habits = [Habit(name="Read"), Habit(name="Run")]
+    db.add_all(habits)
+    db.commit()
+    return [habit.id for habit in habits]
+
+
+def logs(db):
+    db.expire_all()
+    return sorted(
+        (log.habit_id, log.date.isoformat(), log.completed, log.time_spent_seconds)
+        for log in db.query(HabitLog)
+    )
+
+
+def test_csv_import_matches_habits_by_id_or_name(db):
+    read, run = add_habits(db)
+    body = (
+        "habit,date,done,seconds\n"
+        f"{read},2026-10-15,sim,600\n"
+        " read ,2026-10-16,1,\n"
+        "Run,2026-10-16,no,120\n"
+        "Read,2026-10-16,yes,900\n"
+    )
+    report = import_habit_logs(db, io.BytesIO(body.encode()), "csv", today=TODAY)
+    assert (report["rows"], report["imported"], report["skipped"]) == (4, 3, 0)
+    assert (report["habits"], report["start"], report["end"]) == ([read, run], "2026-10-15", "2026-10-16")
+    # A later row for the same habit and day wins
+    assert logs(db) == [
+        (read, "2026-10-15", True, 600), (read, "2026-10-16", True, 900), (run, "2026-10-16", False, 120),
+    ]
+    assert db.get(HabitStreak, read).longest_streak == 2
+
+
+def test_bad_rows_are_skipped_and_reported(db):
+    read, _ = add_habits(db)
+    lines = [
+        {"habit": "Read", "date": "2026-10-16", "completed": True},
+        {"habit": "Swim", "date": "2026-10-16"},
+        {"habit": read, "date": "16/10/2026"},
+        {"habit": read, "date": "2026-10-18"},
+        {"habit": read, "date": "2026-10-14", "seconds": -5},
+    ]
+    body = "\n".join(json.dumps(line) for line in lines) + "\nnot json\n"
+    report = import_habit_logs(db, io.BytesIO(body.encode()), "jsonl", today=TODAY)
+    assert (report["imported"], report["skipped"]) == (1, 5)
+    assert [error["line"] for error in report["errors"]] == [2, 3, 4, 5, 6]
+    assert "in the future" in report["errors"][2]["error"]
+    assert logs(db) == [(read, "2026-10-16", True, 0)]
+
+
+def test_import_endpoint_dry_run_and_errors(client, db):
+    read, _ = add_habits(db)
+    body = b"habit,date,completed\nRead,2026-10-01,true\n"
+    report = client.post("/api/habits/import", params={"dry_run": True}, content=body).json()
+    assert (report["imported"], report["dry_run"]) == (1, True)
+    assert logs(db) == []
+
+    assert client.post("/api/habits/import", content=body).json()["imported"] == 1
+    assert logs(db) == [(read, "2026-10-01", True, 0)]
+
+    assert client.post("/api/habits/import", params={"format": "xlsx"}, content=body).status_code == 400
+    assert client.post("/api/habits/import", content=b"name,seconds\nRead,60\n").status_code == 400
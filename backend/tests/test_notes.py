@@ -0,0 +1,75 @@
+from datetime import date, timedelta
+
+from pagination import NEXT_CURSOR_HEADER
+
+
+def test_following_the_cursor_returns_every_note_once(client):
+    day = date.today() - timedelta(days=1)
+    for n in range(7):
+        client.post("/api/notes", json={"content": f"note {n}", "date": day.isoformat()})
+    client.post("/api/notes", json={"content": "other day", "date": date.today().isoformat()})
+
+    ids, cursor = [], None
+    while True:
+        params = {"note_date": day.isoformat(), "limit": 3, **({"cursor": cursor} if cursor else {})}
+        response = client.get("/api/notes", params=params)
+        assert response.status_code == 200
+        ids += [note["id"] for note in response.json()]
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if not cursor:
+            break
+    assert len(ids) == len(set(ids)) == 7
+    assert ids == sorted(ids, reverse=True)
+
+
+def add_note(client, content: str) -> int:
+    return client.post("/api/notes", json={"content": content, "date": date.today().isoformat()}).json()["id"]
+
+
+def search(client, q: str, **params) -> list:
+    response = client.get("/api/notes/search", params={"q": q, **params})
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_search_matches_every_term_as_a_prefix(client):
+    both = add_note(client, "Corri no parque e depois li um livro")
+    run = add_note(client, "Corrida longa hoje")
+    add_note(client, "Nada a ver")
+
+    assert {note["id"] for note in search(client, "corr")} == {both, run}
+    assert [note["id"] for note in search(client, "corr livro")] == [both]
+    assert search(client, "bicicleta") == []
+
+
+def test_search_ranks_and_pages_results(client):
+    add_note(client, "meditation once, then a long walk through the city and a late lunch with friends")
+    best = add_note(client, "meditation meditation meditation")
+    assert search(client, "meditation")[0]["id"] == best
+    assert [note["id"] for note in search(client, "meditation", limit=1, offset=1)] != [best]
+    for params in ({"limit": 0}, {"offset": -1}):
+        assert client.get("/api/notes/search", params={"q": "meditation", **params}).status_code == 400
+
+
+def test_search_ignores_accents_and_operators(client):
+    note = add_note(client, "Café com a família")
+    assert [n["id"] for n in search(client, "cafe familia")] == [note]
+    assert [n["id"] for n in search(client, 'famil*" ("^')] == [note]
+    assert client.get("/api/notes/search", params={"q": "\"*()"}).status_code == 400
+
+
+def test_snippets_are_escaped_and_highlighted(client):
+    add_note(client, "<script>alert(1)</script> plano de treino")
+    snippet = search(client, "treino")[0]["snippet"]
+    assert "<mark>treino</mark>" in snippet
+    assert "<script>" not in snippet and "&lt;script&gt;" in snippet
+
+
+def test_search_follows_edits_and_deletes(client):
+    note = add_note(client, "first draft")
+    client.put(f"/api/notes/{note}", json={"content": "final version"})
+    assert search(client, "draft") == []
+    assert [n["id"] for n in search(client, "final")] == [note]
+
+    client.delete(f"/api/notes/{note}")
+    assert search(client, "final") == []
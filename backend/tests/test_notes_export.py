@@ -0,0 +1,66 @@
+import gzip
+import json
+from datetime import date, datetime
+
+import notes_export
+from models import Note
+
+
+def add_notes(db):
+    db.add_all([
+        Note(content="Primeira nota", date=date(2026, 10, 16), created_at=datetime(2026, 10, 16, 9, 5)),
+        Note(content="Manhã", date=date(2026, 10, 17), created_at=datetime(2026, 10, 17, 7, 30)),
+        Note(content="Noite", date=date(2026, 10, 17), created_at=datetime(2026, 10, 17, 22, 0)),
+    ])
+    db.commit()
+
+
+def export(client, **params):
+    response = client.get("/api/notes/export", params=params)
+    assert response.status_code == 200
+    return response
+
+
+def test_txt_export_groups_notes_by_day_newest_first(client, db):
+    add_notes(db)
+    response = export(client)
+    assert response.headers["content-type"] == "text/plain; charset=utf-8"
+    assert 'filename="notas-eye-life-' in response.headers["content-disposition"]
+
+    text = response.text
+    assert text.index("SEXTA-FEIRA, 16 DE OUTUBRO DE 2026") > text.index("SÁBADO, 17 DE OUTUBRO DE 2026")
+    assert text.index("[22:00]\nNoite") < text.index("[07:30]\nManhã") < text.index("[09:05]\nPrimeira nota")
+    assert "Exportado em:" in text
+
+
+def test_md_export(client, db):
+    add_notes(db)
+    text = export(client, format="md").text
+    assert text.startswith("# Minhas Notas")
+    assert "\n## Sábado, 17 de outubro de 2026\n\n**22:00**\n\nNoite\n" in text
+
+
+def test_jsonl_export_round_trips_every_note(client, db, monkeypatch):
+    monkeypatch.setattr(notes_export, "EXPORT_BATCH_SIZE", 2)
+    add_notes(db)
+    lines = export(client, format="jsonl").text.splitlines()
+    notes = [json.loads(line) for line in lines]
+    assert [(note["date"], note["content"]) for note in notes] == [
+        ("2026-10-17", "Noite"), ("2026-10-17", "Manhã"), ("2026-10-16", "Primeira nota"),
+    ]
+    assert notes[0]["created_at"] == "2026-10-17T22:00:00"
+
+
+def test_gzip_export_matches_the_plain_one(client, db):
+    add_notes(db)
+    plain = export(client, format="jsonl").content
+    response = export(client, format="jsonl", gzip=True)
+    assert response.headers["content-type"] == "application/gzip"
+    assert response.headers["content-disposition"].endswith('.jsonl.gz"')
+    assert gzip.decompress(response.content) == plain
+
+
+def test_export_of_no_notes_and_bad_formats(client):
+    assert export(client, format="jsonl").content == b""
+    assert "MINHAS NOTAS" in export(client).text
+    assert client.get("/api/notes/export", params={"format": "pdf"}).status_code == 400
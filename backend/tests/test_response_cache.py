@@ -0,0 +1,57 @@
+from datetime import date
+
+from database import SessionLocal
+from response_cache import ResponseCache, response_cache, invalidate_responses, NOTES
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = ResponseCache(maxsize=2)
+    cache.put("a", {}, 1)
+    cache.put("b", {}, 2)
+    assert cache.get("a", {}) == 1
+    cache.put("c", {}, 3)
+    assert cache.get("b", {}) is None
+    assert (cache.get("a", {}), cache.get("c", {})) == (1, 3)
+    # An entry computed at other versions is a miss
+    assert cache.get("a", {"response:logs": 1}) is None
+    assert cache.stats() == {
+        "size": 2, "maxsize": 2, "hits": 3, "misses": 2, "evictions": 1, "hit_rate": 0.6
+    }
+
+
+def lookups():
+    stats = response_cache.stats()
+    return stats["hits"], stats["misses"]
+
+
+def test_writes_make_cached_responses_stale(client):
+    client.get("/api/dashboard/stats")
+    hits, misses = lookups()
+    assert client.get("/api/dashboard/stats").json()["notes_today"] == 0
+    assert lookups() == (hits + 1, misses)
+
+    client.post("/api/notes", json={"content": "Remember", "date": date.today().isoformat()})
+    assert client.get("/api/dashboard/stats").json()["notes_today"] == 1
+    assert lookups() == (hits + 1, misses + 1)
+
+    # A write committed by another worker only bumps the shared version
+    with SessionLocal() as other_worker:
+        invalidate_responses(other_worker, NOTES)
+        other_worker.commit()
+    client.get("/api/dashboard/stats")
+    assert lookups() == (hits + 1, misses + 2)
+
+
+def test_parameters_are_part_of_the_key(client):
+    client.post("/api/habits", json={"name": "Read"})
+    assert len(client.get("/api/dashboard/progress", params={"days": 3}).json()) == 3
+    assert len(client.get("/api/dashboard/progress", params={"days": 5}).json()) == 5
+    assert len(client.get("/api/dashboard/progress", params={"days": 3}).json()) == 3
+    assert response_cache.stats()["size"] == 2
+
+
+def test_admin_cache_endpoints(client):
+    client.get("/api/dashboard/stats")
+    assert client.get("/api/admin/cache").json()["size"] == 1
+    assert client.post("/api/admin/cache/clear").status_code == 200
+    assert client.get("/api/admin/cache").json()["size"] == 0
@@ -0,0 +1,90 @@
+from datetime import date, datetime, time, timedelta
+
+from alembic import command
+
+from manage import alembic_config
+from models import Habit, HabitLog, TimerSession, DailySummary, HabitDailySummary
+from rollups import rebuild_rollups
+
+
+def add_history(db, habit_count: int, days: int):
+    """Habits on different schedules with logs and timer sessions over the last `days` days."""
+    today = date.today()
+    for n in range(habit_count):
+        habit = Habit(name=f"Habit {n}", has_timer=True, schedule_mask=0b1010101 if n % 2 else 0b1111111)
+        db.add(habit)
+        db.flush()
+        for days_ago in range(1, days + 1):
+            day = today - timedelta(days=days_ago)
+            db.add(HabitLog(habit_id=habit.id, date=day, completed=days_ago % 3 != 0, time_spent_seconds=60))
+            db.add(TimerSession(
+                habit_id=habit.id, date=day, start_time=datetime.combine(day, time(8)),
+                duration_seconds=60, is_running=False
+            ))
+    db.commit()
+    rebuild_rollups(db)
+
+
+def summaries(db):
+    db.expire_all()
+    return (
+        sorted((s.date, s.completed_count, s.scheduled_count, s.total_seconds) for s in db.query(DailySummary)),
+        sorted((s.habit_id, s.date, s.completed, s.time_spent_seconds, s.timer_seconds)
+               for s in db.query(HabitDailySummary)),
+    )
+
+
+def assert_matches_rebuild(db):
+    stored = summaries(db)
+    rebuild_rollups(db)
+    assert stored == summaries(db)
+
+
+def test_habit_changes_keep_daily_summary_exact(client, db, count_queries):
+    add_history(db, habit_count=4, days=40)
+    start = (date.today() - timedelta(days=20)).isoformat()
+
+    habit_id = client.post("/api/habits", json={"name": "New", "schedule_days": [0, 2]}).json()["id"]
+    assert_matches_rebuild(db)
+
+    for request in (
+        lambda: client.put(f"/api/habits/{habit_id}", json={"start_date": start}),
+        lambda: client.put("/api/habits/2", json={"schedule_days": [1, 3, 5], "start_date": start}),
+        lambda: client.put("/api/habits/2", json={"name": "Renamed"}),
+        lambda: client.post("/api/habits/1/archive"),
+        lambda: client.post("/api/habits/1/unarchive"),
+        lambda: client.post("/api/habits/3/archive"),
+        lambda: client.delete("/api/habits/4"),
+    ):
+        assert request().status_code == 200
+        assert_matches_rebuild(db)
+
+    # The cost of a habit edit does not depend on how much history there is
+    with count_queries() as few:
+        client.post(f"/api/habits/{habit_id}/archive")
+    add_history(db, habit_count=4, days=200)
+    with count_queries() as many:
+        client.post(f"/api/habits/{habit_id}/unarchive")
+    assert many.count == few.count > 0
+    assert_matches_rebuild(db)
+
+
+def test_migration_fills_rollups_for_existing_history(db):
+    add_history(db, habit_count=2, days=10)
+    expected = summaries(db)
+
+    command.downgrade(alembic_config(), "0006")
+    assert summaries(db) == ([], [])
+    command.upgrade(alembic_config(), "head")
+    assert summaries(db) == expected
+
+
+def test_migration_recounts_completions_on_unscheduled_days(db):
+    add_history(db, habit_count=2, days=10)
+    expected = summaries(db)
+    db.query(DailySummary).update({DailySummary.completed_count: 0})
+    db.commit()
+
+    command.downgrade(alembic_config(), "0008")
+    command.upgrade(alembic_config(), "head")
+    assert summaries(db) == expected
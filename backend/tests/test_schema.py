@@ -0,0 +1,55 @@
+import os
+import subprocess
+import sys
+
+import pytest
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import create_engine
+
+import models  # noqa: F401
+from database import Base, engine
+from manage import alembic_config, check_schema, explain_hot_queries
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_hot_queries_use_their_indexes():
+    """Runs on SQLite, and on Postgres when TEST_DATABASE_URL points at one."""
+    with engine.connect() as connection:
+        results = explain_hot_queries(connection)
+    assert len(results) == 4
+    assert [(label, plan) for label, _, uses_index, plan in results if not uses_index] == []
+
+
+def test_startup_refuses_an_unmigrated_database():
+    check_schema()
+    command.downgrade(alembic_config(), "0006")
+    try:
+        with pytest.raises(RuntimeError, match="manage.py migrate"):
+            check_schema()
+    finally:
+        command.upgrade(alembic_config(), "head")
+
+
+def test_alembic_upgrade_alone_builds_the_models_schema(tmp_path):
+    """`alembic upgrade head` on an empty database, with no create_all, matches models.py."""
+    url = f"sqlite:///{tmp_path / 'fresh.db'}"
+    subprocess.run(
+        [sys.executable, "-m", "alembic", "upgrade", "head"],
+        cwd=BACKEND_DIR, env={**os.environ, "DATABASE_URL": url}, check=True, capture_output=True
+    )
+
+    fresh = create_engine(url)
+    try:
+        with fresh.connect() as connection:
+            context = MigrationContext.configure(connection, opts={
+                # The FTS5 table and its shadow tables are managed outside the models
+                "include_name": lambda name, kind, parent: not (kind == "table" and name.startswith("notes_fts")),
+            })
+            assert compare_metadata(context, Base.metadata) == []
+            assert context.get_current_revision() == ScriptDirectory.from_config(alembic_config()).get_current_head()
+    finally:
+        fresh.dispose()
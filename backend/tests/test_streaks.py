@@ -0,0 +1,86 @@
+import random
+from datetime import date, timedelta
+
+from models import Habit, HabitLog
+from streaks import compute_streaks, streak_from_dates, Streak
+
+TODAY = date(2026, 3, 15)
+
+
+def days_ago(*offsets):
+    return [TODAY - timedelta(days=offset) for offset in sorted(offsets, reverse=True)]
+
+
+def test_streak_from_dates():
+    assert streak_from_dates([], TODAY) == Streak(0, 0)
+    assert streak_from_dates(days_ago(0, 1, 2), TODAY) == Streak(3, 3)
+    # A run that stops yesterday is not current
+    assert streak_from_dates(days_ago(1, 2), TODAY) == Streak(0, 2)
+    assert streak_from_dates(days_ago(0, 2, 3, 4, 5), TODAY) == Streak(1, 4)
+    # Duplicates and future dates are ignored
+    assert streak_from_dates(days_ago(0, 0, 1, -1), TODAY) == Streak(2, 2)
+
+
+def test_sql_streaks_match_the_python_loop(db):
+    random.seed(2)
+    expected = {}
+    for n in range(6):
+        habit = Habit(name=f"Habit {n}")
+        db.add(habit)
+        db.flush()
+        offsets = [offset for offset in range(-3, 120) if random.random() < 0.7]
+        db.add_all(
+            HabitLog(habit_id=habit.id, date=TODAY - timedelta(days=offset), completed=random.random() < 0.9)
+            for offset in offsets
+        )
+        db.flush()
+        completed = sorted(
+            log.date for log in db.query(HabitLog).filter(HabitLog.habit_id == habit.id, HabitLog.completed == True)
+        )
+        expected[habit.id] = streak_from_dates(completed, TODAY)
+    db.commit()
+
+    assert compute_streaks(db, list(expected), TODAY) == expected
+
+
+def test_habit_stats_report_the_current_streak(client):
+    habit_id = client.post("/api/habits", json={"name": "Ler"}).json()["id"]
+    today = date.today()
+    for offset in (0, 1, 2, 4):
+        client.put(f"/api/habits/by-date/{today - timedelta(days=offset)}/{habit_id}", params={"completed": True})
+    assert client.get(f"/api/habits/{habit_id}/stats").json()["current_streak"] == 3
+
+
+def test_random_edits_keep_stored_streaks_exact(client):
+    random.seed(3)
+    today = date.today()
+    habit_ids = [client.post("/api/habits", json={"name": f"Habit {n}"}).json()["id"] for n in range(3)]
+    for _ in range(150):
+        day = today - timedelta(days=random.randint(0, 20))
+        client.put(
+            f"/api/habits/by-date/{day}/{random.choice(habit_ids)}",
+            params={"completed": random.random() < 0.7}
+        )
+    assert client.get("/api/admin/streaks/check").json()["consistent"] is True
+
+
+def test_migration_stores_streaks_for_existing_habits(db):
+    from alembic import command
+    from manage import alembic_config
+    from models import HabitStreak
+    from streaks import check_streaks
+
+    habit = Habit(name="Ler")
+    db.add(habit)
+    db.flush()
+    db.add_all(HabitLog(habit_id=habit.id, date=date.today() - timedelta(days=offset), completed=True)
+               for offset in (0, 1, 2, 5, 6, 7, 8))
+    db.add(Habit(name="Never done"))
+    db.commit()
+    assert len(check_streaks(db)) == 2
+
+    command.downgrade(alembic_config(), "0007")
+    command.upgrade(alembic_config(), "head")
+    db.expire_all()
+    assert check_streaks(db) == []
+    assert db.get(HabitStreak, habit.id).longest_streak == 4
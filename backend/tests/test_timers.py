@@ -0,0 +1,144 @@
+from datetime import date, datetime, timedelta
+
+from models import Habit, TimerSession, ActiveTimer
+
+
+def add_timer_habit(db, name: str = "Focus", **fields) -> Habit:
+    habit = Habit(name=name, has_timer=True, **fields)
+    db.add(habit)
+    db.flush()
+    return habit
+
+
+def add_session(db, habit: Habit, seconds: int, day: date = None, running: bool = False) -> TimerSession:
+    start = datetime.utcnow() - timedelta(seconds=seconds)
+    session = TimerSession(
+        habit_id=habit.id, date=day or date.today(), start_time=start,
+        end_time=None if running else start + timedelta(seconds=seconds),
+        duration_seconds=0 if running else seconds, is_running=running
+    )
+    db.add(session)
+    db.flush()
+    if running:
+        db.add(ActiveTimer(habit_id=habit.id, session_id=session.id))
+    return session
+
+
+def test_status_of_every_timer_habit(client, db, count_queries):
+    idle = add_timer_habit(db, "Idle")
+    busy = add_timer_habit(db, "Busy")
+    add_session(db, busy, 300)
+    add_session(db, busy, 200)
+    add_session(db, busy, 900, day=date.today() - timedelta(days=1))
+    running = add_session(db, busy, 60, running=True)
+    add_timer_habit(db, "Archived", is_archived=True)
+    db.add(Habit(name="No timer"))
+    db.commit()
+
+    with count_queries() as queries:
+        statuses = {status["habit_id"]: status for status in client.get("/api/timers/status").json()}
+    assert queries.count == 2
+    assert set(statuses) == {idle.id, busy.id}
+
+    assert statuses[idle.id] == {
+        "habit_id": idle.id, "is_running": False, "current_session": None, "total_time_today": 0
+    }
+    assert statuses[busy.id]["is_running"] is True
+    assert statuses[busy.id]["current_session"]["id"] == running.id
+    assert 560 <= statuses[busy.id]["total_time_today"] <= 565
+
+    single = client.get(f"/api/timers/{busy.id}/status").json()
+    assert single["current_session"]["id"] == running.id
+    assert abs(single["total_time_today"] - statuses[busy.id]["total_time_today"]) <= 1
+
+
+def test_status_query_count_does_not_grow_with_habits(client, db, count_queries):
+    add_session(db, add_timer_habit(db), 120, running=True)
+    db.commit()
+    with count_queries() as few:
+        client.get("/api/timers/status")
+
+    for n in range(20):
+        habit = add_timer_habit(db, f"Habit {n}")
+        add_session(db, habit, 60)
+        add_session(db, habit, 30, running=n % 2 == 0)
+    db.commit()
+    with count_queries() as many:
+        assert len(client.get("/api/timers/status").json()) == 21
+    assert many.count == few.count > 0
+
+
+def running_rows(db):
+    db.expire_all()
+    sessions = db.query(TimerSession.id).filter(TimerSession.is_running == True).all()
+    return sorted(session_id for (session_id,) in sessions), sorted(
+        (record.habit_id, record.session_id) for record in db.query(ActiveTimer)
+    )
+
+
+def seeing(session_id):
+    """A running_session stand-in for a request that read the running timer before another request changed it."""
+    return lambda request_db, habit_id: request_db.get(TimerSession, session_id) if session_id else None
+
+
+def test_start_and_stop_keep_active_timers_in_sync(client, db):
+    habit = add_timer_habit(db)
+    db.commit()
+
+    first = client.post("/api/timers/start", json={"habit_id": habit.id}).json()
+    second = client.post("/api/timers/start", json={"habit_id": habit.id}).json()
+    assert running_rows(db) == ([second["id"]], [(habit.id, second["id"])])
+    assert db.get(TimerSession, first["id"]).end_time is not None
+
+    assert client.post("/api/timers/stop", json={"habit_id": habit.id}).status_code == 200
+    assert running_rows(db) == ([], [])
+    assert client.post("/api/timers/stop", json={"habit_id": habit.id}).status_code == 404
+
+
+def test_a_start_that_lost_a_race_is_rejected(client, db, monkeypatch):
+    import routers.timers
+
+    habit = add_timer_habit(db)
+    db.commit()
+    stale = client.post("/api/timers/start", json={"habit_id": habit.id}).json()["id"]
+    current = client.post("/api/timers/start", json={"habit_id": habit.id}).json()["id"]
+
+    for seen in (stale, None):
+        monkeypatch.setattr(routers.timers, "running_session", seeing(seen))
+        assert client.post("/api/timers/start", json={"habit_id": habit.id}).status_code == 409
+        assert running_rows(db) == ([current], [(habit.id, current)])
+
+
+def test_a_stop_that_lost_a_race_is_rejected(client, db, monkeypatch):
+    import routers.timers
+
+    habit = add_timer_habit(db)
+    db.commit()
+    stale = client.post("/api/timers/start", json={"habit_id": habit.id}).json()["id"]
+    current = client.post("/api/timers/start", json={"habit_id": habit.id}).json()["id"]
+
+    monkeypatch.setattr(routers.timers, "running_session", seeing(stale))
+    assert client.post("/api/timers/stop", json={"habit_id": habit.id}).status_code == 409
+    assert running_rows(db) == ([current], [(habit.id, current)])
+
+
+def test_reconcile_repairs_running_timers(db):
+    from active_timers import reconcile_active_timers
+
+    crashed, orphaned, dangling = (add_timer_habit(db, name) for name in ("Crashed", "Orphaned", "Dangling"))
+    older = add_session(db, crashed, 600, running=True)
+    db.flush()
+    newer = add_session(db, crashed, 60)
+    newer.is_running, newer.end_time, newer.duration_seconds = True, None, 0
+    lost = add_session(db, orphaned, 120)
+    lost.is_running, lost.end_time, lost.duration_seconds = True, None, 0
+    done = add_session(db, dangling, 30)
+    db.add(ActiveTimer(habit_id=dangling.id, session_id=done.id))
+    db.commit()
+
+    report = reconcile_active_timers(db)
+    assert report == {"running": 2, "closed_sessions": 1, "added": 1, "repointed": 1, "removed": 1}
+    assert running_rows(db) == (
+        sorted([newer.id, lost.id]), [(crashed.id, newer.id), (orphaned.id, lost.id)]
+    )
+    assert db.get(TimerSession, older.id).end_time == db.get(TimerSession, newer.id).start_time
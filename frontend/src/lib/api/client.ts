@@ -70,6 +70,25 @@ export interface HabitDayLog {
     deficit_seconds: number;
 }
 
+export interface CalendarHabit {
+    id: number;
+    name: string;
+    has_timer: boolean;
+    estimated_duration_seconds: number | null;
+    start_offset: number;     // First day offset (0-based) the habit is shown
+    scheduled_bits: number;   // Bit i = scheduled on day offset i
+    completed_bits: number;   // Bit i = completed on day offset i
+}
+
+export interface MonthCalendar {
+    month: string;       // YYYY-MM
+    start_date: string;  // YYYY-MM-DD
+    days: number;
+    habits: CalendarHabit[];
+    // [habit_id, day_offset, time_spent_seconds, carryover_seconds, deficit_seconds]
+    cells: [number, number, number, number, number][];
+}
+
 export interface Note {
     id: number;
     content: string;
@@ -88,12 +107,23 @@ export interface NotesByDate {
     notes: Note[];
 }
 
+export interface NoteSearchResult {
+    id: number;
+    date: string;
+    created_at: string;
+    snippet: string; // HTML-escaped by the server, matches wrapped in <mark>
+}
+
 export interface TimerStatus {
     is_running: boolean;
     current_session: TimerSession | null;
     total_time_today: number;
 }
 
+export interface HabitTimerStatus extends TimerStatus {
+    habit_id: number;
+}
+
 export interface TimerSession {
     id: number;
     habit_id: number;
@@ -104,6 +134,18 @@ export interface TimerSession {
     is_running: boolean;
 }
 
+export interface RunningTimer {
+    habit_id: number;
+    start_time: string;
+    time_spent_today: number;
+}
+
+export type TimerEvent =
+    | { type: 'snapshot'; timers: RunningTimer[] }
+    | { type: 'started'; habit_id: number; start_time: string; time_spent_today: number }
+    | { type: 'stopped'; habit_id: number; duration_seconds: number; time_spent_today: number }
+    | { type: 'reset'; habit_id: number; start_time: string | null; time_spent_today: number };
+
 export interface DashboardStats {
     total_habits: number;
     completed_today: number;
@@ -127,7 +169,7 @@ function getAuthHeaders(): Record<string, string> {
     return token ? { 'Authorization': `Bearer ${token}` } : {};
 }
 
-async function fetchAPI<T>(endpoint: string, options?: RequestInit): Promise<T> {
+async function request(endpoint: string, options?: RequestInit): Promise<Response> {
     const response = await fetch(`${API_BASE}${endpoint}`, {
         ...options,
         headers: {
@@ -151,9 +193,28 @@ async function fetchAPI<T>(endpoint: string, options?: RequestInit): Promise<T>
         throw new Error(error.detail || 'Request failed');
     }
 
+    return response;
+}
+
+async function fetchAPI<T>(endpoint: string, options?: RequestInit): Promise<T> {
+    const response = await request(endpoint, options);
     return response.json();
 }
 
+export interface Page<T> {
+    items: T[];
+    nextCursor: string | null;  // null on the last page
+}
+
+// List endpoints paginated with a cursor return the next one in X-Next-Cursor
+async function fetchPage<T>(endpoint: string): Promise<Page<T>> {
+    const response = await request(endpoint);
+    return {
+        items: await response.json(),
+        nextCursor: response.headers.get('X-Next-Cursor'),
+    };
+}
+
 // ==================== Habits ====================
 
 export const habitsAPI = {
@@ -204,6 +265,14 @@ export const habitsAPI = {
     getByDate: (date: string) =>
         fetchAPI<HabitDayLog[]>(`/habits/by-date/${date}`),
 
+    getByDateRange: (startDate: string, endDate: string) =>
+        fetchAPI<{ date: string; habits: HabitDayLog[] }[]>(
+            `/habits/by-date?start_date=${startDate}&end_date=${endDate}`
+        ),
+
+    getCalendar: (month: string) =>
+        fetchAPI<MonthCalendar>(`/habits/calendar?month=${month}`),
+
     updateByDate: (date: string, habitId: number, completed: boolean, timeSpentSeconds = 0) =>
         fetchAPI<any>(`/habits/by-date/${date}/${habitId}?completed=${completed}&time_spent_seconds=${timeSpentSeconds}`, {
             method: 'PUT',
@@ -212,18 +281,51 @@ export const habitsAPI = {
 
 // ==================== Notes ====================
 
+// Largest page GET /notes serves (NOTES_PAGE_MAX in the backend)
+const NOTES_PAGE_MAX = 500;
+
 export const notesAPI = {
-    getAll: (date?: string) =>
-        fetchAPI<Note[]>(`/notes${date ? `?note_date=${date}` : ''}`),
+    getPage: (options: { date?: string; limit?: number; cursor?: string } = {}) => {
+        const params = new URLSearchParams();
+        if (options.date) params.append('note_date', options.date);
+        if (options.limit) params.append('limit', String(options.limit));
+        if (options.cursor) params.append('cursor', options.cursor);
+        const query = params.toString();
+        return fetchPage<Note>(`/notes${query ? `?${query}` : ''}`);
+    },
+
+    // Follows the cursor until the last page, so no note is left out
+    getAll: async (date?: string): Promise<Note[]> => {
+        const notes: Note[] = [];
+        let cursor: string | undefined;
+        do {
+            const page: Page<Note> = await notesAPI.getPage({ date, limit: NOTES_PAGE_MAX, cursor });
+            notes.push(...page.items);
+            cursor = page.nextCursor ?? undefined;
+        } while (cursor);
+        return notes;
+    },
 
     getToday: () => fetchAPI<Note[]>('/notes/today'),
 
-    getByDate: (startDate?: string, endDate?: string) => {
+    getByDate: (options: { startDate?: string; endDate?: string; days?: number; cursor?: string } = {}) => {
         const params = new URLSearchParams();
-        if (startDate) params.append('start_date', startDate);
-        if (endDate) params.append('end_date', endDate);
+        if (options.startDate) params.append('start_date', options.startDate);
+        if (options.endDate) params.append('end_date', options.endDate);
+        if (options.days) params.append('days', String(options.days));
+        if (options.cursor) params.append('cursor', options.cursor);
         const query = params.toString();
-        return fetchAPI<NotesByDate[]>(`/notes/by-date${query ? `?${query}` : ''}`);
+        return fetchPage<NotesByDate>(`/notes/by-date${query ? `?${query}` : ''}`);
+    },
+
+    search: (q: string, limit = 20, offset = 0) => {
+        const params = new URLSearchParams({ q, limit: String(limit), offset: String(offset) });
+        return fetchAPI<NoteSearchResult[]>(`/notes/search?${params}`);
+    },
+
+    export: async (format: 'txt' | 'md' | 'jsonl' = 'txt') => {
+        const response = await request(`/notes/export?format=${format}`);
+        return response.blob();
     },
 
     get: (id: number) => fetchAPI<Note>(`/notes/${id}`),
@@ -264,6 +366,9 @@ export const timersAPI = {
     getStatus: (habitId: number) =>
         fetchAPI<TimerStatus>(`/timers/${habitId}/status`),
 
+    getAllStatus: () =>
+        fetchAPI<HabitTimerStatus[]>('/timers/status'),
+
     getTodayTime: (habitId: number) =>
         fetchAPI<{ habit_id: number; total_seconds: number }>(`/timers/${habitId}/today`),
 
@@ -271,6 +376,39 @@ export const timersAPI = {
         fetchAPI<{ message: string; habit_id: number }>(`/timers/${habitId}/reset`, {
             method: 'POST',
         }),
+
+    // Server-sent timer events (read with fetch so the auth header is sent).
+    // Resolves when the server closes the stream; rejects on errors or abort.
+    stream: async (onEvent: (event: TimerEvent) => void, signal?: AbortSignal) => {
+        const response = await fetch(`${API_BASE}/timers/stream`, {
+            headers: { Accept: 'text/event-stream', ...getAuthHeaders() },
+            signal,
+        });
+        if (!response.ok || !response.body) {
+            throw new Error('Failed to open timer stream');
+        }
+
+        const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+        let buffer = '';
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) return;
+            buffer += value;
+
+            // Events are separated by a blank line; lines starting with ':' are keepalives
+            let boundary: number;
+            while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+                const block = buffer.slice(0, boundary);
+                buffer = buffer.slice(boundary + 2);
+                const data = block
+                    .split('\n')
+                    .filter(line => line.startsWith('data: '))
+                    .map(line => line.slice(6))
+                    .join('\n');
+                if (data) onEvent(JSON.parse(data));
+            }
+        }
+    },
 };
 
 // ==================== Dashboard ====================
@@ -280,6 +418,9 @@ export const dashboardAPI = {
 
     getProgress: (days = 7) =>
         fetchAPI<DailyProgress[]>(`/dashboard/progress?days=${days}`),
+
+    getProgressRange: (start: string, end: string) =>
+        fetchAPI<DailyProgress[]>(`/dashboard/progress?start=${start}&end=${end}`),
 };
 
 // ==================== Settings ====================
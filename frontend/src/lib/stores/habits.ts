@@ -140,6 +140,14 @@ function createHabitsStore() {
             }
         },
 
+        setTimeSpent(id: number, seconds: number) {
+            update(habits =>
+                habits.map(h =>
+                    h.id === id ? { ...h, time_spent_today: seconds } : h
+                )
+            );
+        },
+
         addTimeSpent(id: number, seconds: number) {
             update(habits =>
                 habits.map(h =>
@@ -76,28 +76,56 @@ function createNotesStore() {
     };
 }
 
+// Days of notes loaded per page of the history
+const HISTORY_PAGE_DAYS = 30;
+
 function createNotesHistoryStore() {
-    const { subscribe, set } = writable<NotesByDate[]>([]);
+    const { subscribe, set, update } = writable<NotesByDate[]>([]);
     const loading = writable(false);
     const error = writable<string | null>(null);
+    const hasMore = writable(false);
+    let nextCursor: string | null = null;
+    let pending: Promise<void> | null = null;
+
+    async function loadPage(cursor?: string) {
+        loading.set(true);
+        error.set(null);
+        try {
+            const page = await notesAPI.getByDate({ days: HISTORY_PAGE_DAYS, cursor });
+            // Pages hold whole days, so they never split a day's group
+            update(history => (cursor ? [...history, ...page.items] : page.items));
+            nextCursor = page.nextCursor;
+            hasMore.set(nextCursor !== null);
+        } catch (e) {
+            error.set(e instanceof Error ? e.message : 'Failed to fetch notes history');
+        } finally {
+            loading.set(false);
+        }
+    }
 
     return {
         subscribe,
         loading,
         error,
+        hasMore,
+
+        async fetch() {
+            set([]);
+            nextCursor = null;
+            pending = loadPage();
+            await pending;
+            pending = null;
+        },
+
+        // Load the next page; concurrent calls share the request in flight
+        async loadMore() {
+            if (pending) return pending;
+            if (!nextCursor) return;
+            pending = loadPage(nextCursor);
+            await pending;
+            pending = null;
+        },
 
-        async fetch(startDate?: string, endDate?: string) {
-            loading.set(true);
-            error.set(null);
-            try {
-                const notesByDate = await notesAPI.getByDate(startDate, endDate);
-                set(notesByDate);
-            } catch (e) {
-                error.set(e instanceof Error ? e.message : 'Failed to fetch notes history');
-            } finally {
-                loading.set(false);
-            }
-        }
     };
 }
 
@@ -1,5 +1,5 @@
 import { writable, get } from 'svelte/store';
-import { timersAPI, type TimerStatus } from '$lib/api/client';
+import { timersAPI, type TimerStatus, type HabitTimerStatus, type TimerEvent } from '$lib/api/client';
 import { habits } from './habits';
 
 interface ActiveTimer {
@@ -16,6 +16,9 @@ function createTimerStore() {
     const error = writable<string | null>(null);
 
     let tickInterval: number | null = null;
+    let streamController: AbortController | null = null;
+    // While the event stream is live it is the source of truth for logged time
+    let streaming = false;
 
     function startTicking() {
         if (tickInterval) return;
@@ -36,11 +39,118 @@ function createTimerStore() {
         }
     }
 
+    function showRunning(habitId: number, startTime: Date, loggedSeconds: number) {
+        set({
+            habitId,
+            startTime,
+            elapsedSeconds: loggedSeconds + Math.floor((Date.now() - startTime.getTime()) / 1000),
+            pausedSeconds: loggedSeconds,
+            isPaused: false
+        });
+        startTicking();
+    }
+
+    function applyEvent(event: TimerEvent) {
+        const current = get({ subscribe });
+
+        switch (event.type) {
+            case 'snapshot': {
+                streaming = true;
+                const running = event.timers.find(t => t.habit_id === current?.habitId) ?? event.timers[0];
+                if (running) {
+                    showRunning(running.habit_id, parseServerTime(running.start_time), running.time_spent_today);
+                } else if (current && !current.isPaused) {
+                    // Stopped elsewhere while we were disconnected
+                    update(timer => timer && { ...timer, isPaused: true, pausedSeconds: timer.elapsedSeconds });
+                }
+                break;
+            }
+            case 'started':
+                // Our own start (or resume) is already reflected locally
+                if (current?.habitId === event.habit_id && !current.isPaused) break;
+                showRunning(event.habit_id, parseServerTime(event.start_time), event.time_spent_today);
+                break;
+            case 'stopped':
+                habits.setTimeSpent(event.habit_id, event.time_spent_today);
+                if (current?.habitId === event.habit_id && !current.isPaused) {
+                    set({
+                        ...current,
+                        isPaused: true,
+                        pausedSeconds: event.time_spent_today,
+                        elapsedSeconds: event.time_spent_today
+                    });
+                }
+                break;
+            case 'reset':
+                habits.setTimeSpent(event.habit_id, 0);
+                if (current?.habitId === event.habit_id) {
+                    set({
+                        ...current,
+                        startTime: event.start_time ? parseServerTime(event.start_time) : new Date(),
+                        elapsedSeconds: 0,
+                        pausedSeconds: 0
+                    });
+                }
+                break;
+        }
+    }
+
     return {
         subscribe,
         loading,
         error,
 
+        // Follow timer changes pushed by the server, from this tab and every other device
+        connect() {
+            if (streamController || typeof window === 'undefined') return;
+            const controller = new AbortController();
+            streamController = controller;
+
+            (async () => {
+                let delay = 1000;
+                while (!controller.signal.aborted) {
+                    try {
+                        await timersAPI.stream(event => {
+                            delay = 1000;
+                            applyEvent(event);
+                        }, controller.signal);
+                    } catch (e) {
+                        if (controller.signal.aborted) return;
+                    }
+                    streaming = false;
+                    // Reconnect with backoff; the next snapshot brings the state up to date
+                    await new Promise(resolve => window.setTimeout(resolve, delay));
+                    delay = Math.min(delay * 2, 30000);
+                }
+            })();
+        },
+
+        disconnect() {
+            streamController?.abort();
+            streamController = null;
+            streaming = false;
+        },
+
+        // Restore the running timer (if any) from one status call for all habits
+        async hydrate(): Promise<HabitTimerStatus[]> {
+            try {
+                const statuses = await timersAPI.getAllStatus();
+                const current = get({ subscribe });
+                const running = statuses.filter(status => status.is_running && status.current_session);
+                const status = running.find(s => s.habit_id === current?.habitId) ?? running[0];
+                if (status?.current_session) {
+                    showRunning(
+                        status.habit_id,
+                        parseServerTime(status.current_session.start_time),
+                        status.total_time_today - status.current_session.duration_seconds
+                    );
+                }
+                return statuses;
+            } catch (e) {
+                return [];
+            }
+        },
+
         async checkStatus(habitId: number): Promise<TimerStatus | null> {
             try {
                 const status = await timersAPI.getStatus(habitId);
@@ -94,8 +204,10 @@ function createTimerStore() {
             // Stop the backend timer to persist the time
             try {
                 await timersAPI.stop(currentTimer.habitId);
-                // Update habit's time in the store
-                habits.addTimeSpent(currentTimer.habitId, currentElapsed - currentTimer.pausedSeconds);
+                // Update habit's time in the store (the stream's stop event does it when connected)
+                if (!streaming) {
+                    habits.addTimeSpent(currentTimer.habitId, currentElapsed - currentTimer.pausedSeconds);
+                }
             } catch (e) {
                 // Even if backend fails, update local state
                 console.error('Failed to persist pause:', e);
@@ -148,8 +260,10 @@ function createTimerStore() {
                 // If paused, the backend session is already stopped, skip the API call
                 if (!currentTimer.isPaused) {
                     const result = await timersAPI.stop(currentTimer.habitId);
-                    // Add session duration to habit's total time spent
-                    habits.addTimeSpent(currentTimer.habitId, result.duration_seconds);
+                    // Add session duration to habit's total time spent (the stream does it when connected)
+                    if (!streaming) {
+                        habits.addTimeSpent(currentTimer.habitId, result.duration_seconds);
+                    }
                 }
             } catch (e) {
                 // Even if backend fails, we still want to clear the local timer
@@ -212,6 +326,11 @@ function createTimerStore() {
     };
 }
 
+// Server timestamps are naive UTC
+function parseServerTime(value: string): Date {
+    return new Date(/(Z|[+-]\d\d:\d\d)$/.test(value) ? value : `${value}Z`);
+}
+
 export function formatTime(seconds: number): string {
     const hrs = Math.floor(seconds / 3600);
     const mins = Math.floor((seconds % 3600) / 60);